@@ -0,0 +1,244 @@
+"""HTTP load test for the dashboard routes.
+
+Seeds a synthetic `dashboard_flat` (companies x years) into a local database,
+drives the main routes with concurrent async clients and prints throughput and
+p50/p95/p99 latency as JSON so runs can be compared across commits.
+
+    python -m bench.load_test --companies 2000 --years 8 --requests 500 --concurrency 32 --output bench_output.txt
+
+The app is served in-process through `httpx.ASGITransport`; `/alerts/send` talks
+to an in-process SMTP stub, so no mail is ever sent.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import time
+import warnings
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterator
+from unittest import mock
+
+import httpx
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+import main
+from db import Base
+from db_models.dashboard_flat import DashboardFlat
+from db_models.risk_contribution import RiskContribution
+from services.query_stats import instrument_engine, query_stats
+
+INDUSTRIES = ["제조업", "건설업", "도매 및 소매업", "정보통신업", "운수 및 창고업",
+              "숙박 및 음식점업", "전문, 과학 및 기술 서비스업", "부동산업"]
+MARKETS = ["KOSPI", "KOSDAQ", "비상장"]
+METRICS = ["icr", "capital_impairment_ratio", "opm", "npm", "roa", "roe", "current_ratio", "quick_ratio",
+           "debt_ratio", "borrow_dependence", "beneish_mscore", "sales_growth", "op_income_growth",
+           "asset_turnover", "ar_turnover"]
+
+
+def company_name(index: int) -> str:
+    return f"합성기업{index:05d}"
+
+
+def seed(engine, companies: int, years: int, first_year: int = 2016, seed_value: int = 42, batch: int = 5000) -> int:
+    """(Re)create `dashboard_flat` and fill it with deterministic synthetic rows (`risk_contribution` stays empty)."""
+    rng = random.Random(seed_value)
+    Base.metadata.drop_all(engine, tables=[DashboardFlat.__table__])
+    Base.metadata.create_all(engine, tables=[DashboardFlat.__table__, RiskContribution.__table__])
+    rows = []
+    total = 0
+    with engine.begin() as conn:
+        for index in range(1, companies + 1):
+            industry = rng.randrange(len(INDUSTRIES))
+            base_prob = rng.betavariate(1.2, 6)
+            for year in range(first_year, first_year + years):
+                row = {"stock_code": f"{index:06d}", "year": year, "company_name": company_name(index),
+                       "industry_code": f"{industry + 10:02d}100", "industry_name": INDUSTRIES[industry],
+                       "industry_category": INDUSTRIES[industry], "market": rng.choice(MARKETS),
+                       "founded_year": rng.randint(1950, 2015), "news_titles": [],
+                       "default_prob": min(1.0, max(0.0, base_prob + rng.gauss(0, 0.05))),
+                       "median_default_prob": 0.1 + industry / 100, "label": int(base_prob > 0.6)}
+                for metric in METRICS:
+                    row[metric] = rng.gauss(10, 20)
+                    row[f"median_{metric}"] = 10.0
+                rows.append(row)
+                if len(rows) >= batch:
+                    conn.execute(insert(DashboardFlat), rows)
+                    total += len(rows)
+                    rows = []
+        if rows:
+            conn.execute(insert(DashboardFlat), rows)
+            total += len(rows)
+    return total
+
+
+class StubSMTP:
+    """Stands in for `smtplib.SMTP`/`SMTP_SSL`; counts messages instead of sending them."""
+
+    sent = 0
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def starttls(self, **kwargs):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def sendmail(self, sender, recipients, message):
+        StubSMTP.sent += 1
+
+
+@contextmanager
+def serve(database_url: str) -> Iterator[None]:
+    """Point the app at `database_url`, stub SMTP and lift the POST rate limit for the run."""
+    engine = create_engine(database_url, future=True)
+    instrument_engine(engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False, future=True)
+
+    def get_bench_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    env = {"ADMIN_TOKEN": "load-test", "RATE_LIMIT_MAX_REQUESTS": "1000000000", "SMTP_HOST": "smtp.invalid",
+           "SMTP_PORT": "465", "SMTP_USER": "load", "SMTP_PASS": "test", "MAIL_TO": "load@example.com"}
+    main.app.dependency_overrides[main.get_db] = get_bench_db
+    try:
+        with mock.patch.dict(os.environ, env), \
+                mock.patch("services.mailer.smtplib.SMTP_SSL", StubSMTP), \
+                mock.patch("services.mailer.smtplib.SMTP", StubSMTP):
+            yield
+    finally:
+        main.app.dependency_overrides.pop(main.get_db, None)
+        engine.dispose()
+
+
+def scenarios(companies: int) -> dict[str, tuple[str, Callable]]:
+    """Route template -> (HTTP method, request factory taking a `random.Random`)."""
+    return {
+        "/company/{corp_id}": ("GET", lambda rng: (f"/company/{rng.randint(1, companies):06d}", {})),
+        "/api/dashboard": ("GET", lambda rng: ("/api/dashboard", {"params": {"corp_id": f"{rng.randint(1, companies):06d}"}})),
+        "/company?corp_id=<name>": ("GET", lambda rng: ("/company", {"params": {"corp_id": company_name(rng.randint(1, companies))}})),
+        "/alerts/send": ("POST", lambda rng: ("/alerts/send", {"headers": {"X-Admin-Token": "load-test", "referer": "/"}})),
+    }
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, min(len(ordered), math.ceil(q / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+async def drive(client: httpx.AsyncClient, method: str, factory, requests: int, concurrency: int, seed_value: int) -> dict:
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker(worker_id: int) -> None:
+        nonlocal errors
+        rng = random.Random(seed_value * 1000 + worker_id)
+        for _ in remaining:
+            path, kwargs = factory(rng)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                key = str(response.status_code)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                key = "transport_error"
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[key] = statuses.get(key, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {"requests": len(latencies), "errors": errors, "statuses": statuses, "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {"p50": round(percentile(latencies, 50), 2), "p95": round(percentile(latencies, 95), 2),
+                           "p99": round(percentile(latencies, 99), 2),
+                           "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+                           "max": round(latencies[-1], 2) if latencies else 0.0}}
+
+
+async def run_scenarios(companies: int, requests: int, concurrency: int, seed_value: int,
+                        only: list[str] | None = None) -> dict:
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as client:
+        for name, (method, factory) in scenarios(companies).items():
+            if only and name not in only:
+                continue
+            query_stats.reset()
+            results[name] = await drive(client, method, factory, requests, concurrency, seed_value)
+            queries = sum(int(totals["count"]) for totals in query_stats.by_route().values())
+            results[name]["db_queries_per_request"] = round(queries / max(results[name]["requests"], 1), 2)
+    return results
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).resolve().parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(database_url: str, companies: int, years: int, requests: int, concurrency: int, seed_value: int = 42,
+        skip_seed: bool = False, only: list[str] | None = None) -> dict:
+    warnings.filterwarnings("ignore", message=".*Decimal objects natively.*")
+    seeded = None
+    if not skip_seed:
+        seed_engine = create_engine(database_url, future=True)
+        seeded = seed(seed_engine, companies, years, seed_value=seed_value)
+        seed_engine.dispose()
+    StubSMTP.sent = 0
+    with serve(database_url):
+        results = asyncio.run(run_scenarios(companies, requests, concurrency, seed_value, only))
+    return {"commit": _git_commit(), "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "config": {"companies": companies, "years": years, "seeded_rows": seeded, "requests": requests,
+                       "concurrency": concurrency, "seed": seed_value,
+                       "database": database_url.split("://", 1)[0]},
+            "smtp_messages": StubSMTP.sent, "routes": results}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Dashboard HTTP load test")
+    ap.add_argument("--database-url", default=os.getenv("LOADTEST_DATABASE_URL", "sqlite:///bench/loadtest.db"),
+                    help="합성 데이터를 적재할 로컬 DB (운영 DB를 지정하지 마세요: dashboard_flat을 다시 만듭니다)")
+    ap.add_argument("--companies", type=int, default=500)
+    ap.add_argument("--years", type=int, default=6)
+    ap.add_argument("--requests", type=int, default=200, help="라우트별 요청 수")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--skip-seed", action="store_true", help="이미 적재된 합성 데이터를 재사용")
+    ap.add_argument("--only", nargs="*", help="실행할 시나리오 이름 (기본: 전체)")
+    ap.add_argument("--output", help="결과 JSON 저장 경로 (기본: stdout)")
+    args = ap.parse_args()
+    report = run(args.database_url, args.companies, args.years, args.requests, args.concurrency,
+                 args.seed, args.skip_seed, args.only)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
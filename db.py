@@ -3,6 +3,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.engine import URL
 from sqlalchemy.orm import sessionmaker, declarative_base
 
+from services.query_stats import instrument_engine
+
 class Settings(BaseSettings):
     # Vercel Marketplace/Neon commonly injects this as DATABASE_URL.
     DATABASE_URL: str | None = None
@@ -18,6 +20,9 @@ class Settings(BaseSettings):
     OPENAI_API_BASE: str | None = "https://api.openai.com/v1"
     OPENAI_MODEL: str | None = "gpt-4o-mini"
 
+    # Statements slower than this are written to the slow-query log (<= 0 disables it).
+    SLOW_QUERY_MS: float = 200.0
+
     # pydantic-settings v2 권장 구성
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=False, extra="ignore")
 
@@ -41,6 +46,7 @@ def build_database_url(config: Settings) -> str | URL:
 db_url = build_database_url(settings)
 
 engine = create_engine(db_url, pool_pre_ping=True, future=True)
+instrument_engine(engine, settings.SLOW_QUERY_MS if settings.SLOW_QUERY_MS > 0 else None)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, future=True)
 Base = declarative_base()
 
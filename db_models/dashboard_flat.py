@@ -1,6 +1,6 @@
 # db_models/dashboard_flat.py
 from sqlalchemy import (
-    Column, String, Text, Integer, Numeric,
+    Column, String, Text, Integer, Numeric, JSON,
     CheckConstraint, Index
 )
 from sqlalchemy.dialects.postgresql import ARRAY
@@ -24,7 +24,8 @@ class DashboardFlat(Base):
     founded_year     = Column(Integer)
 
     # 선택: 뉴스 타이틀(있을 수 있음; ETL에서는 없어도 무관)
-    news_titles      = Column(ARRAY(Text), default=list)
+    # SQLite(로컬 테스트/부하 테스트용)에는 ARRAY가 없어 JSON으로 대체
+    news_titles      = Column(ARRAY(Text).with_variant(JSON(), "sqlite"), default=list)
 
     # === 회사 지표 ===
     default_prob          = Column(Numeric)  # 부실징후확률
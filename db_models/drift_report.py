@@ -0,0 +1,29 @@
+# db_models/drift_report.py
+from sqlalchemy import Column, DateTime, Integer, Numeric, String, Text
+
+from db import Base
+
+
+class DriftReport(Base):
+    """최신 연도 분포가 기준(학습) 구간에서 얼마나 달라졌는지 (etl/drift_batch.py가 기록)"""
+    __tablename__ = "drift_report"
+
+    # 같은 (연도, source)를 다시 돌리면 행을 지우고 새로 넣는다
+    year          = Column(Integer,    primary_key=True)  # 비교 대상(최신) 연도
+    source        = Column(String(16), primary_key=True)  # 'feature' (모델 피처) | 'dashboard' (dashboard_flat 지표)
+    name          = Column(Text,       primary_key=True)  # 피처/컬럼 이름
+
+    ref_years     = Column(Text)       # 기준 구간 (예: '2012-2017')
+    n_ref         = Column(Integer)
+    n_cur         = Column(Integer)
+    missing_ref   = Column(Numeric)    # 결측(NaN/inf) 비율
+    missing_cur   = Column(Numeric)
+    psi           = Column(Numeric)    # population stability index (기준 10분위 + 결측 bin)
+    ks            = Column(Numeric)    # 백분위 격자 위 누적분포 최대 차이
+    ks_critical   = Column(Numeric)    # 유의수준 1% KS 임계값
+    level         = Column(String(8), nullable=False)  # 'ok' | 'warn' | 'alert'
+    model_version = Column(Text)       # source='feature'일 때 '<아티팩트 이름>/<버전>'
+    computed_at   = Column(DateTime(timezone=True))
+
+    def __repr__(self) -> str:
+        return f"<DriftReport {self.year} {self.source}/{self.name} {self.level}>"
@@ -0,0 +1,22 @@
+# db_models/risk_contribution.py
+from sqlalchemy import Column, Integer, Numeric, String, Text
+
+from db import Base
+
+
+class RiskContribution(Base):
+    """회사별 최신 연도 부실확률에 대한 피처 기여도 상위 k개 (etl/explain_batch.py가 미리 계산)"""
+    __tablename__ = "risk_contribution"
+
+    # PK (stock_code, year, rank) 순서라 회사/연도 조회가 인덱스 한 번으로 끝남
+    stock_code    = Column(String(10), primary_key=True)
+    year          = Column(Integer,    primary_key=True)
+    rank          = Column(Integer,    primary_key=True)  # 1 = |기여도| 최대
+
+    feature       = Column(Text, nullable=False)   # 모델 피처 이름 (예: '부채비율')
+    value         = Column(Numeric)                # 원본 피처 값
+    contribution  = Column(Numeric, nullable=False)  # 양수 = 부실 위험 증가 (LR/XGBoost/CatBoost는 log-odds, RF는 확률)
+    model_version = Column(Text)                   # '<아티팩트 이름>/<버전>'
+
+    def __repr__(self) -> str:
+        return f"<RiskContribution {self.stock_code}/{self.year} #{self.rank} {self.feature}>"
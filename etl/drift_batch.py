@@ -0,0 +1,207 @@
+# etl/drift_batch.py
+"""학습 구간 대비 최신 연도 분포 변화(PSI, KS)를 drift_report 테이블에 기록
+
+    python -m etl.drift_batch --csv etl/피처.csv --model 상장-elasticnet-XGBoost-raw
+    python -m etl.drift_batch --window 5 --fail-on-alert        # dashboard_flat 지표만 (load_csv --drift와 같음)
+
+- source='feature'   : 피처 CSV(score_batch와 같은 형식)의 모델 피처. 기준 = 연도 <= 아티팩트 meta의 cutoff
+- source='dashboard' : dashboard_flat의 수치 지표(median_* 제외). 기준 = 최신 연도 이전 전체 또는 최근 --window 연도
+두 경우 모두 비교 대상은 최신 연도다.
+
+기준 구간의 백분위(GRID) 경계로 모든 컬럼을 한 번에 binning 한 뒤(결측은 별도 bin),
+도수 행렬에서 PSI(10분위로 합친 도수)와 KS(누적분포 최대 차이)를 컬럼 전체에 대해 한꺼번에 계산한다.
+PSI >= 0.25 이거나 KS가 1% 임계값과 KS_ALERT를 모두 넘으면 alert, PSI >= 0.1 이거나 KS가 임계값만 넘으면 warn.
+모델 피처에 alert가 하나라도 있으면 report["retrain"] = True (재학습은 이때만).
+"""
+import argparse
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Numeric, and_, delete, func, insert, select
+
+from db_models.dashboard_flat import DashboardFlat
+from db_models.drift_report import DriftReport
+from etl.load_csv import to_year
+from etl.score_batch import read_chunks
+from modeling.registry import load_artifact
+
+GRID = 100          # KS용 백분위 격자 (bin 수)
+PSI_BINS = 10       # PSI용 10분위 (GRID의 약수라 격자 bin을 묶어서 만든다)
+PSI_WARN, PSI_ALERT = 0.1, 0.25
+KS_C = 1.628        # 유의수준 1% 두 표본 KS 계수 c(α)
+KS_ALERT = 0.1      # 표본이 크면 아주 작은 차이도 유의하므로 alert에는 효과 크기 하한을 둔다
+EPS = 1e-4          # 빈 bin의 비율 (log(0) 방지)
+CHUNK_ROWS = 4096   # binning 비교 블록 (행 x 격자 x 컬럼 bool)
+DASHBOARD_METRICS = [c.name for c in DashboardFlat.__table__.columns
+                     if isinstance(c.type, Numeric) and not c.name.startswith("median_")]
+
+
+def quantile_edges(ref: np.ndarray, grid: int = GRID) -> np.ndarray:
+    """기준 분포의 내부 분위수 경계 (grid - 1, 컬럼). 값이 하나도 없는 컬럼은 NaN"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # All-NaN slice
+        return np.nanquantile(ref, np.linspace(0, 1, grid + 1)[1:-1], axis=0)
+
+
+def bin_counts(X: np.ndarray, edges: np.ndarray, chunk_rows: int = CHUNK_ROWS) -> np.ndarray:
+    """컬럼별 bin 도수 (grid + 1, 컬럼). 마지막 행이 결측(NaN/inf) bin"""
+    grid = edges.shape[0] + 1
+    n, p = X.shape
+    offsets = np.arange(p) * (grid + 1)
+    counts = np.zeros(p * (grid + 1), dtype=np.int64)
+    for start in range(0, n, chunk_rows):
+        block = X[start:start + chunk_rows]
+        # bin = 값보다 작은 경계 수 (searchsorted side='left'를 모든 컬럼에 한 번에)
+        idx = (block[:, None, :] > edges[None, :, :]).sum(axis=1)
+        idx[~np.isfinite(block)] = grid
+        counts += np.bincount((idx + offsets).ravel(), minlength=counts.size)
+    return counts.reshape(p, grid + 1).T
+
+
+def drift_stats(ref_counts: np.ndarray, cur_counts: np.ndarray, psi_bins: int = PSI_BINS) -> pd.DataFrame:
+    """도수 행렬 두 개 -> 컬럼별 n / 결측률 / PSI / KS / 임계값 / level"""
+    grid = ref_counts.shape[0] - 1
+    n_ref, n_cur = ref_counts.sum(axis=0), cur_counts.sum(axis=0)
+
+    def coarse(counts, n):
+        merged = np.vstack([counts[:-1].reshape(psi_bins, grid // psi_bins, -1).sum(axis=1), counts[-1:]])
+        return np.maximum(merged / np.maximum(n, 1), EPS)
+
+    r, c = coarse(ref_counts, n_ref), coarse(cur_counts, n_cur)
+    psi = ((c - r) * np.log(c / r)).sum(axis=0)
+
+    # KS는 결측을 뺀 분포끼리 비교
+    m_ref, m_cur = ref_counts[:-1].sum(axis=0), cur_counts[:-1].sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cdf_ref = np.cumsum(ref_counts[:-1], axis=0) / m_ref
+        cdf_cur = np.cumsum(cur_counts[:-1], axis=0) / m_cur
+        ks = np.abs(cdf_ref - cdf_cur).max(axis=0)
+        critical = KS_C * np.sqrt((m_ref + m_cur) / (m_ref * m_cur))
+    ks_significant = ks > critical  # NaN(한쪽이 전부 결측)이면 False
+    level = np.where((psi >= PSI_ALERT) | (ks_significant & (ks >= KS_ALERT)), "alert",
+                     np.where((psi >= PSI_WARN) | ks_significant, "warn", "ok"))
+    with np.errstate(invalid="ignore"):
+        return pd.DataFrame({"n_ref": n_ref, "n_cur": n_cur,
+                             "missing_ref": ref_counts[-1] / n_ref, "missing_cur": cur_counts[-1] / n_cur,
+                             "psi": psi, "ks": ks, "ks_critical": critical, "level": level})
+
+
+def compare(ref: pd.DataFrame, cur: pd.DataFrame, columns: list[str], grid: int = GRID) -> pd.DataFrame:
+    ref_X = ref[columns].to_numpy(dtype=np.float64)
+    ref_X = np.where(np.isfinite(ref_X), ref_X, np.nan)  # inf는 분위수 계산에서 결측 취급
+    cur_X = cur[columns].to_numpy(dtype=np.float64)
+    edges = quantile_edges(ref_X, grid)
+    stats = drift_stats(bin_counts(ref_X, edges), bin_counts(cur_X, edges))
+    stats.insert(0, "name", columns)
+    return stats
+
+
+def _years(years: pd.Series) -> str:
+    return f"{int(years.min())}-{int(years.max())}"
+
+
+def feature_frames(csv_path: str, feature_cols: list[str], train_until: int, chunksize: int,
+                   encoding: str | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """(기준 = 연도 <= train_until, 비교 = 최신 연도) 피처 행"""
+    frame = pd.concat([chunk.assign(year=chunk["year"].map(to_year))[["year", *feature_cols]]
+                       for chunk in read_chunks(csv_path, feature_cols, chunksize, encoding)], ignore_index=True)
+    newest = frame["year"].max()
+    return frame[frame["year"] <= min(train_until, newest - 1)], frame[frame["year"] == newest]
+
+
+def dashboard_frames(engine, window: int | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """(기준 = 최신 연도 이전 [최근 window 연도], 비교 = 최신 연도) dashboard_flat 지표 행"""
+    with engine.connect() as conn:
+        newest = conn.execute(select(func.max(DashboardFlat.year))).scalar()
+        if newest is None:
+            return pd.DataFrame(columns=["year", *DASHBOARD_METRICS]), pd.DataFrame(columns=["year", *DASHBOARD_METRICS])
+        query = select(DashboardFlat.year, *[DashboardFlat.__table__.c[c] for c in DASHBOARD_METRICS])
+        if window:
+            query = query.where(DashboardFlat.year >= newest - window)
+        frame = pd.DataFrame(conn.execute(query).all(), columns=["year", *DASHBOARD_METRICS])
+    # PostgreSQL NUMERIC은 Decimal로 오므로 float로 맞춘다
+    frame[DASHBOARD_METRICS] = frame[DASHBOARD_METRICS].apply(pd.to_numeric, errors="coerce")
+    return frame[frame["year"] < newest], frame[frame["year"] == newest]
+
+
+def _rows(ref: pd.DataFrame, cur: pd.DataFrame, columns: list[str], source: str,
+          model_version: str | None = None) -> pd.DataFrame:
+    if ref.empty or cur.empty:
+        raise ValueError(f"{source}: 기준 구간 또는 최신 연도 데이터가 없음")
+    rows = compare(ref, cur, columns)
+    rows.insert(0, "source", source)
+    rows.insert(0, "year", int(cur["year"].iloc[0]))
+    rows["ref_years"] = _years(ref["year"])
+    rows["model_version"] = model_version
+    return rows
+
+
+def write_report(engine, rows: pd.DataFrame) -> int:
+    DriftReport.__table__.create(engine, checkfirst=True)
+    rows = rows.astype(object).where(pd.notnull(rows), None)
+    keys = rows[["year", "source"]].drop_duplicates().to_dict("records")
+    with engine.begin() as conn:
+        for key in keys:
+            conn.execute(delete(DriftReport).where(and_(DriftReport.year == key["year"],
+                                                        DriftReport.source == key["source"])))
+        conn.execute(insert(DriftReport), rows.to_dict("records"))
+    return len(rows)
+
+
+def drift(engine, csv_path: str | None = None, model: str | None = None, version: str = "latest",
+          artifact_root: str = "modeling/artifacts", train_until: int | None = None, window: int | None = None,
+          dashboard: bool = True, chunksize: int = 50_000, encoding: str | None = None,
+          dry_run: bool = False) -> dict:
+    started = time.perf_counter()
+    parts = []
+    if csv_path and model:
+        artifact = load_artifact(model, version, artifact_root)
+        cutoff = train_until or to_year(artifact.meta.get("cutoff"))
+        if cutoff is None:
+            raise ValueError("학습 구간을 알 수 없음 : --train-until 또는 아티팩트 meta의 cutoff가 필요")
+        ref, cur = feature_frames(csv_path, artifact.feature_cols, cutoff, chunksize, encoding)
+        parts.append(_rows(ref, cur, artifact.feature_cols, "feature",
+                           f"{artifact.meta['name']}/{artifact.meta['version']}"))
+    if dashboard:
+        parts.append(_rows(*dashboard_frames(engine, window), DASHBOARD_METRICS, "dashboard"))
+    if not parts:
+        raise ValueError("비교할 대상이 없음 : --csv/--model 또는 dashboard 중 하나는 필요")
+
+    rows = pd.concat(parts, ignore_index=True)
+    rows["computed_at"] = datetime.now(timezone.utc)
+    alerts = rows[rows["level"] == "alert"]
+    report = {"rows": len(rows), "warn": int((rows["level"] == "warn").sum()),
+              "alerts": [f"{source}/{name}" for source, name in zip(alerts["source"], alerts["name"])],
+              "retrain": bool((alerts["source"] == "feature").any()), "written": 0,
+              "drift_sec": round(time.perf_counter() - started, 2)}
+    if not dry_run:
+        report["written"] = write_report(engine, rows)
+    report["elapsed_sec"] = round(time.perf_counter() - started, 2)
+    return report
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--csv", help="(거래소코드, 연도) + 모델 피처 컬럼을 가진 CSV (--model과 함께)")
+    ap.add_argument("--model", help="artifacts 아래 이름 또는 버전 디렉터리 경로")
+    ap.add_argument("--version", default="latest")
+    ap.add_argument("--artifacts", default="modeling/artifacts")
+    ap.add_argument("--train-until", type=int, dest="train_until", help="기준 구간 마지막 연도 (기본: 아티팩트 cutoff)")
+    ap.add_argument("--window", type=int, help="dashboard 기준 구간 연도 수 (기본: 최신 연도 이전 전체)")
+    ap.add_argument("--no-dashboard", action="store_false", dest="dashboard", help="dashboard_flat 지표는 건너뜀")
+    ap.add_argument("--chunksize", type=int, default=50_000)
+    ap.add_argument("--encoding", default=None)
+    ap.add_argument("--dry-run", action="store_true", help="계산만 하고 DB는 변경하지 않음")
+    ap.add_argument("--fail-on-alert", action="store_true", help="alert가 하나라도 있으면 종료 코드 1")
+    args = ap.parse_args()
+
+    from db import engine
+    report = drift(engine, args.csv, args.model, args.version, args.artifacts, args.train_until, args.window,
+                   args.dashboard, args.chunksize, args.encoding, args.dry_run)
+    print(report)
+    if args.fail_on_alert and report["alerts"]:
+        sys.exit(1)
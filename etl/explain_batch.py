@@ -0,0 +1,95 @@
+# etl/explain_batch.py
+"""등록된 모델로 회사별 최신 연도 피처 기여도(top-k)를 risk_contribution 테이블에 미리 계산
+
+    python -m etl.explain_batch --csv etl/피처.csv --model 상장-elasticnet-XGBoost-raw --top-k 5
+    python -m etl.explain_batch --csv etl/피처.csv --model modeling/artifacts/상장-elasticnet-LR-raw/v0002 --dry-run
+
+피처 CSV 형식은 score_batch와 같다 ((거래소코드|stock_code, 연도|year) + 모델 feature_cols).
+청크로 읽으며 회사별 최신 연도 행만 남긴 뒤 modeling/explain.py로 batch 단위 기여도를 계산하고,
+대상 회사의 기존 행을 지운 다음 새 top-k 행을 넣는다. 전체가 한 트랜잭션이다.
+대시보드(get_company_detail)는 (stock_code, year)로 이 테이블을 한 번 조회한다.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, delete, insert
+
+from db_models.risk_contribution import RiskContribution
+from etl.load_csv import to_year, zfill6
+from etl.score_batch import read_chunks
+from modeling.explain import BATCH_SIZE, contributions, top_k
+from modeling.registry import load_artifact
+
+
+def latest_rows(csv_path: str, feature_cols: list[str], chunksize: int, encoding: str | None = None) -> pd.DataFrame:
+    """회사별 최신 연도 한 행 (같은 키가 여러 번 있으면 마지막 행). 피처에 NaN/inf가 있는 행은 제외"""
+    latest = None
+    for chunk in read_chunks(csv_path, feature_cols, chunksize, encoding):
+        chunk = chunk.assign(stock_code=chunk["stock_code"].map(zfill6), year=chunk["year"].map(to_year))
+        chunk = chunk[np.isfinite(chunk[feature_cols].to_numpy(dtype=np.float64)).all(axis=1)]
+        frame = chunk if latest is None else pd.concat([latest, chunk], ignore_index=True)
+        # 안정 정렬이라 같은 (회사, 연도)는 나중 행이 뒤에 남는다
+        latest = (frame.sort_values(["stock_code", "year"], kind="stable")
+                  .drop_duplicates("stock_code", keep="last"))
+    if latest is None:
+        return pd.DataFrame(columns=["stock_code", "year", *feature_cols])
+    return latest.reset_index(drop=True)
+
+
+def explain_frame(artifact, frame: pd.DataFrame, k: int, batch_size: int = BATCH_SIZE) -> pd.DataFrame:
+    """회사 x top-k 기여도 행 (stock_code, year, rank, feature, value, contribution)"""
+    X = frame[artifact.feature_cols].to_numpy(dtype=np.float64)
+    contrib = contributions(artifact, X, batch_size)
+    idx = top_k(contrib, k)
+    n, k = idx.shape
+    return pd.DataFrame({
+        "stock_code": np.repeat(frame["stock_code"].to_numpy(), k),
+        "year": np.repeat(frame["year"].to_numpy().astype(int), k),
+        "rank": np.tile(np.arange(1, k + 1), n),
+        "feature": np.asarray(artifact.feature_cols, dtype=object)[idx].ravel(),
+        "value": np.take_along_axis(X, idx, axis=1).ravel(),
+        "contribution": np.take_along_axis(contrib, idx, axis=1).ravel(),
+    })
+
+
+def explain(engine, csv_path: str, model: str, version: str = "latest", artifact_root: str = "modeling/artifacts",
+            k: int = 5, chunksize: int = 50_000, batch_size: int = BATCH_SIZE, encoding: str | None = None,
+            dry_run: bool = False) -> dict:
+    artifact = load_artifact(model, version, artifact_root)
+    started = time.perf_counter()
+    frame = latest_rows(csv_path, artifact.feature_cols, chunksize, encoding)
+    rows = explain_frame(artifact, frame, k, batch_size)
+    rows["model_version"] = f"{artifact.meta['name']}/{artifact.meta['version']}"
+    report = {"artifact": str(artifact.path), "companies": len(frame), "rows": len(rows), "deleted": 0,
+              "explain_sec": round(time.perf_counter() - started, 2)}
+
+    if not dry_run and len(rows):
+        RiskContribution.__table__.create(engine, checkfirst=True)
+        with engine.begin() as conn:
+            # 회사마다 최신 연도 설명만 유지 (이전 연도/이전 모델의 행은 지운다)
+            result = conn.execute(delete(RiskContribution).where(RiskContribution.stock_code == bindparam("code")),
+                                  [{"code": code} for code in frame["stock_code"]])
+            report["deleted"] = result.rowcount
+            conn.execute(insert(RiskContribution), rows.to_dict("records"))
+    report["elapsed_sec"] = round(time.perf_counter() - started, 2)
+    return report
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--csv", required=True, help="(거래소코드, 연도) + 모델 피처 컬럼을 가진 CSV")
+    ap.add_argument("--model", required=True, help="artifacts 아래 이름 또는 버전 디렉터리 경로 (LR/RF/XGBoost/CatBoost)")
+    ap.add_argument("--version", default="latest")
+    ap.add_argument("--artifacts", default="modeling/artifacts")
+    ap.add_argument("--top-k", type=int, default=5, dest="top_k")
+    ap.add_argument("--chunksize", type=int, default=50_000)
+    ap.add_argument("--batch-size", type=int, default=BATCH_SIZE, dest="batch_size", help="기여도 계산 batch 행 수")
+    ap.add_argument("--encoding", default=None)
+    ap.add_argument("--dry-run", action="store_true", help="계산만 하고 DB는 변경하지 않음")
+    args = ap.parse_args()
+
+    from db import engine
+    print(explain(engine, args.csv, args.model, args.version, args.artifacts, args.top_k, args.chunksize,
+                  args.batch_size, args.encoding, args.dry_run))
@@ -253,5 +253,9 @@ if __name__ == "__main__":
     ap.add_argument("--csv", default="etl/대시보드용데이터.csv")
     ap.add_argument("--encoding", default=None)
     ap.add_argument("--truncate", action="store_true", help="적재 전 TRUNCATE 실행")
+    ap.add_argument("--drift", action="store_true", help="적재 후 최신 연도 지표 drift 검사 (etl/drift_batch.py)")
     args = ap.parse_args()
     main(args.csv, args.encoding, args.truncate)
+    if args.drift:
+        from etl.drift_batch import drift
+        print(drift(engine))
@@ -0,0 +1,166 @@
+# etl/score_batch.py
+"""등록된 모델로 dashboard_flat.default_prob / label 일괄 갱신
+
+    python -m etl.score_batch --csv etl/피처.csv --model 상장-elasticnet-XGBoost-raw
+    python -m etl.score_batch --csv etl/피처.csv --model modeling/artifacts/상장-elasticnet-XGBoost-raw/v0003 --dry-run
+
+피처 CSV는 (거래소코드|stock_code, 연도|year) 키와 모델의 feature_cols를 포함해야 한다.
+청크 단위로 읽어 벡터화 예측한 뒤(시퀀스 LSTM은 기업 이력이 필요해 전체를 한 번에) 임시 테이블에 모으고(PostgreSQL은 COPY),
+UPDATE ... FROM 조인 한 번으로 반영한 다음 업종(industry_code, year)별 median_default_prob을 다시 계산한다.
+전체가 한 트랜잭션이라 중간에 실패하면 기존 점수가 그대로 남는다.
+"""
+import argparse
+import io
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from etl.load_csv import to_year, zfill6
+from modeling.registry import load_artifact
+
+STAGE = "score_stage"
+STAGE_COLUMNS = ["seq", "stock_code", "year", "default_prob", "label"]
+KEY_ALIASES = {"거래소코드": "stock_code", "연도": "year"}
+
+
+def read_chunks(csv_path: str, feature_cols: list[str], chunksize: int, encoding: str | None = None):
+    usecols = lambda c: c in feature_cols or c in KEY_ALIASES or c in KEY_ALIASES.values()
+    try:
+        reader = pd.read_csv(csv_path, encoding=encoding or "utf-8", usecols=usecols, chunksize=chunksize)
+        first = next(reader, None)
+    except UnicodeDecodeError:
+        reader = pd.read_csv(csv_path, encoding="cp949", usecols=usecols, chunksize=chunksize)
+        first = next(reader, None)
+    if first is None:
+        return
+    missing = [c for c in ["stock_code", "year", *feature_cols] if c not in first.rename(columns=KEY_ALIASES).columns]
+    if missing:
+        raise ValueError(f"필수 컬럼 누락: {missing}")
+    yield first.rename(columns=KEY_ALIASES)
+    for chunk in reader:
+        yield chunk.rename(columns=KEY_ALIASES)
+
+
+def score_chunk(artifact, chunk: pd.DataFrame) -> tuple[pd.DataFrame, int]:
+    """키 정규화 + 예측. 피처에 NaN/inf가 있는 행은 건너뛰고 그 수를 함께 반환
+
+    시퀀스 LSTM은 chunk 안의 같은 기업 이전 연도 행으로 학습 때와 같은 윈도우를 만든다.
+    """
+    X = chunk[artifact.feature_cols].to_numpy(dtype=np.float64)
+    ok = np.isfinite(X).all(axis=1)
+    codes = chunk.loc[ok, "stock_code"].map(zfill6).to_numpy()
+    years = chunk.loc[ok, "year"].map(to_year).to_numpy()
+    prob = np.clip(artifact.predict_proba(X[ok], groups=codes, years=years).astype(np.float64), 0.0, 1.0)
+    scored = pd.DataFrame({
+        "stock_code": codes,
+        "year": years,
+        "default_prob": prob,
+        "label": (prob >= artifact.threshold).astype(int),
+    })
+    return scored, int((~ok).sum())
+
+
+def _copy_stage(conn, frame: pd.DataFrame):
+    # psycopg2 COPY: 행 단위 INSERT보다 수십 배 빠름
+    buf = io.StringIO()
+    frame.to_csv(buf, index=False, header=False)
+    buf.seek(0)
+    cursor = conn.connection.driver_connection.cursor()
+    cursor.copy_expert(f"COPY {STAGE} ({', '.join(STAGE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buf)
+
+
+def _insert_stage(conn, frame: pd.DataFrame):
+    conn.execute(text(f"INSERT INTO {STAGE} ({', '.join(STAGE_COLUMNS)}) "
+                      f"VALUES ({', '.join(':' + c for c in STAGE_COLUMNS)})"),
+                 frame.to_dict("records"))
+
+
+def _update_medians(conn, postgres: bool) -> int:
+    if postgres:
+        result = conn.execute(text("""
+            UPDATE dashboard_flat d
+               SET median_default_prob = m.median
+              FROM (SELECT industry_code, year,
+                           percentile_cont(0.5) WITHIN GROUP (ORDER BY default_prob) AS median
+                      FROM dashboard_flat
+                     WHERE default_prob IS NOT NULL
+                     GROUP BY industry_code, year) m
+             WHERE d.industry_code IS NOT DISTINCT FROM m.industry_code AND d.year = m.year
+        """))
+        return result.rowcount
+    # percentile_cont가 없는 DB(SQLite 등)는 pandas로 계산해 일괄 UPDATE
+    rows = pd.DataFrame(conn.execute(text(
+        "SELECT industry_code, year, default_prob FROM dashboard_flat WHERE default_prob IS NOT NULL")).all(),
+        columns=["industry_code", "year", "default_prob"])
+    if rows.empty:
+        return 0
+    rows["default_prob"] = rows["default_prob"].astype(float)
+    medians = rows.groupby(["industry_code", "year"], dropna=False)["default_prob"].median().reset_index()
+    medians = medians.astype(object).where(pd.notnull(medians), None)
+    result = conn.execute(text("""
+        UPDATE dashboard_flat SET median_default_prob = :default_prob
+         WHERE industry_code IS :industry_code AND year = :year
+    """), medians.to_dict("records"))
+    return result.rowcount
+
+
+def score(engine, csv_path: str, model: str, version: str = "latest", artifact_root: str = "modeling/artifacts",
+          chunksize: int = 50_000, encoding: str | None = None, dry_run: bool = False) -> dict:
+    artifact = load_artifact(model, version, artifact_root)
+    postgres = engine.dialect.name == "postgresql"
+    started = time.perf_counter()
+    report = {"artifact": str(artifact.path), "scored": 0, "skipped": 0, "updated": 0, "medians_updated": 0}
+
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {STAGE}"))
+        conn.execute(text(f"CREATE TEMP TABLE {STAGE} "
+                          "(seq BIGINT, stock_code TEXT, year INT, default_prob NUMERIC, label INT)"))
+        chunks = read_chunks(csv_path, artifact.feature_cols, chunksize, encoding)
+        if artifact.needs_history:
+            # 기업 이력이 청크 경계에서 끊기지 않도록 한 번에 예측
+            frames = list(chunks)
+            chunks = [pd.concat(frames, ignore_index=True)] if frames else []
+        for chunk in chunks:
+            scored, skipped = score_chunk(artifact, chunk)
+            report["skipped"] += skipped
+            if scored.empty:
+                continue
+            scored.insert(0, "seq", np.arange(report["scored"], report["scored"] + len(scored)))
+            (_copy_stage if postgres else _insert_stage)(conn, scored)
+            report["scored"] += len(scored)
+            print(f"[OK] scored {report['scored']} rows")
+
+        if not dry_run and report["scored"]:
+            conn.execute(text(f"CREATE INDEX ix_{STAGE}_key ON {STAGE} (stock_code, year)"))
+            # 같은 키가 여러 번 있으면 마지막 행 기준 (load_csv의 drop_duplicates(keep="last")와 동일)
+            result = conn.execute(text(f"""
+                UPDATE dashboard_flat
+                   SET default_prob = s.default_prob, label = s.label
+                  FROM (SELECT stock_code, year, default_prob, label FROM {STAGE}
+                         WHERE seq IN (SELECT max(seq) FROM {STAGE} GROUP BY stock_code, year)) s
+                 WHERE dashboard_flat.stock_code = s.stock_code AND dashboard_flat.year = s.year
+            """))
+            report["updated"] = result.rowcount
+            report["medians_updated"] = _update_medians(conn, postgres)
+        conn.execute(text(f"DROP TABLE {STAGE}"))
+
+    report["elapsed_sec"] = round(time.perf_counter() - started, 2)
+    return report
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--csv", required=True, help="(거래소코드, 연도) + 모델 피처 컬럼을 가진 CSV")
+    ap.add_argument("--model", required=True, help="artifacts 아래 이름 또는 버전 디렉터리 경로")
+    ap.add_argument("--version", default="latest")
+    ap.add_argument("--artifacts", default="modeling/artifacts")
+    ap.add_argument("--chunksize", type=int, default=50_000)
+    ap.add_argument("--encoding", default=None)
+    ap.add_argument("--dry-run", action="store_true", help="예측만 하고 DB는 변경하지 않음")
+    args = ap.parse_args()
+
+    from db import engine
+    print(score(engine, args.csv, args.model, args.version, args.artifacts, args.chunksize, args.encoding,
+                args.dry_run))
@@ -2,31 +2,81 @@ import logging
 import os
 import time
 from collections import defaultdict, deque
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from dotenv import find_dotenv, load_dotenv
 from fastapi import Depends, FastAPI, HTTPException, Query, Request
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
+from starlette.routing import Match
 
-from db import get_db
+from db import engine, get_db
+from db_models.risk_contribution import RiskContribution
 from services.ai_report import generate_report
 from services.company_service import get_company_detail, get_latest_alert_companies, resolve_stock_code
 from services.mailer import send_alert_email
+from services.metrics import request_metrics
+from services.query_stats import current_route
+from services.scoring import scorer
 
 load_dotenv(find_dotenv(), override=False)
 logger = logging.getLogger(__name__)
 BASE_DIR = Path(__file__).resolve().parent
 
-app = FastAPI(title="EWS Dashboard (SSR, no-JS)")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the online scoring model once per process and make sure the explain-batch table exists."""
+    try:
+        scorer.load_from_env()
+    except Exception:
+        logger.exception("Scoring model could not be loaded; POST /api/score is disabled")
+    try:
+        # Empty until etl/explain_batch.py runs; company detail reads it on every request.
+        RiskContribution.__table__.create(engine, checkfirst=True)
+    except Exception:
+        logger.exception("risk_contribution table could not be created")
+    yield
+    await scorer.close()
+
+
+app = FastAPI(title="EWS Dashboard (SSR, no-JS)", lifespan=lifespan)
 app.mount("/static", StaticFiles(directory=BASE_DIR / "static"), name="static")
 templates = Jinja2Templates(directory=BASE_DIR / "templates")
 
 _requests: dict[str, deque[float]] = defaultdict(deque)
 
 
+def _route_template(request: Request) -> str:
+    """Return the matched route path (e.g. `/company/{corp_id}`) to keep metric labels bounded."""
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", request.url.path)
+    return "<unmatched>"
+
+
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    """Record latency, status and in-flight metrics; tag SQL statements with the route template."""
+    route = _route_template(request)
+    token = current_route.set(route)
+    request_metrics.started(request.method, route)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        request_metrics.finished(request.method, route, status, time.perf_counter() - started)
+        current_route.reset(token)
+
+
 def _to_percent(value: object) -> float:
     """Convert canonical DB probability (0–1) to a display percentage (0–100)."""
     try:
@@ -43,27 +93,39 @@ def _ctx(request: Request, data: dict) -> dict:
 
 
 def _fallback_data(corp_id: str) -> dict:
+    request_metrics.record_fallback(current_route.get())
     return {
         "company_info": {"company_name": "데이터를 불러올 수 없습니다", "ticker": corp_id,
                          "market_type": "", "founded_year": 0, "median_default_prob_pct": 0},
         "chart_data": {"bankruptcy_probabilities": {}, "title": "부실확률 추이"},
         "news_data": {}, "default_prob": 0, "insolvency_data": {"percent": "-", "status": "정보 없음"},
-        "risk_factor": {}, "sector_risk": {"title": "업종별 부실확률 중앙값", "series": [], "all_series": []},
+        "risk_factor": {}, "risk_contributions": [], "sector_risk": {"title": "업종별 부실확률 중앙값", "series": [], "all_series": []},
         "benchmark": {"categories": [], "tolerance": 0.05}, "beneish_mscore": None,
         "beneish_year": None, "score_fill": 0, "threshold": -2.22,
     }
 
 
-def _protect_post(request: Request) -> None:
-    """Allow an administrator token, otherwise apply a small per-IP abuse limit."""
+def _require_admin(request: Request) -> None:
+    """Require a configured administrator token; there is no anonymous fallback."""
+    expected = os.getenv("ADMIN_TOKEN", "").strip()
+    if not expected or request.headers.get("X-Admin-Token", "") != expected:
+        raise HTTPException(status_code=403, detail="Administrator authorization is required.")
+
+
+def _protect_post(request: Request, scope: str = "post", limit_env: str = "RATE_LIMIT_MAX_REQUESTS",
+                  default_limit: int = 5) -> None:
+    """Allow an administrator token, otherwise apply a small per-IP abuse limit.
+
+    Each `scope` keeps its own per-IP counter, so a busy API route does not use up the form routes' budget.
+    """
     expected = os.getenv("ADMIN_TOKEN", "").strip()
     supplied = request.headers.get("X-Admin-Token", "")
     if expected and supplied != expected:
         raise HTTPException(status_code=403, detail="Administrator authorization is required.")
-    key = request.client.host if request.client else "unknown"
+    key = f"{scope}:{request.client.host if request.client else 'unknown'}"
     now = time.monotonic()
     window = int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "60"))
-    limit = int(os.getenv("RATE_LIMIT_MAX_REQUESTS", "5"))
+    limit = int(os.getenv(limit_env, str(default_limit)))
     calls = _requests[key]
     while calls and calls[0] <= now - window:
         calls.popleft()
@@ -88,6 +150,34 @@ def send_alerts(request: Request, db: Session = Depends(get_db)):
         return RedirectResponse(url=f"{ref}?error=alert_send_failed", status_code=303)
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics(request: Request):
+    _require_admin(request)
+    return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class ScoreRequest(BaseModel):
+    rows: list[dict[str, float]] = Field(..., min_length=1, max_length=1000)
+
+
+@app.post("/api/score", response_class=JSONResponse)
+async def api_score(request: Request, payload: ScoreRequest):
+    """Score raw financial ratios (one dict of model features per company).
+
+    Same protection as the other POST routes: the admin token when `ADMIN_TOKEN` is set, and always a
+    per-IP limit. The limit (`SCORE_RATE_LIMIT_MAX_REQUESTS`, default 120 per window) is higher than
+    the form routes' because every request may carry up to 1000 rows.
+    """
+    _protect_post(request, scope="score", limit_env="SCORE_RATE_LIMIT_MAX_REQUESTS", default_limit=120)
+    if not scorer.ready:
+        raise HTTPException(status_code=503, detail="Scoring model is not configured.")
+    try:
+        results = await scorer.score(payload.rows)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return {"model": scorer.version, "features": scorer.model.feature_cols, "results": results}
+
+
 @app.get("/", response_class=HTMLResponse)
 def home() -> RedirectResponse:
     return RedirectResponse(url="/company/003230")
@@ -1,52 +1,65 @@
+import os
 from catboost import CatBoostClassifier
-import optuna
 import numpy as np
-from sklearn.model_selection import StratifiedKFold
-from sklearn.preprocessing import StandardScaler
-from imblearn.over_sampling import BorderlineSMOTE
 from thr import find_best_threshold
+from folds import build_folds, oof_predict
+from resampling import resample
+from study import create_study, run_study, report_fold, phase, suggest_float, suggest_int, N_TRIALS, N_WORKERS
 
-def Cat_run(X_train, y_train, X_test, use_SMOTE) : 
+# CatBoost는 OMP_NUM_THREADS를 따르지 않으므로 sweep/ensemble의 작업별 스레드 예산을 직접 넘긴다
+THREADS = int(os.getenv('OMP_NUM_THREADS', '-1'))
+
+SEARCH_SPACE = {
+    'iterations' : (500, 3000, False),
+    'depth' : (4, 10, False),
+    'learning_rate' : (0.01, 0.3, True),
+    'l2_leaf_reg' : (1.0, 10.0, False),
+    'border_count' : (32, 255, False),
+    'random_strength' : (1e-9, 10.0, True),
+    'bagging_temperature' : (0.0, 1.0, False),
+}
+
+def Cat_run(X_train, y_train, X_test, use_SMOTE, study_name = None, n_trials = N_TRIALS, n_workers = N_WORKERS, folds = None, return_oof = False) :
     
-    scaler = StandardScaler()
-    X_train = scaler.fit_transform(X_train)
-    X_test = scaler.transform(X_test)
+    if folds is None :
+        folds = build_folds(X_train, y_train, X_test)
+    X_train, y_train, X_test = folds.X_train, folds.y_train, folds.X_test
     # -----------------------------
     # Optuna objective 함수 정의
     # -----------------------------
     def objective(trial):
         # CatBoost 하이퍼파라미터 공간
         params = {
-            'iterations': trial.suggest_int('iterations', 500, 3000),
-            'depth': trial.suggest_int('depth', 4, 10),
-            'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3, log=True),
-            'l2_leaf_reg': trial.suggest_float('l2_leaf_reg', 1, 10),
-            'border_count': trial.suggest_int('border_count', 32, 255),
-            'random_strength': trial.suggest_float('random_strength', 1e-9, 10, log=True),
-            'bagging_temperature': trial.suggest_float('bagging_temperature', 0.0, 1.0),
+            'iterations': suggest_int(trial, 'iterations', *SEARCH_SPACE['iterations']),
+            'depth': suggest_int(trial, 'depth', *SEARCH_SPACE['depth']),
+            'learning_rate': suggest_float(trial, 'learning_rate', *SEARCH_SPACE['learning_rate']),
+            'l2_leaf_reg': suggest_float(trial, 'l2_leaf_reg', *SEARCH_SPACE['l2_leaf_reg']),
+            'border_count': suggest_int(trial, 'border_count', *SEARCH_SPACE['border_count']),
+            'random_strength': suggest_float(trial, 'random_strength', *SEARCH_SPACE['random_strength']),
+            'bagging_temperature': suggest_float(trial, 'bagging_temperature', *SEARCH_SPACE['bagging_temperature']),
             'loss_function': 'Logloss',
             'eval_metric': 'AUC',
             'verbose': 0,
             'random_state': 42,
-            'early_stopping_rounds': 100  # 도중 중단 기준
+            'thread_count': THREADS,
+            'early_stopping_rounds': 100  # 검증 fold AUC 기준 조기 종료 (iterations는 상한)
         }
                     
         model = CatBoostClassifier(**params)
         
-        skf = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
-
         oof_probs = np.zeros(len(y_train))
         oof_idx = np.zeros(len(y_train), dtype=bool)
+        best_iterations = []
 
-        for fold, (tr_idx, val_idx) in enumerate(skf.split(X_train, y_train)):
-            X_tr, X_val = X_train[tr_idx], X_train[val_idx]
-            y_tr, y_val = y_train.iloc[tr_idx], y_train.iloc[val_idx]
-                    
-            model.fit(X_tr, y_tr)
+        for fold in folds:
+            # eval_set이 있어야 early_stopping_rounds가 동작하고 best 시점 모델로 줄어든다
+            model.fit(fold.X_tr, fold.y_tr, eval_set=(fold.X_val, fold.y_val))
+            best_iterations.append(model.get_best_iteration())
 
-            probs = model.predict_proba(X_val)[:, 1]
-            oof_probs[val_idx] = probs
-            oof_idx[val_idx] = True
+            probs = model.predict_proba(fold.X_val)[:, 1]
+            oof_probs[fold.val_idx] = probs
+            oof_idx[fold.val_idx] = True
+            report_fold(trial, y_train, oof_probs, oof_idx, fold.k)
 
         # 안전 체크(모든 인덱스가 채워졌는지)
         assert oof_idx.all()
@@ -57,33 +70,43 @@ def Cat_run(X_train, y_train, X_test, use_SMOTE) :
         # Optuna는 maximize 하므로 F1 반환
         # (또는 -best_f1을 minimize로 해도 됨)
         trial.set_user_attr("best_threshold", float(best_thr))
+        trial.set_user_attr("best_iteration", int(round(np.mean(best_iterations))))
         
         return float(best_f1)
 
     # -----------------------------
     # 4. Optuna 스터디 생성 및 최적화
     # -----------------------------
-    study = optuna.create_study(direction='maximize')
-    study.optimize(objective, n_trials=5, timeout=3600,  # 시간제한 1시간
-                callbacks=[lambda study, trial: study.stop() if study.best_value > 0.9 else None])
+    study = create_study(study_name, direction='maximize', search_space=SEARCH_SPACE)
+    run_study(study, objective, n_trials, n_workers, timeout=3600,  # 시간제한 1시간
+              callbacks=[lambda study, trial: study.stop() if study.best_value > 0.9 else None])
 
     # -----------------------------
     # 최적 하이퍼파라미터 확인
     # -----------------------------
     trial = study.best_trial
-    best_params = trial.params
-    best_params.update({'loss_function':'Logloss', 'eval_metric':'AUC', 'random_state':42})
+    # warm start용 탐색 파라미터는 최종 학습용 키/iterations로 바꾸기 전에 따로 남긴다
+    search_params = dict(trial.params)
+    best_params = dict(trial.params)
+    best_params.update({'loss_function':'Logloss', 'eval_metric':'AUC', 'random_state':42, 'verbose':0, 'thread_count':THREADS})
+    # fold 평균 best_iteration 만큼만 전체 데이터에 한 번 학습
+    best_params['iterations'] = trial.user_attrs.get("best_iteration", best_params['iterations'] - 1) + 1
     best_thr = study.best_trial.user_attrs.get("best_threshold")
     
     model = CatBoostClassifier(**best_params)
 
-    if use_SMOTE :
-        smote = BorderlineSMOTE(random_state=42, kind="borderline-1")
-        X_train, y_train = smote.fit_resample(X_train, y_train)
+    # 스태킹용 OOF : 최종 파라미터(고정 iterations)로 fold마다 다시 학습 (ensemble.py)
+    oof_probs = oof_predict(lambda : CatBoostClassifier(**best_params), folds, use_SMOTE) if return_oof else None
 
-    model.fit(X_train, y_train)
-    
-    y_prob = model.predict_proba(X_test)[:,1]
+    with phase('fit') :
+        if use_SMOTE :
+            X_train, y_train = resample(X_train, y_train)
+
+        model.fit(X_train, y_train)
+
+    with phase('predict') :
+        y_prob = model.predict_proba(X_test)[:,1]
     y_pred = (y_prob >= best_thr).astype(int)
 
-    return {'best_params' : best_params, 'best_thr' : best_thr, 'y_prob' : y_prob, 'y_pred' : y_pred}
+    return {'best_params' : best_params, 'search_params' : search_params, 'best_thr' : best_thr, 'y_prob' : y_prob, 'y_pred' : y_pred,
+            'model' : model, 'scaler' : folds.scaler, 'oof_probs' : oof_probs}
@@ -1,23 +1,25 @@
 import numpy as np
 import optuna
 from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import StratifiedKFold
-from sklearn.preprocessing import StandardScaler
-from imblearn.over_sampling import BorderlineSMOTE
 from thr import find_best_threshold
+from folds import build_folds, oof_predict
+from resampling import resample
+from study import create_study, run_study, report_fold, phase, suggest_float, N_TRIALS, N_WORKERS
 
-def LR_run(X_train, y_train, X_test, use_SMOTE = False) :
+SEARCH_SPACE = {'C' : (1e-3, 1e2, True), 'penalty' : ['l1', 'l2'], 'solver' : ['liblinear', 'saga']}
 
-    scaler = StandardScaler()
-    X_train = scaler.fit_transform(X_train)
-    X_test = scaler.transform(X_test)
+def LR_run(X_train, y_train, X_test, use_SMOTE = False, study_name = None, n_trials = N_TRIALS, n_workers = N_WORKERS, folds = None, return_oof = False) :
+
+    if folds is None :
+        folds = build_folds(X_train, y_train, X_test)
+    X_train, y_train, X_test = folds.X_train, folds.y_train, folds.X_test
     
     def objective(trial):
         # 하이퍼파라미터 탐색 공간 정의
-        C = trial.suggest_loguniform("C", 1e-3, 1e2)  
+        C = suggest_float(trial, "C", *SEARCH_SPACE["C"])  
         
-        penalty = trial.suggest_categorical("penalty", ["l1", "l2"])  
-        solver = trial.suggest_categorical("solver", ["liblinear", "saga"])  
+        penalty = trial.suggest_categorical("penalty", SEARCH_SPACE["penalty"])  
+        solver = trial.suggest_categorical("solver", SEARCH_SPACE["solver"])  
 
         # 잘못된 조합이면 trial을 pruning 처리
         if (penalty == "l1" and solver not in ["liblinear", "saga"]) or \
@@ -33,20 +35,16 @@ def LR_run(X_train, y_train, X_test, use_SMOTE = False) :
             random_state=42
         )
 
-        skf = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
-
         oof_probs = np.zeros(len(y_train))
         oof_idx = np.zeros(len(y_train), dtype=bool)
 
-        for fold, (tr_idx, val_idx) in enumerate(skf.split(X_train, y_train)):
-            X_tr, X_val = X_train[tr_idx], X_train[val_idx]
-            y_tr, y_val = y_train.iloc[tr_idx], y_train.iloc[val_idx]
-                    
-            model.fit(X_tr, y_tr)
+        for fold in folds:
+            model.fit(fold.X_tr, fold.y_tr)
 
-            probs = model.predict_proba(X_val)[:, 1]
-            oof_probs[val_idx] = probs
-            oof_idx[val_idx] = True
+            probs = model.predict_proba(fold.X_val)[:, 1]
+            oof_probs[fold.val_idx] = probs
+            oof_idx[fold.val_idx] = True
+            report_fold(trial, y_train, oof_probs, oof_idx, fold.k)
 
         # 안전 체크(모든 인덱스가 채워졌는지)
         assert oof_idx.all()
@@ -64,29 +62,35 @@ def LR_run(X_train, y_train, X_test, use_SMOTE = False) :
     # Optuna 실행 (Pruner 적용)
     # ============================
     pruner = optuna.pruners.MedianPruner(n_warmup_steps=2)
-    study = optuna.create_study(direction="maximize", pruner=pruner)
-    study.optimize(objective, n_trials=5)
+    study = create_study(study_name, direction="maximize", pruner=pruner, search_space=SEARCH_SPACE)
+    run_study(study, objective, n_trials, n_workers)
 
     best_params = study.best_params
     best_thr = study.best_trial.user_attrs.get("best_threshold")
     
-    model = LogisticRegression(
+    make_model = lambda : LogisticRegression(
         **best_params,
         class_weight="balanced",
         max_iter=500,
         random_state=42
     )
+    model = make_model()
 
-    if use_SMOTE :
-        smote = BorderlineSMOTE(random_state=42, kind="borderline-1")
-        X_train, y_train = smote.fit_resample(X_train, y_train)
+    # 스태킹용 OOF : 최종 파라미터로 fold마다 다시 학습 (ensemble.py)
+    oof_probs = oof_predict(make_model, folds, use_SMOTE) if return_oof else None
 
-    model.fit(X_train, y_train)
-    
-    y_prob = model.predict_proba(X_test)[:,1]
+    with phase('fit') :
+        if use_SMOTE :
+            X_train, y_train = resample(X_train, y_train)
+
+        model.fit(X_train, y_train)
+
+    with phase('predict') :
+        y_prob = model.predict_proba(X_test)[:,1]
     y_pred = (y_prob >= best_thr).astype(int)
 
-    return {'best_params' : best_params, 'best_thr' : best_thr, 'y_prob' : y_prob, 'y_pred' : y_pred}
+    return {'best_params' : best_params, 'search_params' : dict(study.best_trial.params), 'best_thr' : best_thr, 'y_prob' : y_prob, 'y_pred' : y_pred,
+            'model' : model, 'scaler' : folds.scaler, 'oof_probs' : oof_probs}
 
 
     
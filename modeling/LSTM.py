@@ -1,76 +1,94 @@
 import numpy as np
 import pandas as pd
 import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout
+from tensorflow.keras.models import Model
+from tensorflow.keras.layers import Input, LSTM, Dense, Dropout
 from tensorflow.keras.callbacks import EarlyStopping
 from optuna.pruners import MedianPruner
 import optuna
-from sklearn.model_selection import StratifiedKFold
-from sklearn.preprocessing import StandardScaler
-from imblearn.over_sampling import BorderlineSMOTE
 from thr import find_best_threshold
+from folds import build_folds
+from sequences import LOOKBACK, build_sequences, single_step
+from study import create_study, run_study, report_fold, phase, suggest_float, suggest_int, N_TRIALS, N_WORKERS
 
-def lstm_run(X_train, y_train, X_test, use_SMOTE) :
-    
-    scaler = StandardScaler()
-    X_train = scaler.fit_transform(X_train)
-    X_test = scaler.transform(X_test)    
-    X_train = X_train.reshape((X_train.shape[0], 1, X_train.shape[1]))
-    X_test = X_test.reshape((X_test.shape[0], 1, X_test.shape[1]))
+EPOCHS = 30
+
+SEARCH_SPACE = {
+    'hidden_units' : [34, 48, 64],
+    'dropout_rate' : (0.0, 0.5, False),
+    'learning_rate' : (1e-4, 1e-2, True),
+    'batch_size' : [32, 64],
+    'patience' : (3, 10, False),
+}
+
+def lstm_run(X_train, y_train, X_test, use_SMOTE, study_name = None, n_trials = N_TRIALS, n_workers = N_WORKERS, folds = None, return_oof = False, panel = None, lookback = LOOKBACK) :
     
-    skf = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+    if folds is None :
+        folds = build_folds(X_train, y_train, X_test)
+    X_train, y_train, X_test = folds.X_train, folds.y_train, folds.X_test
+    n_train = len(X_train)
+
+    # -----------------------------
+    # 기업별 lookback년 시퀀스 (sequences.py)
+    # panel : train 행 다음 test 행 순서의 ['거래소코드', '연도'] (dataset.load_split)
+    # 없으면 기존처럼 각 행을 길이 1 시퀀스로 사용
+    # -----------------------------
+    X_all = np.concatenate([X_train, X_test])
+    if panel is not None :
+        seq = build_sequences(X_all, panel['거래소코드'].to_numpy(), panel['연도'].to_numpy(), lookback)
+    else :
+        seq = single_step(X_all)
+    test_rows = np.arange(n_train, len(X_all))
     
     # -----------------------------
     # LSTM 모델 생성 함수
     # -----------------------------
-    def create_lstm_model(input_shape, hidden_units, dropout_rate, learning_rate):
-        model = Sequential()
-        model.add(LSTM(hidden_units, input_shape=input_shape))
-        model.add(Dropout(dropout_rate))
-        model.add(Dense(1, activation='sigmoid'))
+    def create_lstm_model(hidden_units, dropout_rate, learning_rate):
+        x = Input(shape=(seq.lookback, seq.n_features), dtype='float32')
+        m = Input(shape=(seq.lookback,), dtype='bool')
+        # mask=False 칸(다른 기업/없는 연도/패딩)은 건너뛴다
+        h = LSTM(hidden_units)(x, mask=m)
+        h = Dropout(dropout_rate)(h)
+        model = Model([x, m], Dense(1, activation='sigmoid')(h))
         model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate),
                     loss='binary_crossentropy')
         return model
 
+    def predict(model, rows) :
+        return model.predict(seq.dataset(rows, batch_size=1024), verbose=0).reshape(-1)
+
+    # fold마다 새 모델 : 이전 fold 가중치가 다음 fold 검증에 새지 않도록
+    # SMOTE는 시퀀스에 쓸 수 없어 학습 fold의 양성 윈도우 오버샘플링으로 대신한다
+    def fit_fold(params, tr_idx, val_idx, epochs = EPOCHS) :
+        model = create_lstm_model(params['hidden_units'], params['dropout_rate'], params['learning_rate'])
+        es = EarlyStopping(monitor='val_loss', mode='min', patience=params['patience'],
+                        restore_best_weights=True, verbose=0)
+        history = model.fit(seq.dataset(tr_idx, y_train[tr_idx], params['batch_size'], shuffle=True, oversample=use_SMOTE),
+                            validation_data=seq.dataset(val_idx, y_train[val_idx], 1024),
+                            epochs=epochs, callbacks=[es], verbose=0)
+        return model, int(np.argmin(history.history['val_loss'])) + 1
+
     # -----------------------------
     # Optuna 목적 함수
     # -----------------------------
-    def objective(trial, X_train, y_train):
+    def objective(trial):
         
-        hidden_units = trial.suggest_categorical("hidden_units", [34,48,64])
-        dropout_rate = trial.suggest_float("dropout_rate", 0.0, 0.5)
-        learning_rate = trial.suggest_float("learning_rate", 1e-4, 1e-2, log=True)
-        batch_size = trial.suggest_categorical("batch_size", [32,64])
-        patience = trial.suggest_int("patience", 3, 10)
-
-        model = create_lstm_model(input_shape=(1, X_train.shape[2]),
-                                hidden_units=hidden_units,
-                                dropout_rate=dropout_rate,
-                                learning_rate=learning_rate)
-
-        # 얼리 스톱핑 콜백
-        es = EarlyStopping(monitor='val_loss', mode='min', patience=patience,
-                        restore_best_weights=True, verbose=0)
+        params = {'hidden_units' : trial.suggest_categorical("hidden_units", SEARCH_SPACE['hidden_units']),
+                  'dropout_rate' : suggest_float(trial, "dropout_rate", *SEARCH_SPACE['dropout_rate']),
+                  'learning_rate' : suggest_float(trial, "learning_rate", *SEARCH_SPACE['learning_rate']),
+                  'batch_size' : trial.suggest_categorical("batch_size", SEARCH_SPACE['batch_size']),
+                  'patience' : suggest_int(trial, "patience", *SEARCH_SPACE['patience'])}
 
         oof_probs = np.zeros(len(y_train))
         oof_idx = np.zeros(len(y_train), dtype=bool)        
+        best_epochs = []
         
-        for fold, (tr_idx, val_idx) in enumerate(skf.split(X_train, y_train)):
-            X_tr, X_val = X_train[tr_idx], X_train[val_idx]
-            y_tr, y_val = y_train.iloc[tr_idx], y_train.iloc[val_idx]
-            # 학습
-            model.fit(X_tr, y_tr,
-                    validation_data=(X_val, y_val),
-                    epochs=30,
-                    batch_size=batch_size,
-                    callbacks=[es],
-                    verbose=0)
-            
-            probs = model.predict(X_val).squeeze()
-            
-            oof_probs[val_idx] = probs
+        for k, (tr_idx, val_idx) in enumerate(folds.splits):
+            model, best_epoch = fit_fold(params, tr_idx, val_idx)
+            best_epochs.append(best_epoch)
+            oof_probs[val_idx] = predict(model, val_idx)
             oof_idx[val_idx] = True
+            report_fold(trial, y_train, oof_probs, oof_idx, k)
 
         # 안전 체크(모든 인덱스가 채워졌는지)
         assert oof_idx.all()
@@ -79,48 +97,44 @@ def lstm_run(X_train, y_train, X_test, use_SMOTE) :
         best_thr, best_f1 = find_best_threshold(y_train, oof_probs)
 
         # Optuna는 maximize 하므로 F1 반환
-        # (또는 -best_f1을 minimize로 해도 됨)
         trial.set_user_attr("best_threshold", float(best_thr))
+        # 최종 모델은 검증 데이터 없이 학습하므로 fold별 최적 epoch의 중앙값만큼 학습
+        trial.set_user_attr("best_epochs", int(np.median(best_epochs)))
         
         return float(best_f1)
 
     # -----------------------------
     # Optuna 하이퍼파라미터 튜닝
     # -----------------------------
-    study = optuna.create_study(direction='maximize', pruner=MedianPruner())
-    study.optimize(lambda trial: objective(trial, X_train, y_train), n_trials=5)
+    study = create_study(study_name, direction='maximize', pruner=MedianPruner(), search_space=SEARCH_SPACE)
+    # TensorFlow는 fork 이후 안전하지 않아 스레드로만 병렬화
+    run_study(study, objective, n_trials, n_workers, processes=False)
 
     # -----------------------------
     # 최종 모델 학습
     # -----------------------------
     best_params = study.best_params
     best_thr = study.best_trial.user_attrs.get("best_threshold")
+    epochs = study.best_trial.user_attrs.get("best_epochs", EPOCHS)
 
-    model = create_lstm_model(input_shape=(1, X_train.shape[2]),
-                                    hidden_units=best_params['hidden_units'],
-                                    dropout_rate=best_params['dropout_rate'],
-                                    learning_rate=best_params['learning_rate'])
+    # 스태킹용 OOF : 최종 파라미터로 fold마다 새 모델 학습 (ensemble.py)
+    oof_probs = None
+    if return_oof :
+        oof_probs = np.zeros(len(y_train))
+        for tr_idx, val_idx in folds.splits :
+            model, _ = fit_fold(best_params, tr_idx, val_idx)
+            oof_probs[val_idx] = predict(model, val_idx)
 
-    es = EarlyStopping(monitor='val_loss', mode='min', patience=best_params['patience'], restore_best_weights=True, verbose=1)
-    
-    if use_SMOTE :
-        smote = BorderlineSMOTE(random_state=42, kind="borderline-1")
-        X_train, y_train = smote.fit_resample(X_train, y_train)
-
-    for fold, (tr_idx, val_idx) in enumerate(skf.split(X_train, y_train)):
-        X_tr, X_val = X_train[tr_idx], X_train[val_idx]
-        y_tr, y_val = y_train.iloc[tr_idx], y_train.iloc[val_idx]
-        # 학습
-        model.fit(X_tr, y_tr,
-                validation_data=(X_val, y_val),
-                epochs=30,
-                batch_size=best_params['batch_size'],
-                callbacks=[es],
-                    verbose=1)
-    
-    y_prob = model.predict(X_test).squeeze()
+    # 전체 train 행으로 한 번만 학습
+    train_rows = np.arange(n_train)
+    with phase('fit') :
+        model = create_lstm_model(best_params['hidden_units'], best_params['dropout_rate'], best_params['learning_rate'])
+        model.fit(seq.dataset(train_rows, y_train, best_params['batch_size'], shuffle=True, oversample=use_SMOTE),
+                  epochs=epochs, verbose=1)
+
+    with phase('predict') :
+        y_prob = predict(model, test_rows)
     y_pred = (y_prob >= best_thr).astype(int)
 
-    return {'best_params' : best_params, 'best_thr' : best_thr, 'y_prob' : y_prob, 'y_pred' : y_pred}
-    
-    
+    return {'best_params' : best_params, 'search_params' : dict(study.best_trial.params), 'best_thr' : best_thr, 'y_prob' : y_prob, 'y_pred' : y_pred,
+            'model' : model, 'scaler' : folds.scaler, 'oof_probs' : oof_probs}
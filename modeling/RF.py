@@ -1,17 +1,25 @@
 import numpy as np
-import optuna
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import StratifiedKFold
-from sklearn.preprocessing import StandardScaler
-from imblearn.over_sampling import BorderlineSMOTE
-from sklearn.utils import resample
 from thr import find_best_threshold
+from folds import build_folds, oof_predict
+from resampling import resample
+from study import create_study, run_study, report_fold, phase, suggest_int, N_TRIALS, N_WORKERS
 
-def RF_run(X_train, y_train, X_test, use_SMOTE = False) :
+SEARCH_SPACE = {
+    'n_estimators' : (100, 300, False),
+    'max_depth' : (5, 15, False),
+    'min_samples_split' : (2, 10, False),
+    'min_samples_leaf' : (1, 10, False),
+    'max_features' : ['sqrt', 'log2', None],
+}
+
+def RF_run(X_train, y_train, X_test, use_SMOTE = False, study_name = None, n_trials = N_TRIALS, n_workers = N_WORKERS, folds = None, return_oof = False) :
     
-    scaler = StandardScaler()
-    X_train = scaler.fit_transform(X_train)
-    X_test = scaler.transform(X_test)
+    if folds is None :
+        folds = build_folds(X_train, y_train, X_test)
+    X_train, y_train, X_test = folds.X_train, folds.y_train, folds.X_test
+    # 튜닝용 30% 표본도 trial마다 다시 뽑지 않고 한 번만 생성
+    sub_folds = folds.subsample(0.3, random_state=42)
         
     # 조기 종료용 콜백
     class EarlyStoppingCallback:
@@ -33,11 +41,11 @@ def RF_run(X_train, y_train, X_test, use_SMOTE = False) :
     # Optuna objective 함수
     def objective(trial):
         # 하이퍼파라미터 탐색
-        n_estimators = trial.suggest_int('n_estimators', 100, 300)
-        max_depth = trial.suggest_int('max_depth', 5, 15)
-        min_samples_split = trial.suggest_int('min_samples_split', 2, 10)
-        min_samples_leaf = trial.suggest_int('min_samples_leaf', 1, 10)
-        max_features = trial.suggest_categorical('max_features', ['sqrt', 'log2', None])
+        n_estimators = suggest_int(trial, 'n_estimators', *SEARCH_SPACE['n_estimators'])
+        max_depth = suggest_int(trial, 'max_depth', *SEARCH_SPACE['max_depth'])
+        min_samples_split = suggest_int(trial, 'min_samples_split', *SEARCH_SPACE['min_samples_split'])
+        min_samples_leaf = suggest_int(trial, 'min_samples_leaf', *SEARCH_SPACE['min_samples_leaf'])
+        max_features = trial.suggest_categorical('max_features', SEARCH_SPACE['max_features'])
 
         model = RandomForestClassifier(
             n_estimators=n_estimators,
@@ -50,22 +58,18 @@ def RF_run(X_train, y_train, X_test, use_SMOTE = False) :
             n_jobs=-1
         )
         
-        X_train_sub, y_train_sub = resample(X_train, y_train, n_samples=int(0.3*len(X_train)), random_state=42)
-      
-        skf = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+        y_train_sub = sub_folds.y_train
 
         oof_probs = np.zeros(len(y_train_sub))
         oof_idx = np.zeros(len(y_train_sub), dtype=bool)
 
-        for fold, (tr_idx, val_idx) in enumerate(skf.split(X_train_sub, y_train_sub)):
-            X_tr, X_val = X_train_sub[tr_idx], X_train_sub[val_idx]
-            y_tr, y_val = y_train_sub.iloc[tr_idx], y_train_sub.iloc[val_idx]
-                    
-            model.fit(X_tr, y_tr)
+        for fold in sub_folds:
+            model.fit(fold.X_tr, fold.y_tr)
 
-            probs = model.predict_proba(X_val)[:, 1]
-            oof_probs[val_idx] = probs
-            oof_idx[val_idx] = True
+            probs = model.predict_proba(fold.X_val)[:, 1]
+            oof_probs[fold.val_idx] = probs
+            oof_idx[fold.val_idx] = True
+            report_fold(trial, y_train_sub, oof_probs, oof_idx, fold.k)
 
         # 안전 체크(모든 인덱스가 채워졌는지)
         assert oof_idx.all()
@@ -81,9 +85,9 @@ def RF_run(X_train, y_train, X_test, use_SMOTE = False) :
 
 
     # Optuna 스터디 생성
-    study = optuna.create_study(direction='maximize')
+    study = create_study(study_name, direction='maximize', search_space=SEARCH_SPACE)
     early_stopping = EarlyStoppingCallback(patience=10)
-    study.optimize(objective, n_trials=5, callbacks=[early_stopping])
+    run_study(study, objective, n_trials, n_workers, callbacks=[early_stopping])
 
     # 최적 결과 출력
     trial = study.best_trial
@@ -91,7 +95,7 @@ def RF_run(X_train, y_train, X_test, use_SMOTE = False) :
     best_thr = study.best_trial.user_attrs.get("best_threshold")
     
     # 최적 하이퍼파라미터로 모델 학습
-    model = RandomForestClassifier(
+    make_model = lambda : RandomForestClassifier(
         n_estimators=trial.params['n_estimators'],
         max_depth=trial.params['max_depth'],
         min_samples_split=trial.params['min_samples_split'],
@@ -101,14 +105,20 @@ def RF_run(X_train, y_train, X_test, use_SMOTE = False) :
         random_state=42,
         n_jobs=-1
     )
-    
-    if use_SMOTE :
-            smote = BorderlineSMOTE(random_state=42, kind="borderline-1")
-            X_train, y_train = smote.fit_resample(X_train, y_train)
+    model = make_model()
 
-    model.fit(X_train, y_train)
+    # 스태킹용 OOF : 튜닝은 30% 표본이었으므로 전체 fold에 최종 파라미터로 다시 학습 (ensemble.py)
+    oof_probs = oof_predict(make_model, folds, use_SMOTE) if return_oof else None
     
-    y_prob = model.predict_proba(X_test)[:,1]
+    with phase('fit') :
+        if use_SMOTE :
+            X_train, y_train = resample(X_train, y_train)
+
+        model.fit(X_train, y_train)
+
+    with phase('predict') :
+        y_prob = model.predict_proba(X_test)[:,1]
     y_pred = (y_prob >= best_thr).astype(int)
 
-    return {'best_params' : best_params, 'best_thr' : best_thr, 'y_prob' : y_prob, 'y_pred' : y_pred}
+    return {'best_params' : best_params, 'search_params' : dict(study.best_trial.params), 'best_thr' : best_thr, 'y_prob' : y_prob, 'y_pred' : y_pred,
+            'model' : model, 'scaler' : folds.scaler, 'oof_probs' : oof_probs}
@@ -3,20 +3,31 @@ import pandas as pd
 from pytorch_tabnet.tab_model import TabNetClassifier
 import optuna
 import torch
-from sklearn.utils import resample
-from sklearn.model_selection import StratifiedKFold
-from sklearn.preprocessing import StandardScaler
-from imblearn.over_sampling import BorderlineSMOTE
 from thr import find_best_threshold
-
-
-def tabnet_run(X_train, y_train, X_test, use_SMOTE) :
+from folds import build_folds, oof_predict
+from resampling import resample
+from study import create_study, run_study, report_fold, phase, suggest_float, suggest_int, N_TRIALS, N_WORKERS
+
+SEARCH_SPACE = {
+    'n_d' : (16, 32, False),
+    'n_a' : (16, 32, False),
+    'n_steps' : (3, 5, False),
+    'gamma' : (1.0, 2.0, False),
+    'lambda_sparse' : (1e-5, 1e-3, True),
+    'lr' : (1e-4, 1e-2, True),
+    'mask_type' : ['sparsemax', 'entmax'],
+}
+
+
+def tabnet_run(X_train, y_train, X_test, use_SMOTE, study_name = None, n_trials = N_TRIALS, n_workers = N_WORKERS, folds = None, return_oof = False) :
     
     device_name = "cuda" if torch.cuda.is_available() else "cpu"
     
-    scaler = StandardScaler()
-    X_train = scaler.fit_transform(X_train)
-    X_test = scaler.transform(X_test)
+    if folds is None :
+        folds = build_folds(X_train, y_train, X_test)
+    X_train, y_train, X_test = folds.X_train, folds.y_train, folds.X_test
+    # 튜닝용 30% 표본도 trial마다 다시 뽑지 않고 한 번만 생성
+    sub_folds = folds.subsample(0.3, random_state=42)
 
     # -----------------------------
     # Optuna 목적 함수
@@ -24,31 +35,26 @@ def tabnet_run(X_train, y_train, X_test, use_SMOTE) :
     def objective(trial):
         # TabNet 하이퍼파라미터
         params = {
-            'n_d': trial.suggest_int('n_d', 16, 32),
-            'n_a': trial.suggest_int('n_a', 16, 32),
-            'n_steps': trial.suggest_int('n_steps', 3, 5),
-            'gamma': trial.suggest_float('gamma', 1.0, 2.0),
-            'lambda_sparse': trial.suggest_float('lambda_sparse', 1e-5, 1e-3, log=True),
+            'n_d': suggest_int(trial, 'n_d', *SEARCH_SPACE['n_d']),
+            'n_a': suggest_int(trial, 'n_a', *SEARCH_SPACE['n_a']),
+            'n_steps': suggest_int(trial, 'n_steps', *SEARCH_SPACE['n_steps']),
+            'gamma': suggest_float(trial, 'gamma', *SEARCH_SPACE['gamma']),
+            'lambda_sparse': suggest_float(trial, 'lambda_sparse', *SEARCH_SPACE['lambda_sparse']),
             'optimizer_fn': torch.optim.Adam,
-            'optimizer_params': dict(lr=trial.suggest_float('lr', 1e-4, 1e-2, log=True)),
-            'mask_type': trial.suggest_categorical('mask_type', ['sparsemax', 'entmax'])
+            'optimizer_params': dict(lr=suggest_float(trial, 'lr', *SEARCH_SPACE['lr'])),
+            'mask_type': trial.suggest_categorical('mask_type', SEARCH_SPACE['mask_type'])
         }
 
         model = TabNetClassifier(**params, verbose=0, device_name=device_name)
         
-        X,y = resample(X_train, y_train, n_samples=int(0.3*len(X_train)), random_state=42)
-
-        skf = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+        y = sub_folds.y_train
 
         oof_probs = np.zeros(len(y))
         oof_idx = np.zeros(len(y), dtype=bool)
 
-        for fold, (tr_idx, val_idx) in enumerate(skf.split(X, y)):
-            X_tr, X_val = X[tr_idx], X[val_idx]
-            y_tr, y_val = y.iloc[tr_idx], y.iloc[val_idx]
-                    
+        for fold in sub_folds:
             model.fit(
-                X_tr, y_tr,
+                fold.X_tr, fold.y_tr,
                 max_epochs=30,
                 patience=20,
                 batch_size=1024,
@@ -56,9 +62,10 @@ def tabnet_run(X_train, y_train, X_test, use_SMOTE) :
                 drop_last=False
             )
 
-            probs = model.predict_proba(X_val)[:, 1]
-            oof_probs[val_idx] = probs
-            oof_idx[val_idx] = True
+            probs = model.predict_proba(fold.X_val)[:, 1]
+            oof_probs[fold.val_idx] = probs
+            oof_idx[fold.val_idx] = True
+            report_fold(trial, y, oof_probs, oof_idx, fold.k)
 
         # 안전 체크(모든 인덱스가 채워졌는지)
         assert oof_idx.all()
@@ -74,8 +81,10 @@ def tabnet_run(X_train, y_train, X_test, use_SMOTE) :
     # -----------------------------
     # Optuna 하이퍼파라미터 튜닝
     # -----------------------------
-    study = optuna.create_study(direction='maximize',pruner=optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=5))
-    study.optimize(lambda trial: objective(trial), n_trials=5)
+    study = create_study(study_name, direction='maximize',pruner=optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=2),
+                         search_space=SEARCH_SPACE)
+    # torch(CUDA)는 fork 이후 안전하지 않아 스레드로만 병렬화
+    run_study(study, objective, n_trials, n_workers, processes=False)
 
     # -----------------------------
     # 최종 모델 학습 (전체 데이터)
@@ -83,7 +92,7 @@ def tabnet_run(X_train, y_train, X_test, use_SMOTE) :
     best_params = study.best_params
     best_thr = study.best_trial.user_attrs.get("best_threshold")
 
-    model = TabNetClassifier(
+    make_model = lambda verbose=0 : TabNetClassifier(
         n_d=best_params['n_d'],
         n_a=best_params['n_a'],
         n_steps=best_params['n_steps'],
@@ -92,24 +101,34 @@ def tabnet_run(X_train, y_train, X_test, use_SMOTE) :
         optimizer_fn=torch.optim.Adam,
         optimizer_params=dict(lr=best_params['lr']),
         mask_type=best_params['mask_type'],
-        verbose=1,
+        verbose=verbose,
         device_name=device_name
     )
-
-    if use_SMOTE :
-        smote = BorderlineSMOTE(random_state=42, kind="borderline-1")
-        X_train, y_train = smote.fit_resample(X_train, y_train)
-
-    model.fit(
-        X_train, y_train,
-        max_epochs=30,
-        patience=20,
-        batch_size=1024,
-        virtual_batch_size=128,
-        drop_last=False
-    )
-    
-    y_prob = model.predict_proba(X_test)[:,1]
+    model = make_model(verbose=1)
+
+    # 스태킹용 OOF : 튜닝은 30% 표본이었으므로 전체 fold에 최종 파라미터로 다시 학습 (ensemble.py)
+    oof_probs = None
+    if return_oof :
+        fit = lambda model, X_tr, y_tr, X_val, y_val : model.fit(X_tr, y_tr, max_epochs=30, patience=20, batch_size=1024,
+                                                                 virtual_batch_size=128, drop_last=False)
+        oof_probs = oof_predict(make_model, folds, use_SMOTE, fit=fit)
+
+    with phase('fit') :
+        if use_SMOTE :
+            X_train, y_train = resample(X_train, y_train)
+
+        model.fit(
+            X_train, y_train,
+            max_epochs=30,
+            patience=20,
+            batch_size=1024,
+            virtual_batch_size=128,
+            drop_last=False
+        )
+
+    with phase('predict') :
+        y_prob = model.predict_proba(X_test)[:,1]
     y_pred = (y_prob >= best_thr).astype(int)
 
-    return {'best_params' : best_params, 'best_thr' : best_thr, 'y_prob' : y_prob, 'y_pred' : y_pred}
\ No newline at end of file
+    return {'best_params' : best_params, 'search_params' : dict(study.best_trial.params), 'best_thr' : best_thr, 'y_prob' : y_prob, 'y_pred' : y_pred,
+            'model' : model, 'scaler' : folds.scaler, 'oof_probs' : oof_probs}
\ No newline at end of file
@@ -1,52 +1,68 @@
 import xgboost as xgb
-import optuna
-from sklearn.model_selection import StratifiedKFold
-from sklearn.preprocessing import StandardScaler
-from imblearn.over_sampling import BorderlineSMOTE
 from thr import find_best_threshold
+from folds import build_folds, oof_predict
+from resampling import resample
+from study import create_study, run_study, report_fold, phase, suggest_float, suggest_int, N_TRIALS, N_WORKERS
 import numpy as np
 
-def xg_run(X_train, y_train, X_test, use_SMOTE = False) : 
-    
-    scaler = StandardScaler()
-    X_train = scaler.fit_transform(X_train)
-    X_test = scaler.transform(X_test)
+SEARCH_SPACE = {
+    'lambda' : (1e-3, 10.0, True),
+    'alpha' : (1e-3, 10.0, True),
+    'colsample_bytree' : (0.3, 1.0, False),
+    'subsample' : (0.3, 1.0, False),
+    'learning_rate' : (0.01, 0.3, False),
+    'max_depth' : (3, 10, False),
+    'min_child_weight' : (1, 10, False),
+    'gamma' : (0.0, 5.0, False),
+}
+
+def xg_run(X_train, y_train, X_test, use_SMOTE = False, study_name = None, n_trials = N_TRIALS, n_workers = N_WORKERS, folds = None, return_oof = False) :
     
-    skf = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+    if folds is None :
+        folds = build_folds(X_train, y_train, X_test)
+    X_train, y_train, X_test = folds.X_train, folds.y_train, folds.X_test
+
+    # 튜닝/최종 학습 공통 고정 파라미터 (hist : 히스토그램 기반 트리 분할)
+    fixed_params = {
+        'objective': 'binary:logistic',
+        'eval_metric': 'logloss',
+        'booster': 'gbtree',
+        'tree_method': 'hist',
+    }
+
     # Optuna 목적 함수
     def objective(trial, X_train, y_train):
         params = {
-            'objective': 'binary:logistic',
-            'eval_metric': 'logloss',
-            'booster': 'gbtree',
-            'lambda': trial.suggest_float('lambda', 1e-3, 10.0, log=True),
-            'alpha': trial.suggest_float('alpha', 1e-3, 10.0, log=True),
-            'colsample_bytree': trial.suggest_float('colsample_bytree', 0.3, 1.0),
-            'subsample': trial.suggest_float('subsample', 0.3, 1.0),
-            'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3),
-            'max_depth': trial.suggest_int('max_depth', 3, 10),
-            'min_child_weight': trial.suggest_int('min_child_weight', 1, 10),
-            'gamma': trial.suggest_float('gamma', 0, 5),
+            **fixed_params,
+            'lambda': suggest_float(trial, 'lambda', *SEARCH_SPACE['lambda']),
+            'alpha': suggest_float(trial, 'alpha', *SEARCH_SPACE['alpha']),
+            'colsample_bytree': suggest_float(trial, 'colsample_bytree', *SEARCH_SPACE['colsample_bytree']),
+            'subsample': suggest_float(trial, 'subsample', *SEARCH_SPACE['subsample']),
+            'learning_rate': suggest_float(trial, 'learning_rate', *SEARCH_SPACE['learning_rate']),
+            'max_depth': suggest_int(trial, 'max_depth', *SEARCH_SPACE['max_depth']),
+            'min_child_weight': suggest_int(trial, 'min_child_weight', *SEARCH_SPACE['min_child_weight']),
+            'gamma': suggest_float(trial, 'gamma', *SEARCH_SPACE['gamma']),
             'n_estimators': 1000,
-            'use_label_encoder': False
+            'early_stopping_rounds': 50  # 검증 fold logloss 기준 조기 종료
         }
         model = xgb.XGBClassifier(**params)
 
         oof_probs = np.zeros(len(y_train))
         oof_idx = np.zeros(len(y_train), dtype=bool)
+        best_iterations = []
 
-        for fold, (tr_idx, val_idx) in enumerate(skf.split(X_train, y_train)):
-            X_tr, X_val = X_train[tr_idx], X_train[val_idx]
-            y_tr, y_val = y_train.iloc[tr_idx], y_train.iloc[val_idx]
-                    
-            model.fit(X_tr, y_tr, 
-                    eval_set = [(X_val, y_val)],
-                    verbose=True
+        for fold in folds:
+            model.fit(fold.X_tr, fold.y_tr, 
+                    eval_set = [(fold.X_val, fold.y_val)],
+                    verbose=False
                 )
+            best_iterations.append(model.best_iteration)
 
-            probs = model.predict_proba(X_val)[:, 1]
-            oof_probs[val_idx] = probs
-            oof_idx[val_idx] = True
+            # predict_proba는 조기 종료 시점(best_iteration)까지의 트리만 사용
+            probs = model.predict_proba(fold.X_val)[:, 1]
+            oof_probs[fold.val_idx] = probs
+            oof_idx[fold.val_idx] = True
+            report_fold(trial, y_train, oof_probs, oof_idx, fold.k)
 
         # 안전 체크(모든 인덱스가 채워졌는지)
         assert oof_idx.all()
@@ -57,33 +73,34 @@ def xg_run(X_train, y_train, X_test, use_SMOTE = False) :
         # Optuna는 maximize 하므로 F1 반환
         # (또는 -best_f1을 minimize로 해도 됨)
         trial.set_user_attr("best_threshold", float(best_thr))
+        trial.set_user_attr("best_iteration", int(round(np.mean(best_iterations))))
         
         return float(best_f1)
     
     # Optuna 스터디 생성
-    study = optuna.create_study(direction='maximize')
-    study.optimize(lambda trial : objective(trial, X_train, y_train), n_trials=5)
+    study = create_study(study_name, direction='maximize', search_space=SEARCH_SPACE)
+    run_study(study, lambda trial : objective(trial, X_train, y_train), n_trials, n_workers)
 
     # 최종 모델 학습 (전체 데이터 사용)
+    # fold 평균 best_iteration 만큼의 트리로 전체 데이터에 한 번만 학습
     best_params = study.best_params
+    best_params['n_estimators'] = study.best_trial.user_attrs.get("best_iteration", 999) + 1
     best_thr = study.best_trial.user_attrs.get("best_threshold")
     
-    model = xgb.XGBClassifier(**best_params)
+    model = xgb.XGBClassifier(**fixed_params, **best_params)
+
+    # 스태킹용 OOF : 최종 파라미터(고정 트리 수)로 fold마다 다시 학습 (ensemble.py)
+    oof_probs = oof_predict(lambda : xgb.XGBClassifier(**fixed_params, **best_params), folds, use_SMOTE) if return_oof else None
     
-    if use_SMOTE :
-        smote = BorderlineSMOTE(random_state=42, kind="borderline-1")
-        X_train, y_train = smote.fit_resample(X_train, y_train)
-        
-    for fold, (tr_idx, val_idx) in enumerate(skf.split(X_train, y_train)):
-            X_tr, X_val = X_train[tr_idx], X_train[val_idx]
-            y_tr, y_val = y_train.iloc[tr_idx], y_train.iloc[val_idx]
-        
-            model.fit(X_tr, y_tr, 
-                    eval_set = [(X_val, y_val)], 
-                    verbose=True
-                )
+    with phase('fit') :
+        if use_SMOTE :
+            X_train, y_train = resample(X_train, y_train)
+
+        model.fit(X_train, y_train, verbose=False)
 
-    y_prob = model.predict_proba(X_test)[:,1]
+    with phase('predict') :
+        y_prob = model.predict_proba(X_test)[:,1]
     y_pred = (y_prob >= best_thr).astype(int)
 
-    return {'best_params' : best_params, 'best_thr' : best_thr, 'y_prob' : y_prob, 'y_pred' : y_pred}
\ No newline at end of file
+    return {'best_params' : best_params, 'search_params' : dict(study.best_trial.params), 'best_thr' : best_thr, 'y_prob' : y_prob, 'y_pred' : y_pred,
+            'model' : model, 'scaler' : folds.scaler, 'oof_probs' : oof_probs}
\ No newline at end of file
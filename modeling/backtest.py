@@ -0,0 +1,157 @@
+"""연도별 walk-forward 백테스트 : Y년까지 학습 -> Y+1년 평가를 여러 Y/모델에 대해 병렬 실행
+
+    python backtest.py --data 상장 --features elasticnet --models 1 3 4 --years 2012 2018 --workers 4 --threads 2
+    python backtest.py --data ALL --features pca --models 1 2 3 4 5 6 --years 2014 2018 --trials 20 --smote
+
+- (Y, 모델) 작업마다 spawn 프로세스 하나. 스레드 제한은 sweep.py와 같은 방식으로 건다.
+- 분할 배열(dataset.py, cutoff=Y/12)과 fold 캐시(folds.py)는 부모가 연도별로 먼저 만들어 두고,
+  같은 연도의 모든 모델 작업이 같은 파일을 mmap한다.
+- 스터디는 '<데이터>-<피처>-<모델>-bt<Y>'로 연도마다 따로 튜닝한다 (미래 데이터로 고른 파라미터를 쓰지 않도록).
+- 결과는 (모델, 평가 연도)별 model_result 지표 CSV와 연도 x 모델 요약표(f1, roc_auc)로 남는다.
+"""
+import argparse
+import csv
+import json
+import multiprocessing as mp
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from dataset import DATASETS, feature_set_tag, load_split
+from folds import build_folds
+from run import MODELS
+from sweep import FEATURE_METHODS, _limit_resources
+
+METRICS = ['accuracy', 'precision', 'recall', 'f1', 'roc_auc', 'pr_auc']
+RESULT_FIELDS = ['data', 'features', 'smote', 'model', 'train_until', 'test_year', 'n_train', 'n_test', 'n_pos',
+                 'status', 'elapsed_sec', *METRICS, 'best_thr', 'best_params', 'error']
+
+
+def year_split(data_select, features, year) :
+    """Y/12까지 train, Y+1년만 test인 배열과 (LSTM용) panel"""
+    split = load_split(data_select, features, cutoff=f"{year}/12")
+    n_train = len(split.y_train)
+    test = np.flatnonzero(np.asarray(split.years[n_train:]) == year + 1)
+    panel = None
+    if split.panel is not None :
+        panel = split.panel.iloc[np.concatenate([np.arange(n_train), n_train + test])].reset_index(drop=True)
+    return split.X_train, split.y_train, split.X_test[test], split.y_test[test], panel
+
+
+def _task(data_select, features, use_SMOTE, model_select, year, n_trials, threads, log_dir) :
+    _limit_resources(threads, 0)
+    module = MODELS[model_select][1]
+    started = time.monotonic()
+    with open(Path(log_dir) / f"{data_select}_{features}_{module}_{year + 1}.log", 'w', encoding='utf-8') as log :
+        sys.stdout = sys.stderr = log
+        try :
+            from result import model_result
+            from run import run_model
+            from study import make_study_name
+            X_train, y_train, X_test, y_test, panel = year_split(data_select, features, year)
+            study_name = f"{make_study_name(data_select, feature_set_tag(data_select, features), module)}-bt{year}"
+            kwargs = {'study_name' : study_name, 'folds' : build_folds(X_train, y_train, X_test)}
+            if n_trials is not None :
+                kwargs['n_trials'] = n_trials
+            if module == 'LSTM' :
+                kwargs['panel'] = panel
+            context = {'data' : data_select, 'features' : features, 'smote' : bool(use_SMOTE), 'model' : module,
+                       'study_name' : study_name, 'cutoff' : f"{year}/12", 'test_year' : year + 1}
+            metrics = model_result(run_model(model_select, X_train, y_train, X_test, use_SMOTE, **kwargs), y_test,
+                                   context)
+            return 'ok', time.monotonic() - started, metrics
+        except BaseException :
+            traceback.print_exc()
+            return 'failed', time.monotonic() - started, traceback.format_exc(limit=3)
+        finally :
+            # 풀 프로세스는 다음 작업에 재사용되므로 닫힌 로그 파일을 남기지 않는다
+            sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+
+
+def _row(data_select, features, use_SMOTE, model_select, year, sizes, status, elapsed, payload) :
+    row = {'data' : data_select, 'features' : features, 'smote' : 'Y' if use_SMOTE else 'N',
+           'model' : MODELS[model_select][1], 'train_until' : year, 'test_year' : year + 1, **sizes,
+           'status' : status, 'elapsed_sec' : round(elapsed, 1)}
+    if status == 'ok' :
+        row.update({key : payload[key] for key in METRICS})
+        row['best_thr'] = payload['best_thr']
+        row['best_params'] = json.dumps(payload['best_params'], ensure_ascii=False, default=str)
+    else :
+        row['error'] = payload
+    return row
+
+
+def backtest(data_select, feature_selection, use_SMOTE, models, years, workers=2, threads=1, n_trials=None,
+             output='results/backtest.csv', log_dir='results/logs/backtest') :
+    """years의 각 Y에 대해 (Y까지 학습, Y+1 평가)를 모델별로 실행하고 결과 행 목록을 반환"""
+    data_select = data_select.upper()
+    features = FEATURE_METHODS[feature_selection]
+    models = [str(m) for m in models]
+    Path(log_dir).mkdir(parents=True, exist_ok=True)
+
+    rows, tasks = [], []
+    for year in years :
+        X_train, y_train, X_test, y_test, _ = year_split(data_select, features, year)
+        sizes = {'n_train' : len(y_train), 'n_test' : len(y_test), 'n_pos' : int(np.sum(y_test))}
+        # 평가 연도에 한 클래스만 있으면 roc_auc/pr_auc를 계산할 수 없다
+        if len(np.unique(y_test)) < 2 or len(np.unique(y_train)) < 2 :
+            rows.extend(_row(data_select, features, use_SMOTE, m, year, sizes, 'skipped', 0, "한 클래스만 존재")
+                        for m in models)
+            continue
+        # 모델 작업들이 공유할 fold 캐시를 먼저 만든다
+        build_folds(X_train, y_train, X_test)
+        tasks.extend((m, year, sizes) for m in models)
+
+    print(f"총 {len(tasks)}개 작업 (연도 {len(years)} x 모델 {len(models)}) / 동시 실행 {workers}개")
+    with ProcessPoolExecutor(workers, mp_context=mp.get_context('spawn')) as pool :
+        futures = {pool.submit(_task, data_select, features, use_SMOTE, m, year, n_trials, threads, log_dir) :
+                   (m, year, sizes) for m, year, sizes in tasks}
+        for future in as_completed(futures) :
+            m, year, sizes = futures[future]
+            try :
+                status, elapsed, payload = future.result()
+            except BaseException as exc :
+                status, elapsed, payload = 'failed', 0, f"프로세스 비정상 종료 ({exc!r})"
+            row = _row(data_select, features, use_SMOTE, m, year, sizes, status, elapsed, payload)
+            rows.append(row)
+            print(f"[{status}] {row['model']} {year + 1} ({elapsed:.0f}s) f1={row.get('f1', '-')}")
+
+    rows.sort(key=lambda r : (r['test_year'], r['model']))
+    if output :
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w', newline='', encoding='utf-8') as f :
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    return rows
+
+
+def summarize(rows, metrics=('f1', 'roc_auc')) :
+    """평가 연도 x 모델 지표표 (성공한 작업만)"""
+    df = pd.DataFrame([r for r in rows if r['status'] == 'ok'])
+    if df.empty :
+        return df
+    return df.pivot_table(index='test_year', columns='model', values=list(metrics)).round(4)
+
+
+if __name__ == '__main__' :
+    ap = argparse.ArgumentParser(description="연도별 walk-forward 백테스트 (Y년까지 학습 -> Y+1년 평가)")
+    ap.add_argument('--data', choices=DATASETS, required=True)
+    ap.add_argument('--features', choices=list(FEATURE_METHODS), required=True)
+    ap.add_argument('--models', nargs='+', choices=list(MODELS), required=True)
+    ap.add_argument('--years', nargs=2, type=int, required=True, metavar=('FIRST', 'LAST'),
+                    help="학습 마지막 연도 범위 (양끝 포함)")
+    ap.add_argument('--smote', action='store_true')
+    ap.add_argument('--workers', type=int, default=2, help="동시 실행 작업 수")
+    ap.add_argument('--threads', type=int, default=1, help="작업당 BLAS/OpenMP/TF 스레드 수")
+    ap.add_argument('--trials', type=int, help="작업별 Optuna trial 수")
+    ap.add_argument('--output', default='results/backtest.csv')
+    args = ap.parse_args()
+    rows = backtest(args.data, args.features, args.smote, args.models, range(args.years[0], args.years[1] + 1),
+                    args.workers, args.threads, args.trials, args.output)
+    print(summarize(rows).to_string())
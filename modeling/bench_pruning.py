@@ -0,0 +1,87 @@
+"""fold 단위 pruning 효과 측정
+
+같은 합성 데이터·같은 trial 예산으로 pruning 켬/끔을 번갈아 실행해 튜닝 wall-clock과 pruned trial 수를 비교한다.
+
+    python bench_pruning.py --models LR RF --trials 30 --rows 20000 --output pruning.json
+"""
+import argparse
+import importlib
+import json
+import tempfile
+import time
+
+import numpy as np
+import optuna
+
+import study as study_module
+from folds import build_folds
+from synthetic import make_data
+
+RUNNERS = {
+    'LR' : ('LR', 'LR_run'),
+    'RF' : ('RF', 'RF_run'),
+    'CatBoost' : ('CatBoost', 'Cat_run'),
+    'XGBoost' : ('XGBoost', 'xg_run'),
+    'LSTM' : ('LSTM', 'lstm_run'),
+    'TabNet' : ('TabNet', 'tabnet_run'),
+}
+
+
+def run_once(runner, X_train, y_train, X_test, folds, trials, pruning, study_name, seed) :
+    # 같은 sampler seed로 켬/끔을 비교 (pruned trial 이후의 탐색 경로는 달라질 수 있음)
+    study_module.PRUNING = pruning
+    study_module.SEED = seed
+    started = time.perf_counter()
+    runner(X_train, y_train, X_test, False, study_name=study_name, n_trials=trials, n_workers=1, folds=folds)
+    elapsed = time.perf_counter() - started
+    study = optuna.load_study(study_name=study_name, storage=study_module.STORAGE)
+    states = [t.state for t in study.get_trials(deepcopy=False)]
+    return {'wall_clock_sec' : round(elapsed, 2),
+            'pruned_trials' : states.count(optuna.trial.TrialState.PRUNED),
+            'best_value' : round(study.best_value, 4)}
+
+
+def main(models, trials, rows, features, positive_rate, repeats) :
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    X_train, y_train, X_test = make_data(rows, features, positive_rate)
+    folds = build_folds(X_train, y_train, X_test, cache_dir=None)
+    # 실행마다 새 스터디를 임시 저장소에 만든다 (실제 optuna.db를 건드리지 않음)
+    tmp = tempfile.mkdtemp(prefix='bench_pruning_')
+    study_module.STORAGE = f"sqlite:///{tmp}/bench.db"
+    report = {'config' : {'trials' : trials, 'rows' : rows, 'features' : features,
+                          'positive_rate' : positive_rate, 'repeats' : repeats}, 'models' : {}}
+    for name in models :
+        module, func = RUNNERS[name]
+        try :
+            runner = getattr(importlib.import_module(module), func)
+        except ImportError as e :
+            report['models'][name] = {'skipped' : str(e)}
+            continue
+        runs = {'pruning_off' : [], 'pruning_on' : []}
+        for i in range(repeats) :
+            for key, pruning in (('pruning_off', False), ('pruning_on', True)) :
+                runs[key].append(run_once(runner, X_train, y_train, X_test, folds, trials, pruning,
+                                          f"{name}-{key}-{i}", seed=42 + i))
+        off = np.median([r['wall_clock_sec'] for r in runs['pruning_off']])
+        on = np.median([r['wall_clock_sec'] for r in runs['pruning_on']])
+        report['models'][name] = {**runs, 'median_saved_sec' : round(float(off - on), 2),
+                                  'median_saved_pct' : round(float((off - on) / off * 100), 1) if off else 0.0}
+    return report
+
+
+if __name__ == '__main__' :
+    ap = argparse.ArgumentParser(description="fold 단위 pruning 벤치마크")
+    ap.add_argument('--models', nargs='+', default=['LR', 'RF'], choices=list(RUNNERS))
+    ap.add_argument('--trials', type=int, default=30)
+    ap.add_argument('--rows', type=int, default=20000)
+    ap.add_argument('--features', type=int, default=15)
+    ap.add_argument('--positive-rate', type=float, default=0.02, dest='positive_rate')
+    ap.add_argument('--repeats', type=int, default=1)
+    ap.add_argument('--output')
+    args = ap.parse_args()
+    report = main(args.models, args.trials, args.rows, args.features, args.positive_rate, args.repeats)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output :
+        with open(args.output, 'w', encoding='utf-8') as f :
+            f.write(text + '\n')
+    print(text)
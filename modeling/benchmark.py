@@ -0,0 +1,151 @@
+"""러너별 학습 경로 벤치마크 (합성 데이터, GPU/실데이터 불필요)
+
+    python benchmark.py --models LR RF CatBoost XGBoost --scale 0.2 --trials 5 --output bench.json
+    python benchmark.py --models LR XGBoost --scale 0.2 --trials 5 --baseline bench.json --tolerance 0.2
+
+- 데이터는 synthetic.make_panel로 실제 데이터셋과 같은 피처 수/부실 비율의 기업-연도 패널을 만들고
+  dataset.py와 같은 기준(cutoff)으로 train/test를 나눈다.
+- 모델마다 새 spawn 프로세스에서 (스레드 제한 후) 러너를 한 번 실행하고, study.phase가 기록한
+  tune/fit/predict 구간 시간과 구간 동안의 최대 RSS, test 지표를 JSON으로 남긴다.
+- 스터디는 메모리 저장소, fold 캐시는 끄고 실행한다 (optuna.db/cache를 건드리지 않음).
+- 의존성이 없는 러너(TensorFlow/torch 미설치)는 skipped로 기록한다.
+- --baseline을 주면 같은 모델의 구간 시간이 tolerance 비율 이상 늘어난 항목을 출력하고 종료 코드 1로 끝난다.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from bench_pruning import RUNNERS
+from dataset import CUTOFF, DATASETS, FEATURE_SETS, _as_split, _split_frame, parse_period
+from synthetic import PROFILES, make_panel
+
+PHASES = ('tune', 'fit', 'predict')
+
+
+def make_split(data_select, features, rows=None, positive_rate=None, cutoff=None, seed=42) :
+    df = make_panel(data_select, rows, positive_rate, seed)
+    df['연도'], df['월'] = parse_period(df['회계년도'])
+    cols = FEATURE_SETS[features][data_select]
+    return _as_split(cols, _split_frame(df, cols, cutoff or CUTOFF))
+
+
+def _run(name, split, trials, threads, seed) :
+    from sweep import _limit_resources
+    _limit_resources(threads, 0)
+    started = time.perf_counter()
+    # 러너 로그는 버리고 JSON만 남긴다
+    sys.stdout = sys.stderr = open(os.devnull, 'w')
+    try :
+        import importlib
+
+        import optuna
+        import study as study_module
+        from folds import build_folds
+        optuna.logging.set_verbosity(optuna.logging.WARNING)
+        study_module.STORAGE, study_module.SEED = '', seed
+        module, func = RUNNERS[name]
+        try :
+            runner = getattr(importlib.import_module(module), func)
+        except ImportError as e :
+            return {'status' : 'skipped', 'error' : str(e)}
+        kwargs = {'n_trials' : trials, 'n_workers' : 1,
+                  'folds' : build_folds(split.X_train, split.y_train, split.X_test, cache_dir=None)}
+        if name == 'LSTM' :
+            kwargs['panel'] = split.panel
+        result = runner(split.X_train, split.y_train, split.X_test, False, **kwargs)
+        return {'status' : 'ok', 'total_sec' : round(time.perf_counter() - started, 3),
+                **{f"{p}_sec" : round(study_module.PHASES.get(p, {}).get('sec', 0.0), 3) for p in PHASES},
+                **{f"{p}_peak_rss_mb" : _round(study_module.PHASES.get(p, {}).get('peak_rss_mb'), 1) for p in PHASES},
+                **_metrics(split.y_test, result)}
+    except BaseException :
+        return {'status' : 'failed', 'error' : traceback.format_exc(limit=3)}
+    finally :
+        sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+
+
+def _round(value, digits) :
+    return None if value is None else round(value, digits)
+
+
+def _metrics(y_test, result) :
+    from sklearn.metrics import average_precision_score, f1_score, roc_auc_score
+    return {'f1' : round(float(f1_score(y_test, result['y_pred'])), 4),
+            'roc_auc' : round(float(roc_auc_score(y_test, result['y_prob'])), 4),
+            'pr_auc' : round(float(average_precision_score(y_test, result['y_prob'])), 4)}
+
+
+def environment() :
+    import sklearn
+    return {'python' : platform.python_version(), 'platform' : platform.platform(), 'cpu_count' : os.cpu_count(),
+            'numpy' : np.__version__, 'sklearn' : sklearn.__version__}
+
+
+def benchmark(models, data_select='상장', features='elasticnet', scale=0.1, positive_rate=None, trials=5, threads=1,
+              seed=42) :
+    data_select = data_select.upper()
+    rows = max(500, int(PROFILES[data_select]['rows'] * scale))
+    split = make_split(data_select, features, rows, positive_rate, seed=seed)
+    report = {'config' : {'data' : data_select, 'features' : features, 'rows' : rows,
+                          'n_features' : len(split.feature_cols), 'n_train' : len(split.y_train),
+                          'n_test' : len(split.y_test), 'positive_rate' : round(float(np.mean(split.y_train)), 4),
+                          'trials' : trials, 'threads' : threads, 'seed' : seed},
+              'environment' : environment(), 'models' : {}}
+    ctx = mp.get_context('spawn')
+    for name in models :
+        # 모델마다 새 프로세스 : 최대 RSS와 import 비용이 다른 모델 실행에 섞이지 않게
+        with ProcessPoolExecutor(1, mp_context=ctx) as pool :
+            report['models'][name] = pool.submit(_run, name, split, trials, threads, seed).result()
+        print(f"[{report['models'][name]['status']}] {name} {report['models'][name].get('total_sec', '-')}s")
+    return report
+
+
+def compare(report, baseline, tolerance=0.2, min_sec=0.5) :
+    """baseline 대비 구간 시간이 (1 + tolerance)배를 넘은 항목. min_sec 미만 구간은 잡음으로 보고 무시"""
+    regressions = []
+    for name, now in report['models'].items() :
+        before = baseline.get('models', {}).get(name, {})
+        if now.get('status') != 'ok' or before.get('status') != 'ok' :
+            continue
+        for key in [f"{p}_sec" for p in PHASES] + ['total_sec'] :
+            if before.get(key, 0) >= min_sec and now[key] > before[key] * (1 + tolerance) :
+                regressions.append({'model' : name, 'metric' : key, 'baseline' : before[key], 'current' : now[key],
+                                    'change_pct' : round((now[key] / before[key] - 1) * 100, 1)})
+    return regressions
+
+
+if __name__ == '__main__' :
+    ap = argparse.ArgumentParser(description="러너별 tune/fit/predict 시간·메모리 벤치마크 (합성 데이터)")
+    ap.add_argument('--models', nargs='+', default=list(RUNNERS), choices=list(RUNNERS))
+    ap.add_argument('--data', choices=DATASETS, default='상장', help="행 수/부실 비율/피처 수를 흉내낼 데이터셋")
+    ap.add_argument('--features', choices=list(FEATURE_SETS), default='elasticnet')
+    ap.add_argument('--scale', type=float, default=0.1, help="PROFILES 행 수 배율")
+    ap.add_argument('--positive-rate', type=float, dest='positive_rate')
+    ap.add_argument('--trials', type=int, default=5)
+    ap.add_argument('--threads', type=int, default=1, help="모델당 BLAS/OpenMP/TF 스레드 수")
+    ap.add_argument('--seed', type=int, default=42)
+    ap.add_argument('--output')
+    ap.add_argument('--baseline', help="비교할 이전 benchmark JSON")
+    ap.add_argument('--tolerance', type=float, default=0.2, help="허용 시간 증가 비율")
+    args = ap.parse_args()
+    report = benchmark(args.models, args.data, args.features, args.scale, args.positive_rate, args.trials,
+                       args.threads, args.seed)
+    regressions = []
+    if args.baseline :
+        with open(args.baseline, encoding='utf-8') as f :
+            regressions = compare(report, json.load(f), args.tolerance)
+        report['regressions'] = regressions
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output :
+        with open(args.output, 'w', encoding='utf-8') as f :
+            f.write(text + '\n')
+    print(text)
+    if regressions :
+        sys.exit(1)
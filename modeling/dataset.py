@@ -0,0 +1,172 @@
+"""모델링 데이터셋 로더 : 피처셋 레지스트리 + 파싱된 회계기간 + train/test 분할 캐시
+
+- 피처셋은 feature_selection.py가 저장한 버전(feature_sets/<데이터셋>/LATEST)을 먼저 쓰고,
+  없으면 코드에 선언된 FEATURE_SETS[피처셋][데이터셋]을 쓴다. FEATURE_SET_VERSION=builtin이면 항상 선언값.
+- 회계년도('2017/12')는 한 번만 정수 연도/월로 파싱하고, 분할은 연*100+월 정수 비교로 한다.
+- 분할 결과(float32 피처, int8 라벨, 기업 코드/연도)는 (데이터셋, 피처셋, cutoff, CSV 크기·수정시각) 키로
+  .npy 캐시에 저장하고 이후 실행은 CSV를 다시 읽지 않고 mmap으로 연다.
+
+    split = load_split('상장', 'elasticnet')            # cutoff 기본값 : SPLIT_CUTOFF (2017/12)
+    split = load_split('ALL', 'pca', cutoff='2016/12')
+    result = run_model('3', split.X_train, split.y_train, split.X_test, False)
+"""
+import json
+import os
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from folds import fingerprint, save_array
+
+DATASETS = ['상장', '비상장', 'ALL']
+DATA_DIR = os.getenv('DATA_DIR', 'data')
+CACHE_DIR = os.getenv('DATASET_CACHE_DIR', 'cache/datasets')
+CUTOFF = os.getenv('SPLIT_CUTOFF', '2017/12')
+FEATURE_SET_DIR = os.getenv('FEATURE_SET_DIR', 'feature_sets')
+FEATURE_SET_VERSION = os.getenv('FEATURE_SET_VERSION', 'latest')  # 'latest' | 'v0003' | 'builtin'
+# 피처 후보/통계에서 제외할 식별/라벨 컬럼 (feature_selection.py, eda_stats.py)
+ID_COLS = ['회사명', '거래소코드', '회계년도', '산업코드', '산업명', '연도', '월', 'label']
+
+FEATURE_SETS = {
+    'elasticnet' : {
+        '상장' : ['ROA', '영업이익률', '부채 대비 영업활동으로 인한 현금흐름', 'LVGI', '총자산회전율',
+                 '부채 대비 재무활동으로 인한 현금흐름', 'TATA', 'PBR', 'Volume', '매출총이익률',
+                 '자기자본증가율', 'SGI', '유형자산회전율', '금융비용부담률', '총자산증가율'],
+        '비상장' : ['GMI', 'ROA', 'LVGI', '총자산회전율', '부채 대비 영업활동으로 인한 현금흐름',
+                  '부채 대비 재무활동으로 인한 현금흐름', '이익잉여금', '금융비용부담률', '영업외수익',
+                  '투자활동으로 인한 현금흐름', '이자보상배율', '종업원', '매출채권회전율', '재고자산', '매출채권'],
+        'ALL' : ['GMI', 'ROA', 'LVGI', '총자산회전율', '부채 대비 영업활동으로 인한 현금흐름',
+                 '부채 대비 재무활동으로 인한 현금흐름', '이자보상배율', '금융비용부담률', '매출채권회전율',
+                 '자본잉여금', '유형자산회전율', '감가상각비', '유형자산증가율', '기타포괄손익누계액'],
+    },
+    'pca' : {
+        '상장' : ['감가상각비', 'Marcap', '매출총이익률', 'LVGI', 'SGI', 'AQI', '유동비율',
+                 '부채 대비 영업활동으로 인한 현금흐름', '총자산회전율', '부채 대비 투자활동으로 인한 현금흐름',
+                 '기타포괄손익누계액', '장기차입금', '재무활동으로 인한 현금흐름', '종업원'],
+        '비상장' : ['매출채권회전율', '매출채권', '이자보상배율', '재무활동으로 인한 현금흐름',
+                  '영업활동으로 인한 현금흐름', '유형자산', '영업외비용', '이자비용', '자본금', '금융비용부담률',
+                  '재고자산', '종업원', '판매비와관리비', '감가상각비', '이익잉여금'],
+        'ALL' : ['매출채권회전율', '금융비용부담률', '총자산회전율', '부채 대비 영업활동으로 인한 현금흐름',
+                 '유형자산회전율'],
+    },
+}
+# 대화형 메뉴 번호 -> 피처셋 이름
+FEATURE_ALIASES = {'1' : 'elasticnet', '2' : 'pca'}
+
+# years : train 행 다음 test 행 순서의 회계 연도, panel : 같은 순서의 (거래소코드, 연도) 또는 None
+Split = namedtuple('Split', ['feature_cols', 'X_train', 'X_test', 'y_train', 'y_test', 'years', 'panel'])
+
+
+def feature_set_name(feature_selection) :
+    name = FEATURE_ALIASES.get(str(feature_selection), feature_selection)
+    if name not in FEATURE_SETS :
+        raise ValueError ("피처 셀렉션 방법을 잘못 선택했습니다.")
+    return name
+
+
+def registered_feature_sets(data_select, version=None, root=None) :
+    """feature_selection.py가 저장한 (버전, {피처셋 : 컬럼}). 저장된 버전이 없거나 builtin이면 (None, {})"""
+    version = version or FEATURE_SET_VERSION
+    base = Path(root or FEATURE_SET_DIR) / data_select.upper()
+    if version == 'builtin' :
+        return None, {}
+    if version == 'latest' :
+        if not (base / 'LATEST').exists() :
+            return None, {}
+        version = (base / 'LATEST').read_text(encoding='utf-8').strip()
+    with open(base / version / 'meta.json', encoding='utf-8') as f :
+        return version, json.load(f)['feature_sets']
+
+
+def feature_columns(data_select, feature_selection) :
+    data_select = data_select.upper()
+    name = feature_set_name(feature_selection)
+    _, registered = registered_feature_sets(data_select)
+    columns = registered.get(name) or FEATURE_SETS[name].get(data_select)
+    if columns is None :
+        raise ValueError ("데이터를 잘못 선택했습니다.")
+    return list(columns)
+
+
+def feature_set_tag(data_select, feature_selection) :
+    """스터디/아티팩트 이름용 : 선언값이면 'elasticnet', 저장된 버전이면 'elasticnet-v0002'"""
+    name = feature_set_name(feature_selection)
+    version, registered = registered_feature_sets(data_select)
+    return f"{name}-{version}" if name in registered else name
+
+
+def parse_period(values) :
+    """'2017/12' 형식 회계년도 -> (연도 int16, 월 int8). 월이 없으면 12월로 본다"""
+    s = pd.Series(values).astype(str)
+    year = s.str.slice(0, 4).astype(np.int16).to_numpy()
+    month = pd.to_numeric(s.str.slice(5, 7), errors='coerce').fillna(12).astype(np.int8).to_numpy()
+    return year, month
+
+
+def period_key(year, month) :
+    return np.asarray(year, dtype=np.int32) * 100 + np.asarray(month, dtype=np.int32)
+
+
+def csv_path(data_select) :
+    data_select = data_select.upper()
+    if data_select not in DATASETS :
+        raise ValueError ("데이터를 잘못 선택했습니다.")
+    return Path(DATA_DIR) / f'{data_select}.csv'
+
+
+def read_frame(data_select) :
+    """CSV를 읽고 연도/월 컬럼을 추가한 DataFrame (캐시를 거치지 않는다)"""
+    df = pd.read_csv(csv_path(data_select))
+    df['연도'], df['월'] = parse_period(df['회계년도'])
+    return df
+
+
+def _split_frame(df, feature_cols, cutoff) :
+    cutoff_key = period_key(*parse_period([cutoff]))[0]
+    train = period_key(df['연도'], df['월']) <= cutoff_key
+    X = df[feature_cols].to_numpy(dtype=np.float32)
+    y = df['label'].to_numpy(dtype=np.int8)
+    # LSTM 시퀀스용 : train 행 다음 test 행 순서의 기업 코드/연도
+    arrays = {'X_train' : X[train], 'X_test' : X[~train], 'y_train' : y[train], 'y_test' : y[~train],
+              'year' : np.concatenate([df['연도'].to_numpy()[train], df['연도'].to_numpy()[~train]])}
+    if '거래소코드' in df.columns :
+        codes = df['거래소코드'].astype(str).to_numpy()
+        arrays['company'] = np.concatenate([codes[train], codes[~train]]).astype(str)
+    return arrays
+
+
+def _as_split(feature_cols, arrays) :
+    panel = None
+    if 'company' in arrays :
+        panel = pd.DataFrame({'거래소코드' : arrays['company'], '연도' : arrays['year']})
+    return Split(feature_cols, arrays['X_train'], arrays['X_test'], arrays['y_train'], arrays['y_test'], arrays['year'],
+                 panel)
+
+
+def load_split(data_select, feature_selection, cutoff=None, cache_dir=CACHE_DIR) :
+    """cutoff(포함) 이전 회계기간은 train, 이후는 test. cache_dir이 None이면 매번 CSV에서 만든다"""
+    data_select = data_select.upper()
+    cutoff = cutoff or CUTOFF
+    feature_cols = feature_columns(data_select, feature_selection)
+    path = csv_path(data_select)
+    if not cache_dir :
+        return _as_split(feature_cols, _split_frame(read_frame(data_select), feature_cols, cutoff))
+
+    stat = path.stat()
+    root = Path(cache_dir) / fingerprint(data=data_select, features=tuple(feature_cols), cutoff=cutoff,
+                                         csv=(str(path.resolve()), stat.st_size, stat.st_mtime_ns))
+    if not (root / 'DONE').exists() :
+        root.mkdir(parents=True, exist_ok=True)
+        arrays = _split_frame(read_frame(data_select), feature_cols, cutoff)
+        for name, array in arrays.items() :
+            save_array(root / f'{name}.npy', array)
+        with open(root / 'meta.json', 'w', encoding='utf-8') as f :
+            json.dump({'data' : data_select, 'feature_cols' : feature_cols, 'cutoff' : cutoff,
+                       'n_train' : len(arrays['y_train']), 'n_test' : len(arrays['y_test'])}, f, ensure_ascii=False)
+        (root / 'DONE').touch()
+
+    arrays = {name : np.load(root / f'{name}.npy', mmap_mode='r')
+              for name in ('X_train', 'X_test', 'y_train', 'y_test', 'year', 'company') if (root / f'{name}.npy').exists()}
+    return _as_split(feature_cols, arrays)
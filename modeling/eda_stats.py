@@ -0,0 +1,250 @@
+"""대용량 데이터용 스트리밍 EDA 통계 (평균/분산/상관행렬/결측률)
+
+    python eda_stats.py --data 상장 비상장 ALL --jobs 4                 # heatmap/<데이터>_corr.csv/png + _stats.csv
+    python eda_stats.py --data ALL --sample                            # EDA.ipynb의 sample_col만 (<데이터>_sample_corr)
+    python eda_stats.py --path big.parquet --name big --chunk-rows 200000
+
+- 파일 전체를 메모리에 올리지 않고 청크별로 누적기(StreamingStats)를 만든 뒤 더해서 합친다.
+  누적기는 열 쌍별 (공통 관측 수, 합, 제곱합, 곱의 합)만 들고 있어 순서와 관계없이 합칠 수 있다.
+- 상관계수는 DataFrame.corr()(pearson)와 같이 열 쌍마다 둘 다 관측된 행만 쓴다. 무한대는 결측으로 본다.
+- CSV는 줄 경계에 맞춘 바이트 구간, Parquet은 row group 단위로 나눠 joblib 워커가 각자 읽고 누적한다.
+  (CSV 셀 안에 줄바꿈이 없다고 가정한다)
+- 큰 값(자산 등)의 제곱합 정밀도 손실을 막기 위해 첫 청크 평균을 빼고(shift) 누적한다.
+"""
+import argparse
+import io
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from dataset import DATASETS, ID_COLS, csv_path
+
+N_JOBS = int(os.getenv('EDA_JOBS', '-1'))
+CHUNK_BYTES = 64 * 1024 ** 2
+CHUNK_ROWS = 100000
+OUT_DIR = 'heatmap'
+# EDA.ipynb의 sample_col
+SAMPLE_COLS = ['자산', '자본', '부채', '매출액', '영업이익', '당기순이익', '영업활동으로 인한 현금흐름', '재무활동으로 인한 현금흐름',
+               '투자활동으로 인한 현금흐름', '매출총이익률', '순이익률', '매출액증가율', '영업이익증가율', 'Beneish M-Score']
+
+
+class StreamingStats :
+    """열 쌍별 충분통계 누적기. a + b 로 합칠 수 있다 (같은 columns/shift일 때)"""
+
+    def __init__(self, columns, shift=None) :
+        self.columns = list(columns)
+        p = len(self.columns)
+        self.shift = np.zeros(p) if shift is None else np.asarray(shift, dtype=np.float64)
+        self.rows = 0
+        self.n = np.zeros((p, p))     # n[i, j] : i, j 모두 관측된 행 수
+        self.sx = np.zeros((p, p))    # sx[i, j] : j도 관측된 행에서 x_i 합
+        self.sxx = np.zeros((p, p))   # sxx[i, j] : j도 관측된 행에서 x_i 제곱합
+        self.sxy = np.zeros((p, p))   # sxy[i, j] : x_i * x_j 합
+        self.min = np.full(p, np.inf)
+        self.max = np.full(p, -np.inf)
+
+    def update(self, X) :
+        """(행, 열) 배열 또는 DataFrame 청크를 누적"""
+        if isinstance(X, pd.DataFrame) :
+            X = X[self.columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+        X = np.asarray(X, dtype=np.float64)
+        observed = np.isfinite(X)
+        M = observed.astype(np.float64)
+        Z = np.where(observed, X - self.shift, 0.0)
+        self.rows += len(X)
+        self.n += M.T @ M
+        self.sx += Z.T @ M
+        self.sxx += (Z * Z).T @ M
+        self.sxy += Z.T @ Z
+        if len(X) :
+            with np.errstate(invalid='ignore') :
+                self.min = np.fmin(self.min, np.nanmin(np.where(observed, X, np.nan), axis=0))
+                self.max = np.fmax(self.max, np.nanmax(np.where(observed, X, np.nan), axis=0))
+        return self
+
+    def __add__(self, other) :
+        if self.columns != other.columns or not np.array_equal(self.shift, other.shift) :
+            raise ValueError("컬럼과 shift가 같은 누적기만 합칠 수 있습니다.")
+        merged = StreamingStats(self.columns, self.shift)
+        merged.rows = self.rows + other.rows
+        for key in ('n', 'sx', 'sxx', 'sxy') :
+            setattr(merged, key, getattr(self, key) + getattr(other, key))
+        merged.min, merged.max = np.fmin(self.min, other.min), np.fmax(self.max, other.max)
+        return merged
+
+    def count(self) :
+        return np.diag(self.n)
+
+    def mean(self) :
+        with np.errstate(divide='ignore', invalid='ignore') :
+            return np.diag(self.sx) / self.count() + self.shift
+
+    def var(self, ddof=1) :
+        n = self.count()
+        with np.errstate(divide='ignore', invalid='ignore') :
+            var = (np.diag(self.sxx) - np.diag(self.sx) ** 2 / n) / (n - ddof)
+        return np.where(n > ddof, np.maximum(var, 0), np.nan)
+
+    def missing_rate(self) :
+        return 1 - self.count() / self.rows if self.rows else np.full(len(self.columns), np.nan)
+
+    def corr(self, min_periods=1) :
+        """pairwise complete Pearson 상관행렬 (DataFrame.corr와 같은 값)"""
+        n, sx, sxx = self.n, self.sx, self.sxx
+        with np.errstate(divide='ignore', invalid='ignore') :
+            cov = self.sxy - sx * sx.T / n
+            var_i = sxx - sx ** 2 / n
+            corr = cov / np.sqrt(var_i * var_i.T)
+        corr = np.clip(corr, -1, 1)
+        corr[(n < max(min_periods, 2)) | ~np.isfinite(corr)] = np.nan
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    def summary(self) :
+        return pd.DataFrame({'count' : self.count().astype(np.int64), 'missing_rate' : self.missing_rate(),
+                             'mean' : self.mean(), 'std' : np.sqrt(self.var()),
+                             'min' : np.where(np.isfinite(self.min), self.min, np.nan),
+                             'max' : np.where(np.isfinite(self.max), self.max, np.nan)}, index=self.columns)
+
+
+def _byte_ranges(path, chunk_bytes) :
+    """헤더 다음부터 줄 경계에 맞춘 (시작, 끝) 바이트 구간과 헤더 줄"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f :
+        header = f.readline()
+        start = f.tell()
+        ranges = []
+        while start < size :
+            f.seek(min(start + chunk_bytes, size))
+            if f.tell() < size :
+                f.readline()
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return header, ranges
+
+
+def _read_csv_range(path, header, start, end, usecols) :
+    with open(path, 'rb') as f :
+        f.seek(start)
+        body = f.read(end - start)
+    return pd.read_csv(io.BytesIO(header + body), usecols=usecols, encoding='utf-8-sig')
+
+
+def _csv_task(path, header, start, end, columns, shift) :
+    return StreamingStats(columns, shift).update(_read_csv_range(path, header, start, end, columns))
+
+
+def _parquet_task(path, row_groups, columns, shift) :
+    import pyarrow.parquet as pq
+    stats = StreamingStats(columns, shift)
+    for batch in pq.ParquetFile(path).iter_batches(row_groups=row_groups, columns=columns) :
+        stats.update(batch.to_pandas())
+    return stats
+
+
+def numeric_columns(path) :
+    """식별/라벨 컬럼을 뺀 수치 컬럼 (앞부분 1000행의 dtype 기준)"""
+    if str(path).endswith('.parquet') :
+        import pyarrow.parquet as pq
+        head = next(pq.ParquetFile(path).iter_batches(batch_size=1000)).to_pandas()
+    else :
+        head = pd.read_csv(path, nrows=1000, encoding='utf-8-sig')
+    return [c for c in head.columns if c not in ID_COLS and pd.api.types.is_numeric_dtype(head[c])]
+
+
+def compute_stats(path, columns=None, n_jobs=N_JOBS, chunk_bytes=CHUNK_BYTES, chunk_rows=CHUNK_ROWS) :
+    """파일 전체의 StreamingStats. 청크별 누적기를 병렬로 만든 뒤 합친다"""
+    path = str(path)
+    columns = list(columns or numeric_columns(path))
+    if path.endswith('.parquet') :
+        import pyarrow.parquet as pq
+        meta = pq.ParquetFile(path).metadata
+        first = next(pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns)).to_pandas()
+        # row group을 대략 chunk_rows 행씩 묶어 작업 하나로
+        groups, current, rows = [], [], 0
+        for i in range(meta.num_row_groups) :
+            current.append(i)
+            rows += meta.row_group(i).num_rows
+            if rows >= chunk_rows :
+                groups.append(current)
+                current, rows = [], 0
+        groups += [current] if current else []
+        shift = StreamingStats(columns).update(first).mean()
+        shift = np.where(np.isfinite(shift), shift, 0.0)
+        parts = Parallel(n_jobs=n_jobs)(delayed(_parquet_task)(path, g, columns, shift) for g in groups)
+    else :
+        header, ranges = _byte_ranges(path, chunk_bytes)
+        shift = np.zeros(len(columns))
+        if ranges :
+            shift = StreamingStats(columns).update(_read_csv_range(path, header, *ranges[0], columns)).mean()
+            shift = np.where(np.isfinite(shift), shift, 0.0)
+        parts = Parallel(n_jobs=n_jobs)(delayed(_csv_task)(path, header, s, e, columns, shift) for s, e in ranges)
+    return sum(parts, StreamingStats(columns, shift))
+
+
+def _set_korean_font() :
+    from matplotlib import font_manager, rcParams
+    for name in ["AppleGothic", "Malgun Gothic", "NanumGothic", "Nanum Gothic", "Noto Sans CJK KR", "Noto Sans KR"] :
+        try :
+            if os.path.exists(font_manager.findfont(name, fallback_to_default=False)) :
+                rcParams["font.family"] = name
+                break
+        except Exception :
+            continue
+    rcParams["axes.unicode_minus"] = False
+
+
+def write_heatmap(corr, out_dir, filename) :
+    """EDA.ipynb corr_and_heatmap과 같은 형식의 <filename>_corr.csv / .png"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    _set_korean_font()
+    os.makedirs(out_dir, exist_ok=True)
+    csv_file = os.path.join(out_dir, f"{filename}_corr.csv")
+    png_file = os.path.join(out_dir, f"{filename}_corr.png")
+    corr.to_csv(csv_file, encoding="utf-8-sig")
+
+    plt.figure(figsize=(8, 6))
+    plt.imshow(corr, interpolation="nearest", aspect="auto")
+    plt.title(f"Pearson Correlation ({filename})")
+    plt.colorbar()
+    plt.xticks(range(len(corr.columns)), corr.columns, rotation=90, fontsize=7)
+    plt.yticks(range(len(corr.index)), corr.index, fontsize=7)
+    plt.tight_layout()
+    plt.savefig(png_file, dpi=200)
+    plt.close()
+    return csv_file, png_file
+
+
+def run(path, filename, columns=None, out_dir=OUT_DIR, n_jobs=N_JOBS, chunk_bytes=CHUNK_BYTES) :
+    stats = compute_stats(path, columns, n_jobs, chunk_bytes)
+    files = write_heatmap(stats.corr(), out_dir, filename)
+    stats_file = os.path.join(out_dir, f"{filename}_stats.csv")
+    stats.summary().to_csv(stats_file, encoding="utf-8-sig")
+    return stats, (*files, stats_file)
+
+
+if __name__ == '__main__' :
+    ap = argparse.ArgumentParser(description="청크 스트리밍 상관행렬/기술통계와 히트맵 생성")
+    ap.add_argument('--data', nargs='+', choices=DATASETS, help="data/<데이터>.csv (DATA_DIR)")
+    ap.add_argument('--path', help="임의의 CSV/Parquet 파일")
+    ap.add_argument('--name', help="--path 출력 파일 이름 (기본: 파일 이름)")
+    ap.add_argument('--sample', action='store_true', help="SAMPLE_COLS만 (<이름>_sample_corr)")
+    ap.add_argument('--out', default=OUT_DIR)
+    ap.add_argument('--jobs', type=int, default=N_JOBS, help="병렬 작업 수 (-1 = CPU 수)")
+    ap.add_argument('--chunk-mb', type=float, default=CHUNK_BYTES / 1024 ** 2, dest='chunk_mb', help="CSV 청크 크기")
+    args = ap.parse_args()
+    targets = [(csv_path(d), d) for d in args.data or []]
+    if args.path :
+        targets.append((Path(args.path), args.name or Path(args.path).stem))
+    if not targets :
+        ap.error("--data 또는 --path가 필요합니다.")
+    for path, name in targets :
+        filename = f"{name}_sample" if args.sample else name
+        stats, files = run(path, filename, SAMPLE_COLS if args.sample else None, args.out, args.jobs,
+                           int(args.chunk_mb * 1024 ** 2))
+        print(f"[{name}] {stats.rows}행 x {len(stats.columns)}열 -> {', '.join(files)}")
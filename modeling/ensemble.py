@@ -0,0 +1,177 @@
+"""여러 모델을 프로세스별로 동시에 학습하고 OOF 확률로 스태킹/블렌딩 앙상블을 만든다
+
+    python ensemble.py --data 상장 --features elasticnet --models 1 3 4 --threads 8 --method stacking --register
+    python ensemble.py --data ALL --features pca --models 2 3 4 --budget RF=16 CatBoost=8 XGBoost=8
+
+- 멤버마다 spawn 프로세스 하나. 스레드 예산(--threads, 모델별 --budget)은 sweep.py와 같은 방식으로 건다.
+- 멤버 스터디는 run.py와 같은 이름(데이터-피처-모델)이라 이미 튜닝한 스터디는 이어서 사용한다.
+- 멤버는 최종 파라미터로 같은 fold(folds.py 캐시)에서 OOF 확률을 만들고,
+  stacking은 OOF logit에 LogisticRegression을, blending은 단순 평균을 쓴다.
+- threshold는 결합된 OOF 확률(stacking은 fold별로 다시 학습한 결합기의 OOF)에서 find_best_threshold로 고른다.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import queue
+import sys
+import tempfile
+import time
+import traceback
+from pathlib import Path
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+from dataset import feature_set_tag, load_split
+from folds import build_folds, fingerprint
+from registry import MODEL_FILES, EnsembleModel, _load_model, _save_model, save_artifact
+from result import model_result
+from run import DATASETS, MODELS, run_model
+from study import make_study_name
+from sweep import FEATURE_METHODS, _limit_resources
+from thr import find_best_threshold
+
+METHODS = ('stacking', 'blending')
+
+
+def _worker(data_select, features, use_SMOTE, model_select, threads, n_trials, out_dir, results) :
+    _limit_resources(threads, 0)
+    module = MODELS[model_select][1]
+    with open(Path(out_dir) / f"{module}.log", 'w', encoding='utf-8') as log :
+        sys.stdout = sys.stderr = log
+        try :
+            split = load_split(data_select, features)
+            X_train, X_test, y_train = split.X_train, split.X_test, split.y_train
+            # 부모가 만든 디스크 캐시를 그대로 mmap (같은 지문)
+            folds = build_folds(X_train, y_train, X_test)
+            kwargs = {'study_name' : make_study_name(data_select, feature_set_tag(data_select, features), module), 'folds' : folds,
+                      'return_oof' : True}
+            if n_trials is not None :
+                kwargs['n_trials'] = n_trials
+            if module == 'LSTM' :
+                kwargs['panel'] = split.panel
+            result = run_model(model_select, X_train, y_train, X_test, use_SMOTE, **kwargs)
+            np.save(Path(out_dir) / f"{module}_oof.npy", np.asarray(result['oof_probs'], dtype=np.float64))
+            np.save(Path(out_dir) / f"{module}_test.npy", np.asarray(result['y_prob'], dtype=np.float64).reshape(-1))
+            _save_model(module, result['model'], Path(out_dir) / f"{module}_{MODEL_FILES[module]}")
+            results.put((module, 'ok', result['best_params']))
+        except BaseException :
+            traceback.print_exc()
+            results.put((module, 'failed', traceback.format_exc(limit=3)))
+
+
+def train_members(data_select, features, use_SMOTE, models, threads, budget, n_trials, out_dir) :
+    """멤버를 모두 동시에 띄우고 끝날 때까지 기다린다. 반환 : {모듈 : best_params}, {모듈 : 오류}"""
+    ctx = mp.get_context('spawn')
+    results = ctx.Queue()
+    procs = {}
+    for model_select in models :
+        module = MODELS[model_select][1]
+        n_threads = budget.get(module, threads)
+        proc = ctx.Process(target=_worker, args=(data_select, features, use_SMOTE, model_select, n_threads, n_trials,
+                                                 str(out_dir), results), daemon=True)
+        proc.start()
+        procs[module] = proc
+        print(f"[시작] {module} (스레드 {n_threads})")
+
+    done, failed = {}, {}
+    started = time.monotonic()
+    while len(done) + len(failed) < len(procs) :
+        try :
+            module, status, payload = results.get(timeout=1)
+        except queue.Empty :
+            for module, proc in procs.items() :
+                if not proc.is_alive() and module not in done and module not in failed and results.empty() :
+                    failed[module] = f"프로세스 비정상 종료 (exitcode={proc.exitcode})"
+            continue
+        (done if status == 'ok' else failed)[module] = payload
+        print(f"[{status}] {module} ({time.monotonic() - started:.0f}s)")
+    for proc in procs.values() :
+        proc.join()
+    return done, failed
+
+
+def fit_combiner(method, oof, y_train, folds) :
+    """결합기와 threshold 선택용 OOF 앙상블 확률"""
+    if method == 'blending' :
+        return None, oof.mean(axis=1)
+    Z = EnsembleModel.stack_features(oof)
+    meta_oof = np.zeros(len(y_train))
+    # 결합기도 같은 fold로 OOF를 만들어야 threshold가 낙관적으로 고르지 않는다
+    for tr_idx, val_idx in folds.splits :
+        combiner = LogisticRegression(max_iter=1000).fit(Z[tr_idx], y_train[tr_idx])
+        meta_oof[val_idx] = combiner.predict_proba(Z[val_idx])[:, 1]
+    return LogisticRegression(max_iter=1000).fit(Z, y_train), meta_oof
+
+
+def run_ensemble(data_select, feature_selection, use_SMOTE, models, method='stacking', threads=None, budget=None,
+                 n_trials=None, register=False) :
+    if method not in METHODS :
+        raise ValueError(f"알 수 없는 앙상블 방법 : {method}")
+    data_select = data_select.upper()
+    features = FEATURE_METHODS[feature_selection]
+    models = [str(m) for m in models]
+    threads = threads or max(1, (os.cpu_count() or 1) // len(models))
+    feature_cols, X_train, X_test, y_train, y_test = load_split(data_select, features)[:5]
+    # 캐시를 먼저 만들어 두면 멤버 프로세스는 읽기만 한다
+    folds = build_folds(X_train, y_train, X_test)
+
+    with tempfile.TemporaryDirectory(prefix='ensemble_') as out_dir :
+        done, failed = train_members(data_select, features, use_SMOTE, models, threads, budget or {}, n_trials, out_dir)
+        for module, error in failed.items() :
+            print(f"[제외] {module} : {error}")
+        if not done :
+            raise RuntimeError("학습에 성공한 멤버 모델이 없습니다.")
+        modules = [MODELS[m][1] for m in models if MODELS[m][1] in done]
+        oof = np.column_stack([np.load(Path(out_dir) / f"{m}_oof.npy") for m in modules])
+        test = np.column_stack([np.load(Path(out_dir) / f"{m}_test.npy") for m in modules])
+        members = [(m, _load_model(m, Path(out_dir) / f"{m}_{MODEL_FILES[m]}")) for m in modules]
+
+    combiner, ensemble_oof = fit_combiner(method, oof, folds.y_train, folds)
+    best_thr, best_f1 = find_best_threshold(folds.y_train, ensemble_oof)
+    model = EnsembleModel(members, combiner)
+    for m, column in zip(modules, oof.T) :
+        print(f"OOF {m} : {find_best_threshold(folds.y_train, column)[1]:.4f}")
+    print(f"OOF 앙상블({method}) : {best_f1:.4f}")
+
+    y_prob = model.combine(test)
+    result = {'best_params' : {'method' : method, 'members' : modules, **{m : done[m] for m in modules}},
+              'best_thr' : float(best_thr), 'y_prob' : y_prob, 'y_pred' : (y_prob >= best_thr).astype(int),
+              'model' : model, 'scaler' : folds.scaler}
+    name = f"{data_select}-{feature_set_tag(data_select, features)}-Ensemble-{'+'.join(modules)}-{'smote' if use_SMOTE else 'raw'}"
+    metrics = model_result(result, y_test, context={'data' : data_select, 'features' : features, 'smote' : bool(use_SMOTE),
+                                                    'model' : 'Ensemble', 'study_name' : name, 'method' : method})
+    if register :
+        path = save_artifact(name, 'Ensemble', result, feature_cols, metrics,
+                             data_fingerprint=fingerprint(X_train, y_train),
+                             extra={'data' : data_select, 'features' : features, 'smote' : bool(use_SMOTE),
+                                    'method' : method, 'members' : modules})
+        print(f"모델 저장 : {path}")
+    return metrics
+
+
+def _parse_budget(items) :
+    budget = {}
+    for item in items or [] :
+        name, _, value = item.partition('=')
+        modules = {module for _, module, _ in MODELS.values()}
+        if name not in modules or not value.isdigit() :
+            raise argparse.ArgumentTypeError(f"--budget 형식은 모델=스레드 수 입니다 (모델 : {sorted(modules)})")
+        budget[name] = int(value)
+    return budget
+
+
+if __name__ == '__main__' :
+    ap = argparse.ArgumentParser(description="멤버 모델 병렬 학습 + OOF 스태킹/블렌딩 앙상블")
+    ap.add_argument('--data', choices=DATASETS, required=True)
+    ap.add_argument('--features', choices=list(FEATURE_METHODS), required=True)
+    ap.add_argument('--models', nargs='+', choices=list(MODELS), required=True)
+    ap.add_argument('--smote', action='store_true')
+    ap.add_argument('--method', choices=METHODS, default='stacking')
+    ap.add_argument('--threads', type=int, help="멤버당 스레드 수 (기본: CPU 수 / 멤버 수)")
+    ap.add_argument('--budget', nargs='*', help="모델별 스레드 수 (예: RF=16 CatBoost=8)")
+    ap.add_argument('--trials', type=int, help="멤버별 Optuna trial 수")
+    ap.add_argument('--register', action='store_true', help="앙상블을 artifacts/에 저장")
+    args = ap.parse_args()
+    run_ensemble(args.data, args.features, args.smote, args.models, args.method, args.threads,
+                 _parse_budget(args.budget), args.trials, args.register)
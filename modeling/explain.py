@@ -0,0 +1,58 @@
+"""등록된 모델 아티팩트의 피처별 기여도 (SHAP)
+
+    contrib = contributions(load_artifact('상장-elasticnet-XGBoost-raw'), X)   # (n, p), 양수 = 부실 위험 증가
+    idx = top_k(contrib, 5)                                                    # 행별 |기여도| 상위 5개 열 번호
+
+- XGBoost : Booster.predict(pred_contribs=True) (TreeSHAP, log-odds)
+- CatBoost : get_feature_importance(type='ShapValues') (TreeSHAP, log-odds)
+- RF : shap.TreeExplainer (선택 의존성, 양성 확률 기준)
+- LR : 계수 x 스케일된 피처 (학습 평균이 0인 StandardScaler 기준 선형 SHAP, log-odds)
+입력은 아티팩트의 스케일러를 거친 뒤 batch_size 행씩 한 번에 계산한다.
+"""
+import numpy as np
+
+EXPLAINABLE = ('LR', 'RF', 'XGBoost', 'CatBoost')
+BATCH_SIZE = 4096
+
+
+def _tree_explainer(model) :
+    import shap
+    return shap.TreeExplainer(model)
+
+
+def _explain_batch(model_type, model, X, cache) :
+    if model_type == 'LR' :
+        return X * model.coef_[0]
+    if model_type == 'XGBoost' :
+        import xgboost as xgb
+        # 마지막 열은 bias
+        return model.get_booster().predict(xgb.DMatrix(X), pred_contribs=True)[:, :-1]
+    if model_type == 'CatBoost' :
+        from catboost import Pool
+        return model.get_feature_importance(Pool(X), type='ShapValues')[:, :-1]
+    if 'explainer' not in cache :
+        cache['explainer'] = _tree_explainer(model)
+    values = cache['explainer'].shap_values(X)
+    # shap 버전에 따라 클래스별 list 또는 (n, p, 클래스) 배열
+    return values[1] if isinstance(values, list) else np.asarray(values)[..., 1]
+
+
+def contributions(artifact, X, batch_size=BATCH_SIZE) :
+    """원본 피처(DataFrame이면 feature_cols 순서) -> (n, p) 기여도. 양수면 부실 확률을 올리는 방향"""
+    model_type = artifact.meta['model_type']
+    if model_type not in EXPLAINABLE :
+        raise ValueError(f"기여도를 계산할 수 없는 모델 : {model_type} (지원 : {', '.join(EXPLAINABLE)})")
+    X = artifact.transform(X)
+    out = np.empty(X.shape, dtype=np.float64)
+    cache = {}
+    for start in range(0, len(X), batch_size) :
+        out[start:start + batch_size] = _explain_batch(model_type, artifact.model, X[start:start + batch_size], cache)
+    return out
+
+
+def top_k(contrib, k) :
+    """행별 |기여도| 내림차순 상위 k개 열 번호 (n, min(k, p))"""
+    k = min(k, contrib.shape[1])
+    idx = np.argpartition(-np.abs(contrib), k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.abs(np.take_along_axis(contrib, idx, axis=1)), axis=1, kind='stable')
+    return np.take_along_axis(idx, order, axis=1)
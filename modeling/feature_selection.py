@@ -0,0 +1,153 @@
+"""피처 셀렉션 파이프라인 (EDA.ipynb의 VIF -> Elastic Net / Sparse PCA 절차를 스크립트로)
+
+    python feature_selection.py --data 상장 비상장 ALL
+    python feature_selection.py --data 비상장 --cutoff 2016/12 --sizes 10 15 20 --jobs 4 --dry-run
+
+데이터셋마다
+1. cutoff까지의 학습 구간에서 식별/라벨 컬럼을 뺀 전체 수치 컬럼을 후보로 두고 VIF > 10 컬럼을 제거
+2. Elastic Net : ElasticNetCV(l1_ratio 후보 x alpha 경로, MinMax 스케일)의 |계수| 상위 k개
+   Sparse PCA : 누적 분산 85%까지의 PC별 |로딩| 상위 k개 (노트북과 같은 규칙)
+3. 크기(k)별 후보를 folds.py 캐시 fold에서 LogisticRegression OOF PR-AUC로 병렬 평가해 방법별 최고 후보 선택
+4. feature_sets/<데이터>/v0001/meta.json 에 버전으로 저장하고 LATEST 갱신 -> dataset.feature_columns가 읽는다
+"""
+import argparse
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from dataset import CUTOFF, DATASETS, FEATURE_SET_DIR, ID_COLS, parse_period, period_key, read_frame
+from folds import build_folds, fingerprint, oof_predict
+from registry import next_version
+from thr import find_best_threshold
+
+N_JOBS = int(os.getenv('FEATURE_SELECTION_JOBS', '-1'))
+VIF_THRESHOLD = 10.0
+EN_L1_RATIOS = [.1, .5, .7, .9, .95, .99, 1]
+EN_ALPHAS = np.logspace(-4, 1, 50)
+
+
+def training_frame(data_select, cutoff=None) :
+    """cutoff(포함)까지의 학습 구간 후보 피처 X와 라벨 y"""
+    df = read_frame(data_select)
+    train = period_key(df['연도'], df['월']) <= period_key(*parse_period([cutoff or CUTOFF]))[0]
+    candidates = [c for c in df.columns if c not in ID_COLS and pd.api.types.is_numeric_dtype(df[c])]
+    return df.loc[train, candidates].reset_index(drop=True), df.loc[train, 'label'].to_numpy()
+
+
+def vif(X) :
+    """statsmodels variance_inflation_factor(상수항 없음)와 같은 값을 Gram 행렬 역행렬 대각으로 한 번에 계산"""
+    X = np.asarray(X, dtype=np.float64)
+    gram = X.T @ X
+    return np.diag(np.linalg.pinv(gram)) * np.diag(gram)
+
+
+def vif_filter(X, threshold=VIF_THRESHOLD) :
+    values = vif(X.to_numpy())
+    return X.loc[:, values <= threshold], dict(zip(X.columns, values.round(3)))
+
+
+def _minmax(X) :
+    from sklearn.preprocessing import MinMaxScaler
+    return MinMaxScaler().fit_transform(X)
+
+
+def elasticnet_ranking(X, y, splits, n_jobs=N_JOBS) :
+    """ElasticNetCV |계수| 내림차순 피처 (계수 0 제외). CV 분할은 캐시된 fold를 그대로 쓴다"""
+    from sklearn.linear_model import ElasticNetCV
+    model = ElasticNetCV(l1_ratio=EN_L1_RATIOS, alphas=EN_ALPHAS, cv=splits, max_iter=10000, random_state=42,
+                         n_jobs=n_jobs)
+    model.fit(_minmax(X), y)
+    coef = pd.Series(np.abs(model.coef_), index=X.columns)
+    ranking = coef[coef > 0].sort_values(ascending=False, kind='stable')
+    return ranking, {'alpha' : float(model.alpha_), 'l1_ratio' : float(model.l1_ratio_)}
+
+
+def pca_selection(X, top, n_components=5, variance=0.85) :
+    """Sparse PCA : 누적 분산 비율이 variance를 넘는 PC의 다음 PC까지, PC별 |로딩| 상위 top개 (중복 제외)"""
+    from sklearn.decomposition import SparsePCA
+    X_scaled = _minmax(X)
+    spca = SparsePCA(n_components=n_components, alpha=1, random_state=42).fit(X_scaled)
+    ratio = np.array([X_scaled.dot(c).var() for c in spca.components_])
+    ratio = ratio / ratio.sum()
+    n_pc = min(int(np.searchsorted(np.cumsum(ratio), variance)) + 2, n_components)
+    loadings = np.abs(spca.components_[:n_pc])
+    selected = []
+    for pc in loadings :
+        for i in np.argsort(-pc, kind='stable')[:top] :
+            if pc[i] > 9e-7 and X.columns[i] not in selected :
+                selected.append(X.columns[i])
+    return selected
+
+
+def candidates(X, y, splits, sizes, n_jobs=N_JOBS) :
+    """{(방법, 크기) : 피처 목록}"""
+    ranking, en_params = elasticnet_ranking(X, y, splits, n_jobs)
+    found = {}
+    for k in sizes :
+        found[('elasticnet', k)] = list(ranking.index[:k])
+    # PCA는 PC별 상위 개수로 크기를 조절 (노트북 기본값 5)
+    for top in sorted({max(1, k // 3) for k in sizes} | {5}) :
+        found[('pca', top)] = pca_selection(X, top)
+    return {key : cols for key, cols in found.items() if cols}, en_params
+
+
+def evaluate(X, y, cols) :
+    """후보 피처의 LogisticRegression OOF PR-AUC / F1 (fold는 folds.py 캐시 공유)"""
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import average_precision_score
+    folds = build_folds(X[cols].to_numpy(), y)
+    oof = oof_predict(lambda : LogisticRegression(class_weight='balanced', max_iter=1000), folds)
+    return {'pr_auc' : float(average_precision_score(folds.y_train, oof)),
+            'f1' : float(find_best_threshold(folds.y_train, oof)[1])}
+
+
+def select(data_select, cutoff=None, sizes=(10, 15, 20), n_jobs=N_JOBS) :
+    """방법별 최고 후보와 전체 평가 결과"""
+    X, y = training_frame(data_select, cutoff)
+    X, vifs = vif_filter(X)
+    splits = build_folds(X.to_numpy(), y).splits
+    found, en_params = candidates(X, y, splits, sizes, n_jobs)
+    keys = list(found)
+    scores = Parallel(n_jobs=n_jobs)(delayed(evaluate)(X, y, found[key]) for key in keys)
+    results = [{'method' : m, 'size' : k, 'features' : found[(m, k)], **s} for (m, k), s in zip(keys, scores)]
+    best = {}
+    for r in sorted(results, key=lambda r : (-r['pr_auc'], len(r['features']))) :
+        best.setdefault(r['method'], r)
+    return best, results, {'vif' : vifs, 'elasticnet' : en_params, 'n_rows' : int(len(y)),
+                           'data_fingerprint' : fingerprint(X.to_numpy(), y)}
+
+
+def save_feature_sets(data_select, best, results, info, cutoff=None, root=FEATURE_SET_DIR) :
+    base = Path(root) / data_select
+    path = next_version(base)
+    meta = {'data' : data_select, 'version' : path.name, 'cutoff' : cutoff or CUTOFF,
+            'created_at' : datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'feature_sets' : {method : r['features'] for method, r in best.items()},
+            'scores' : {method : {k : r[k] for k in ('size', 'pr_auc', 'f1')} for method, r in best.items()},
+            'candidates' : results, **info}
+    with open(path / 'meta.json', 'w', encoding='utf-8') as f :
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    (base / 'LATEST').write_text(path.name, encoding='utf-8')
+    return path
+
+
+if __name__ == '__main__' :
+    ap = argparse.ArgumentParser(description="Elastic Net / Sparse PCA 피처 셀렉션 후 버전별 저장")
+    ap.add_argument('--data', nargs='+', choices=DATASETS, default=DATASETS)
+    ap.add_argument('--cutoff', help="학습 구간 마지막 회계기간 (기본: SPLIT_CUTOFF)")
+    ap.add_argument('--sizes', nargs='+', type=int, default=[10, 15, 20], help="Elastic Net 후보 피처 수")
+    ap.add_argument('--jobs', type=int, default=N_JOBS, help="병렬 작업 수 (-1 = CPU 수)")
+    ap.add_argument('--root', default=FEATURE_SET_DIR)
+    ap.add_argument('--dry-run', action='store_true', help="저장하지 않고 결과만 출력")
+    args = ap.parse_args()
+    for data_select in args.data :
+        best, results, info = select(data_select, args.cutoff, args.sizes, args.jobs)
+        for method, r in best.items() :
+            print(f"[{data_select}] {method} ({len(r['features'])}개, PR-AUC {r['pr_auc']:.4f}) : {r['features']}")
+        if not args.dry_run :
+            print(f"저장 : {save_feature_sets(data_select, best, results, info, args.cutoff, args.root)}")
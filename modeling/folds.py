@@ -0,0 +1,187 @@
+"""데이터셋/피처셋별 CV fold 공유 캐시
+
+StandardScaler 적합, StratifiedKFold 분할, fold별 학습/검증 배열 슬라이싱을 한 번만 수행하고
+결과를 .npy로 저장한 뒤 mmap으로 연다. 같은 데이터로 실행되는 모든 러너, trial, 병렬 워커 프로세스가
+같은 파일(=OS 페이지 캐시)을 공유하므로 trial마다 다시 자르거나 워커마다 복사본을 들고 있지 않는다.
+
+    folds = build_folds(X_train, y_train, X_test)
+    for fold in folds :
+        model.fit(fold.X_tr, fold.y_tr)
+        oof[fold.val_idx] = model.predict_proba(fold.X_val)[:, 1]
+"""
+import copy
+import hashlib
+import os
+import pickle
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+from sklearn.utils import resample
+
+CACHE_DIR = os.getenv('FOLD_CACHE_DIR', 'cache/folds')
+
+Fold = namedtuple('Fold', ['k', 'tr_idx', 'val_idx', 'X_tr', 'X_val', 'y_tr', 'y_val'])
+
+
+def fingerprint(*arrays, **params) :
+    h = hashlib.sha1()
+    for a in arrays :
+        if a is None :
+            h.update(b'none')
+            continue
+        a = np.ascontiguousarray(a)
+        h.update(str((a.shape, a.dtype.str)).encode())
+        h.update(a.tobytes())
+    h.update(repr(sorted(params.items())).encode())
+    return h.hexdigest()[:16]
+
+
+def save_array(path, array) :
+    """array를 path(.npy)에 저장. 캐시를 만드는 모듈(folds/dataset/resampling)이 같이 쓴다"""
+    # 여러 프로세스가 동시에 같은 키를 만들 수 있으므로 임시 파일에 쓰고 원자적으로 교체
+    tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npy")
+    np.save(tmp, np.ascontiguousarray(array))
+    os.replace(tmp, path)
+
+
+class FoldData :
+    """스케일링된 float32 학습/테스트 배열과 fold별 연속(contiguous) 배열 묶음"""
+
+    def __init__(self, X_train, y_train, X_test, scaler, splits, fold_arrays=None, root=None) :
+        self.X_train = X_train
+        self.y_train = y_train
+        self.X_test = X_test
+        self.scaler = scaler
+        self.splits = splits
+        self.root = root
+        self._fold_arrays = fold_arrays
+        self._subsamples = {}
+        self.smote = False
+        self._smote_folds = {}
+
+    @property
+    def n_splits(self) :
+        return len(self.splits)
+
+    def __len__(self) :
+        return len(self.splits)
+
+    def fold(self, k) :
+        tr_idx, val_idx = self.splits[k]
+        if self._fold_arrays is not None :
+            X_tr, X_val = self._fold_arrays[k]
+        else :
+            X_tr, X_val = self.X_train[tr_idx], self.X_train[val_idx]
+        fold = Fold(k, tr_idx, val_idx, X_tr, X_val, self.y_train[tr_idx], self.y_train[val_idx])
+        if self.smote :
+            if k not in self._smote_folds :
+                from resampling import resample_fold
+                self._smote_folds[k] = resample_fold(fold)
+            return self._smote_folds[k]
+        return fold
+
+    def resampled(self) :
+        """fold 학습 구간에만 BorderlineSMOTE를 적용한 같은 fold 세트 (resampling.py 디스크 캐시 사용)"""
+        if self.smote :
+            return self
+        other = copy.copy(self)
+        other.smote, other._smote_folds, other._subsamples = True, {}, {}
+        return other
+
+    def __iter__(self) :
+        for k in range(self.n_splits) :
+            yield self.fold(k)
+
+    def subsample(self, frac, random_state=42) :
+        """sklearn.utils.resample(X, y, n_samples=int(frac*n), random_state)와 같은 표본의 fold 세트.
+        기존 RF/TabNet objective가 trial마다 다시 뽑던 30% 표본을 한 번만 만든다."""
+        key = (frac, random_state)
+        if key not in self._subsamples :
+            n = len(self.y_train)
+            idx = resample(np.arange(n), n_samples=int(frac * n), random_state=random_state)
+            root = self.root / f"sub_{frac}_{random_state}" if self.root is not None else None
+            if root is not None and (root / 'DONE').exists() :
+                self._subsamples[key] = _build(None, None, None, self.scaler, self.n_splits, 42, root)
+            else :
+                self._subsamples[key] = _build(self.X_train[idx], self.y_train[idx], None, self.scaler,
+                                               self.n_splits, 42, root)
+            if self.smote :
+                self._subsamples[key] = self._subsamples[key].resampled()
+        return self._subsamples[key]
+
+
+def _split(X, y, n_splits, random_state) :
+    skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    return [(tr.astype(np.int64), val.astype(np.int64)) for tr, val in skf.split(X, y)]
+
+
+def _build(X_train, y_train, X_test, scaler, n_splits, random_state, root) :
+    if root is None :
+        splits = _split(X_train, y_train, n_splits, random_state)
+        arrays = [(np.ascontiguousarray(X_train[tr]), np.ascontiguousarray(X_train[val])) for tr, val in splits]
+        return FoldData(X_train, y_train, X_test, scaler, splits, arrays)
+
+    root = Path(root)
+    done = root / 'DONE'
+    if not done.exists() :
+        root.mkdir(parents=True, exist_ok=True)
+        save_array(root / 'X_train.npy', X_train)
+        save_array(root / 'y_train.npy', y_train)
+        if X_test is not None :
+            save_array(root / 'X_test.npy', X_test)
+        for k, (tr, val) in enumerate(_split(X_train, y_train, n_splits, random_state)) :
+            save_array(root / f'fold{k}_tr_idx.npy', tr)
+            save_array(root / f'fold{k}_val_idx.npy', val)
+            save_array(root / f'fold{k}_X_tr.npy', X_train[tr])
+            save_array(root / f'fold{k}_X_val.npy', X_train[val])
+        with open(root / 'scaler.pkl', 'wb') as f :
+            pickle.dump(scaler, f)
+        done.touch()
+
+    load = lambda name : np.load(root / name, mmap_mode='r')
+    splits = [(load(f'fold{k}_tr_idx.npy'), load(f'fold{k}_val_idx.npy')) for k in range(n_splits)]
+    arrays = [(load(f'fold{k}_X_tr.npy'), load(f'fold{k}_X_val.npy')) for k in range(n_splits)]
+    X_test = load('X_test.npy') if (root / 'X_test.npy').exists() else None
+    return FoldData(load('X_train.npy'), load('y_train.npy'), X_test, scaler, splits, arrays, root)
+
+
+def oof_predict(make_model, folds, use_SMOTE=False, fit=None, predict=None) :
+    """최종 하이퍼파라미터로 fold마다 새 모델을 학습해 전체 학습 데이터의 OOF 확률을 만든다 (스태킹 입력용)
+
+    use_SMOTE면 최종 모델과 같게 fold 학습 구간에만 BorderlineSMOTE를 적용한다 (folds.resampled()).
+    fit(model, X_tr, y_tr, X_val, y_val) / predict(model, X) -> 양성 확률 로 학습/예측 방식을 바꿀 수 있다.
+    """
+    fit = fit or (lambda model, X_tr, y_tr, X_val, y_val : model.fit(X_tr, y_tr))
+    predict = predict or (lambda model, X : model.predict_proba(X)[:, 1])
+    oof_probs = np.zeros(len(folds.y_train))
+    for fold in (folds.resampled() if use_SMOTE else folds) :
+        model = make_model()
+        fit(model, fold.X_tr, fold.y_tr, fold.X_val, fold.y_val)
+        oof_probs[fold.val_idx] = np.asarray(predict(model, fold.X_val)).reshape(-1)
+    return oof_probs
+
+
+def build_folds(X_train, y_train, X_test=None, n_splits=5, random_state=42, cache_dir=CACHE_DIR) :
+    """StandardScaler(학습 데이터 기준) 적합 + StratifiedKFold 분할을 한 번 수행
+
+    데이터셋·피처셋별로 한 번 만들어 모든 trial과 러너가 공유한다 (러너는 folds를 받지 못했을 때만 직접 부른다).
+    cache_dir이 있으면 입력 데이터 지문으로 캐시를 찾아 재사용하고, None이면 메모리에만 만든다.
+    """
+    X_train = np.asarray(X_train, dtype=np.float64)
+    y_train = np.asarray(y_train).astype(np.int32)
+    X_test = None if X_test is None else np.asarray(X_test, dtype=np.float64)
+    root = None
+    if cache_dir :
+        root = Path(cache_dir) / fingerprint(X_train, y_train, X_test, n_splits=n_splits, random_state=random_state)
+        if (root / 'DONE').exists() :
+            with open(root / 'scaler.pkl', 'rb') as f :
+                scaler = pickle.load(f)
+            return _build(None, None, None, scaler, n_splits, random_state, root)
+
+    scaler = StandardScaler()
+    X_tr_scaled = scaler.fit_transform(X_train).astype(np.float32)
+    X_te_scaled = None if X_test is None else scaler.transform(X_test).astype(np.float32)
+    return _build(X_tr_scaled, y_train, X_te_scaled, scaler, n_splits, random_state, root)
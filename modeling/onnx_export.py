@@ -0,0 +1,191 @@
+"""등록된 아티팩트(LR/RF/XGBoost/CatBoost)를 StandardScaler가 포함된 ONNX 그래프로 변환
+
+    python onnx_export.py export 상장-elasticnet-XGBoost-raw
+    python onnx_export.py compare 상장-elasticnet-XGBoost-raw --rows 1000 --output onnx_bench.json
+
+export는 아티팩트 버전 디렉터리에 model.onnx를 추가하고 meta.json의 files['onnx']와 parity 결과를 기록한다.
+그래프 입력은 원본 피처(float64, feature_cols 순서)이고 출력 'probabilities'는 (n, 2) 텐서다.
+서빙 쪽은 registry.load_artifact(..., runtime='onnx')로 onnxruntime만 import해서 예측한다.
+LSTM/TabNet은 변환 대상이 아니다.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from registry import ARTIFACT_DIR, ONNX_FILE, Artifact, OnnxArtifact, load_artifact, resolve
+
+OPSET = 15
+ML_OPSET = 3
+INPUT_NAME = 'float_input'
+
+
+def _model_to_onnx(model_type, model, n_features) :
+    if model_type in ('LR', 'RF') :
+        from skl2onnx import convert_sklearn
+        from skl2onnx.common.data_types import FloatTensorType
+        return convert_sklearn(model, initial_types=[('features', FloatTensorType([None, n_features]))],
+                               options={id(model) : {'zipmap' : False}},
+                               target_opset={'' : OPSET, 'ai.onnx.ml' : ML_OPSET})
+    if model_type == 'XGBoost' :
+        from onnxmltools import convert_xgboost
+        from onnxmltools.convert.common.data_types import FloatTensorType
+        return convert_xgboost(model, initial_types=[('features', FloatTensorType([None, n_features]))],
+                               target_opset=OPSET)
+    if model_type == 'CatBoost' :
+        import onnx
+        with tempfile.TemporaryDirectory() as tmp :
+            path = os.path.join(tmp, 'model.onnx')
+            model.save_model(path, format='onnx')
+            return onnx.load(path)
+    raise ValueError(f"ONNX 변환을 지원하지 않는 모델 : {model_type}")
+
+
+def _strip_zipmap(proto) :
+    # ZipMap(seq(map)) 출력은 행마다 dict를 만들어 느리므로 Identity로 바꿔 (n, 2) 텐서를 그대로 내보낸다
+    from onnx import TensorProto, helper
+    graph = proto.graph
+    for index, node in enumerate(graph.node) :
+        if node.op_type != 'ZipMap' :
+            continue
+        graph.node.remove(node)
+        graph.node.insert(index, helper.make_node('Identity', [node.input[0]], [node.output[0]], name='ZipMapIdentity'))
+        for i, output in enumerate(graph.output) :
+            if output.name == node.output[0] :
+                graph.output.remove(output)
+                graph.output.insert(i, helper.make_tensor_value_info(node.output[0], TensorProto.FLOAT, [None, 2]))
+    return proto
+
+
+def _prepend_scaler(proto, scaler, n_features) :
+    """float64 입력에 (x - mean) / scale 후 float32 Cast 노드를 그래프 앞에 붙인다
+
+    Artifact.transform과 같은 순서/정밀도(float64 스케일링 -> float32)라 트리 분기 경계에서도 결과가 같다.
+    """
+    from onnx import TensorProto, helper, numpy_helper
+    graph = proto.graph
+    old_input = graph.input[0].name
+    mean = scaler.mean_ if getattr(scaler, 'mean_', None) is not None else np.zeros(n_features)
+    scale = scaler.scale_ if getattr(scaler, 'scale_', None) is not None else np.ones(n_features)
+    graph.initializer.extend([numpy_helper.from_array(mean.astype(np.float64), 'scaler_mean'),
+                              numpy_helper.from_array(scale.astype(np.float64), 'scaler_scale')])
+    for node in graph.node :
+        for i, name in enumerate(node.input) :
+            if name == old_input :
+                node.input[i] = 'scaled_input'
+    nodes = [helper.make_node('Sub', [INPUT_NAME, 'scaler_mean'], ['centered_input'], name='ScalerSub'),
+             helper.make_node('Div', ['centered_input', 'scaler_scale'], ['scaled_input64'], name='ScalerDiv'),
+             helper.make_node('Cast', ['scaled_input64'], ['scaled_input'], to=TensorProto.FLOAT, name='ScalerCast')]
+    for node in reversed(nodes) :
+        graph.node.insert(0, node)
+    graph.input.remove(graph.input[0])
+    graph.input.insert(0, helper.make_tensor_value_info(INPUT_NAME, TensorProto.DOUBLE, [None, n_features]))
+    # CatBoost/XGBoost 그래프는 ai.onnx.ml 도메인만 선언하므로 기본 도메인을 추가
+    if not any(op.domain in ('', 'ai.onnx') for op in proto.opset_import) :
+        proto.opset_import.append(helper.make_opsetid('', OPSET))
+    proto.ir_version = max(proto.ir_version, 8)
+    return proto
+
+
+def _sample(scaler, n_features, rows, seed=0) :
+    # 학습 데이터 없이도 parity를 확인할 수 있도록 스케일러 분포를 따르는 입력을 만든다
+    rng = np.random.default_rng(seed)
+    mean = scaler.mean_ if getattr(scaler, 'mean_', None) is not None else np.zeros(n_features)
+    scale = scaler.scale_ if getattr(scaler, 'scale_', None) is not None else np.ones(n_features)
+    return rng.standard_normal((rows, n_features)) * scale + mean
+
+
+def export_onnx(name_or_path, version='latest', root=ARTIFACT_DIR, parity_rows=2000, atol=1e-4) :
+    """model.onnx를 쓰고 native predict_proba와의 최대 절대 오차를 meta.json에 기록"""
+    import onnx
+    path = resolve(name_or_path, version, root)
+    artifact = Artifact(path)
+    model_type = artifact.meta['model_type']
+    n_features = len(artifact.feature_cols)
+    proto = _model_to_onnx(model_type, artifact.model, n_features)
+    proto = _prepend_scaler(_strip_zipmap(proto), artifact.scaler, n_features)
+    onnx.checker.check_model(proto)
+    onnx.save(proto, str(path / ONNX_FILE))
+
+    X = _sample(artifact.scaler, n_features, parity_rows)
+    diff = float(np.max(np.abs(OnnxArtifact(path).predict_proba(X) - artifact.predict_proba(X))))
+    if diff > atol :
+        os.remove(path / ONNX_FILE)
+        raise ValueError(f"ONNX 예측이 원본과 다릅니다 (max abs diff={diff:.2e} > {atol})")
+
+    meta = dict(artifact.meta)
+    meta['files'] = {**meta['files'], 'onnx' : ONNX_FILE}
+    meta['onnx'] = {'opset' : OPSET, 'parity_rows' : parity_rows, 'parity_max_abs_diff' : diff}
+    with open(path / 'meta.json', 'w', encoding='utf-8') as f :
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return path / ONNX_FILE
+
+
+def _latency_ms(predict, X, repeats) :
+    predict(X)  # 워밍업
+    times = []
+    for _ in range(repeats) :
+        started = time.perf_counter()
+        predict(X)
+        times.append((time.perf_counter() - started) * 1000)
+    return round(float(np.median(times)), 3)
+
+
+_FOOTPRINT = '''
+import json, resource, sys, time
+sys.path.insert(0, {modeling!r})
+started = time.perf_counter()
+from registry import load_artifact
+artifact = load_artifact({path!r}, runtime={runtime!r}).load()
+artifact.predict_proba([[0.0] * len(artifact.feature_cols)])
+print(json.dumps({{"load_sec" : round(time.perf_counter() - started, 3),
+                  "max_rss_mb" : round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+                  "modules" : len(sys.modules)}}))
+'''
+
+
+def _footprint(path, runtime) :
+    # import/로드 비용은 새 프로세스에서 재야 이미 import된 라이브러리에 가려지지 않는다
+    code = _FOOTPRINT.format(modeling=os.path.dirname(os.path.abspath(__file__)), path=str(path), runtime=runtime)
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def compare(name_or_path, version='latest', root=ARTIFACT_DIR, rows=1000, repeats=50) :
+    """native vs onnxruntime : 배치 1행/rows행 지연시간(ms, 중앙값)과 새 프로세스 기준 로드 시간·최대 RSS"""
+    path = resolve(name_or_path, version, root)
+    report = {'artifact' : str(path), 'rows' : rows, 'repeats' : repeats}
+    native = Artifact(path)
+    X = _sample(native.scaler, len(native.feature_cols), rows)
+    for runtime in ('native', 'onnx') :
+        artifact = load_artifact(path, runtime=runtime).load()
+        report[runtime] = {'latency_ms_1' : _latency_ms(artifact.predict_proba, X[:1], repeats),
+                           f'latency_ms_{rows}' : _latency_ms(artifact.predict_proba, X, repeats),
+                           **_footprint(path, runtime)}
+    return report
+
+
+if __name__ == '__main__' :
+    ap = argparse.ArgumentParser(description="아티팩트 ONNX 변환 / native 대비 성능 비교")
+    ap.add_argument('command', choices=['export', 'compare'])
+    ap.add_argument('artifact', help="artifacts 아래 이름 또는 버전 디렉터리 경로")
+    ap.add_argument('--version', default='latest')
+    ap.add_argument('--root', default=ARTIFACT_DIR)
+    ap.add_argument('--rows', type=int, default=1000)
+    ap.add_argument('--repeats', type=int, default=50)
+    ap.add_argument('--output')
+    args = ap.parse_args()
+    if args.command == 'export' :
+        print(f"ONNX 저장 : {export_onnx(args.artifact, args.version, args.root)}")
+    else :
+        text = json.dumps(compare(args.artifact, args.version, args.root, args.rows, args.repeats),
+                          ensure_ascii=False, indent=2)
+        if args.output :
+            with open(args.output, 'w', encoding='utf-8') as f :
+                f.write(text + '\n')
+        print(text)
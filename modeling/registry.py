@@ -0,0 +1,286 @@
+"""학습된 모델 아티팩트 저장소
+
+최종 모델, StandardScaler, 피처 목록, threshold, 지표, 데이터 지문을 버전 디렉터리 하나로 저장한다.
+
+    artifacts/<이름>/v0001/
+        meta.json        # 모델 종류, 피처, threshold, best_params/search_params, 지표, 데이터 지문, 파일 목록
+        scaler.joblib
+        model.<ext>      # LR/RF : joblib, XGBoost : .ubj, CatBoost : .cbm, LSTM : .keras, TabNet : .zip
+    artifacts/<이름>/LATEST
+
+load_artifact는 meta.json만 읽고 모델/스케일러는 처음 쓸 때 불러온다(같은 경로는 프로세스당 한 번).
+onnx_export.py로 model.onnx(스케일러 포함)를 만들어 두면 runtime='onnx'|'auto'로 onnxruntime만으로 예측한다.
+"""
+import json
+import os
+from datetime import datetime, timezone
+from functools import cached_property, lru_cache
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+ARTIFACT_DIR = os.getenv('ARTIFACT_DIR', 'artifacts')
+
+MODEL_FILES = {
+    'LR' : 'model.joblib',
+    'RF' : 'model.joblib',
+    'XGBoost' : 'model.ubj',
+    'CatBoost' : 'model.cbm',
+    'LSTM' : 'model.keras',
+    'TabNet' : 'model.zip',
+    'Ensemble' : 'ensemble',  # 디렉터리 : 멤버 모델 파일들 + ensemble.joblib(결합기)
+}
+ONNX_FILE = 'model.onnx'
+
+
+def _needs_history(model_type, model) :
+    """시퀀스 LSTM(입력 : 윈도우, mask)은 같은 기업의 이전 연도 행이 있어야 학습 때와 같은 입력이 된다"""
+    if model_type == 'Ensemble' :
+        return any(_needs_history(t, m) for t, m in model.members)
+    return model_type == 'LSTM' and len(model.inputs) == 2
+
+
+def _member_proba(model_type, model, X, groups=None, years=None) :
+    if model_type == 'LSTM' :
+        if len(model.inputs) == 2 :
+            if groups is None or years is None :
+                raise ValueError("시퀀스 LSTM은 기업-연도 이력이 필요합니다 : predict_proba(X, groups=기업코드, years=연도)")
+            try :
+                from sequences import build_sequences
+            except ImportError :  # 프로젝트 루트에서 modeling.registry로 불러온 경우 (etl, 서빙)
+                from modeling.sequences import build_sequences
+            # 학습과 같은 윈도우 : X 안의 같은 기업 직전 lookback년 행 (없는 연도는 mask=False)
+            windows, mask = build_sequences(X, groups, years, lookback=model.inputs[0].shape[1]).windows()
+            return model.predict([windows, mask], verbose=0).reshape(-1)
+        return model.predict(X[:, None, :], verbose=0).reshape(-1)
+    return model.predict_proba(X)[:, 1]
+
+
+class EnsembleModel :
+    """멤버 모델의 양성 확률을 스태킹(logit 입력 LogisticRegression) 또는 평균(블렌딩)으로 결합"""
+
+    def __init__(self, members, combiner=None, weights=None) :
+        self.members = members  # [(model_type, model), ...] - 모두 같은 스케일러 출력을 입력으로 받는다
+        self.combiner = combiner
+        self.weights = weights
+
+    @staticmethod
+    def stack_features(probs) :
+        probs = np.clip(probs, 1e-6, 1 - 1e-6)
+        return np.log(probs / (1 - probs))
+
+    def combine(self, probs) :
+        """(n, 멤버 수) 확률 행렬 -> (n,) 앙상블 확률"""
+        if self.combiner is not None :
+            return self.combiner.predict_proba(self.stack_features(probs))[:, 1]
+        return np.average(probs, axis=1, weights=self.weights)
+
+    def member_probs(self, X, groups=None, years=None) :
+        return np.column_stack([_member_proba(t, m, X, groups, years) for t, m in self.members])
+
+    def predict_proba(self, X, groups=None, years=None) :
+        p = self.combine(self.member_probs(X, groups, years))
+        return np.column_stack([1 - p, p])
+
+
+def _save_model(model_type, model, path) :
+    if model_type == 'Ensemble' :
+        path.mkdir()
+        files = []
+        for i, (member_type, member) in enumerate(model.members) :
+            name = f"{i}_{member_type}_{MODEL_FILES[member_type]}"
+            _save_model(member_type, member, path / name)
+            files.append((member_type, name))
+        joblib.dump({'members' : files, 'combiner' : model.combiner, 'weights' : model.weights},
+                    path / 'ensemble.joblib')
+    elif model_type == 'XGBoost' :
+        model.save_model(path)
+    elif model_type == 'CatBoost' :
+        model.save_model(str(path), format='cbm')
+    elif model_type == 'LSTM' :
+        model.save(path)
+    elif model_type == 'TabNet' :
+        model.save_model(str(path.with_suffix('')))  # TabNet은 .zip을 스스로 붙인다
+    else :
+        joblib.dump(model, path)
+
+
+def _load_model(model_type, path) :
+    if model_type == 'Ensemble' :
+        spec = joblib.load(path / 'ensemble.joblib')
+        members = [(t, _load_model(t, path / name)) for t, name in spec['members']]
+        return EnsembleModel(members, spec['combiner'], spec['weights'])
+    if model_type == 'XGBoost' :
+        import xgboost as xgb
+        model = xgb.XGBClassifier()
+        model.load_model(path)
+        return model
+    if model_type == 'CatBoost' :
+        from catboost import CatBoostClassifier
+        return CatBoostClassifier().load_model(str(path), format='cbm')
+    if model_type == 'LSTM' :
+        from tensorflow.keras.models import load_model
+        return load_model(path)
+    if model_type == 'TabNet' :
+        from pytorch_tabnet.tab_model import TabNetClassifier
+        model = TabNetClassifier()
+        model.load_model(str(path))
+        return model
+    return joblib.load(path)
+
+
+def _json_default(value) :
+    if isinstance(value, np.generic) :
+        return value.item()
+    if isinstance(value, np.ndarray) :
+        return value.tolist()
+    return str(value)
+
+
+def next_version(root) :
+    """root 아래에 다음 버전 디렉터리(v0001, v0002, ...)를 만들어 반환 (feature_selection.py도 사용)"""
+    # 동시에 여러 프로세스가 저장해도 mkdir이 원자적이라 버전이 겹치지 않는다
+    root.mkdir(parents=True, exist_ok=True)
+    existing = [int(p.name[1:]) for p in root.glob('v[0-9]*') if p.name[1:].isdigit()]
+    version = max(existing, default=0) + 1
+    while True :
+        path = root / f"v{version:04d}"
+        try :
+            path.mkdir()
+            return path
+        except FileExistsError :
+            version += 1
+
+
+def save_artifact(name, model_type, result, feature_cols, metrics=None, data_fingerprint=None,
+                  extra=None, root=ARTIFACT_DIR) :
+    """러너 결과(result['model'], result['scaler'])를 새 버전으로 저장하고 경로를 반환"""
+    if model_type not in MODEL_FILES :
+        raise ValueError(f"알 수 없는 모델 종류 : {model_type}")
+    path = next_version(Path(root) / name)
+    model_file = MODEL_FILES[model_type]
+    _save_model(model_type, result['model'], path / model_file)
+    joblib.dump(result['scaler'], path / 'scaler.joblib')
+    meta = {
+        'name' : name,
+        'version' : path.name,
+        'model_type' : model_type,
+        'created_at' : datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'feature_cols' : list(feature_cols),
+        'threshold' : float(result['best_thr']),
+        'best_params' : result.get('best_params'),
+        'search_params' : result.get('search_params'),  # warm start prior (study.py) : 탐색 공간 안의 best trial 파라미터
+        'metrics' : {k : v for k, v in (metrics or {}).items() if k not in ('best_params', 'best_thr')},
+        'data_fingerprint' : data_fingerprint,
+        'files' : {'model' : model_file, 'scaler' : 'scaler.joblib'},
+        **(extra or {}),
+    }
+    with open(path / 'meta.json', 'w', encoding='utf-8') as f :
+        json.dump(meta, f, ensure_ascii=False, indent=2, default=_json_default)
+    (path.parent / 'LATEST').write_text(path.name, encoding='utf-8')
+    return path
+
+
+def resolve(name_or_path, version='latest', root=ARTIFACT_DIR) :
+    path = Path(name_or_path)
+    if (path / 'meta.json').exists() :
+        return path.resolve()
+    base = path if path.is_dir() else Path(root) / name_or_path
+    if version == 'latest' :
+        version = (base / 'LATEST').read_text(encoding='utf-8').strip()
+    return (base / version).resolve()
+
+
+class Artifact :
+    def __init__(self, path) :
+        self.path = Path(path)
+        with open(self.path / 'meta.json', encoding='utf-8') as f :
+            self.meta = json.load(f)
+
+    @property
+    def feature_cols(self) :
+        return self.meta['feature_cols']
+
+    @property
+    def threshold(self) :
+        return self.meta['threshold']
+
+    @cached_property
+    def scaler(self) :
+        return joblib.load(self.path / self.meta['files']['scaler'])
+
+    @cached_property
+    def model(self) :
+        return _load_model(self.meta['model_type'], self.path / self.meta['files']['model'])
+
+    def load(self) :
+        """모델/스케일러를 미리 불러온다 (서빙 프로세스 시작 시 첫 요청 지연 방지)"""
+        self.scaler, self.model
+        return self
+
+    def transform(self, X) :
+        """원본 피처(DataFrame이면 feature_cols 순서로 선택) -> 스케일링된 float32 배열"""
+        if hasattr(X, 'loc') :
+            X = X.loc[:, self.feature_cols]
+        return self.scaler.transform(np.asarray(X, dtype=np.float64)).astype(np.float32)
+
+    @property
+    def needs_history(self) :
+        """True면 predict_proba에 groups/years(같은 기업의 이전 연도 행 포함)를 넘겨야 한다 (행 단위 서빙 불가)"""
+        return _needs_history(self.meta['model_type'], self.model)
+
+    def predict_proba(self, X, groups=None, years=None) :
+        """groups/years : 각 행의 기업 코드와 연도. 시퀀스 LSTM(또는 이를 포함한 앙상블)만 사용한다"""
+        X = self.transform(X)
+        return _member_proba(self.meta['model_type'], self.model, X, groups, years)
+
+    def predict(self, X) :
+        return (self.predict_proba(X) >= self.threshold).astype(int)
+
+
+class OnnxArtifact(Artifact) :
+    """model.onnx(StandardScaler 포함) + onnxruntime. sklearn/xgboost/catboost를 import하지 않는다"""
+
+    @cached_property
+    def model(self) :
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = int(os.getenv('ONNX_THREADS', '1'))
+        return ort.InferenceSession(str(self.path / self.meta['files'].get('onnx', ONNX_FILE)), options,
+                                    providers=['CPUExecutionProvider'])
+
+    def load(self) :
+        self.model
+        return self
+
+    def transform(self, X) :
+        if hasattr(X, 'loc') :
+            X = X.loc[:, self.feature_cols]
+        return np.asarray(X, dtype=np.float64)  # 스케일링은 그래프 안에서 float64로 수행
+
+    needs_history = False  # onnx_export는 LR/RF/XGBoost/CatBoost만 내보낸다
+
+    def predict_proba(self, X, groups=None, years=None) :
+        session = self.model
+        probs = session.run(['probabilities'], {session.get_inputs()[0].name : self.transform(X)})[0]
+        return probs[:, 1]
+
+
+@lru_cache(maxsize=16)
+def _load(path, runtime) :
+    if runtime == 'auto' :
+        with open(path / 'meta.json', encoding='utf-8') as f :
+            runtime = 'onnx' if 'onnx' in json.load(f)['files'] else 'native'
+    return OnnxArtifact(path) if runtime == 'onnx' else Artifact(path)
+
+
+def load_artifact(name_or_path, version='latest', root=ARTIFACT_DIR, runtime='native') :
+    """runtime : 'native'(원래 라이브러리), 'onnx'(onnxruntime), 'auto'(model.onnx가 있으면 onnx)"""
+    if runtime not in ('native', 'onnx', 'auto') :
+        raise ValueError(f"알 수 없는 runtime : {runtime}")
+    return _load(resolve(name_or_path, version, root), runtime)
+
+
+def list_artifacts(root=ARTIFACT_DIR) :
+    return sorted(str(p.parent.relative_to(root)) for p in Path(root).glob('**/meta.json'))
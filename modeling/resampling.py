@@ -0,0 +1,58 @@
+"""BorderlineSMOTE 리샘플링 단계 (디스크 캐시 + 병렬 최근접 이웃 탐색)
+
+같은 데이터에 같은 sampler 파라미터면 결과가 항상 같으므로, (데이터 지문, 파라미터) 키로 결과를 .npy로
+저장해 두고 이후 모델/실험은 mmap으로 연다. 이웃 탐색은 NearestNeighbors(n_jobs=SMOTE_N_JOBS)로 병렬 실행하며
+기존 BorderlineSMOTE(random_state=42, kind="borderline-1")와 같은 표본을 만든다.
+
+    X_res, y_res = resample(folds.X_train, folds.y_train)   # 최종 모델 학습용
+    for fold in folds.resampled() : ...                     # fold 학습 구간에만 SMOTE (검증 구간은 원본)
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+
+from folds import Fold, fingerprint, save_array
+
+CACHE_DIR = os.getenv('SMOTE_CACHE_DIR', 'cache/smote')
+N_JOBS = int(os.getenv('SMOTE_N_JOBS', '-1'))
+SMOTE_PARAMS = {'kind' : 'borderline-1', 'k_neighbors' : 5, 'm_neighbors' : 10, 'random_state' : 42}
+
+
+def _sampler(kind, k_neighbors, m_neighbors, random_state, n_jobs) :
+    from imblearn.over_sampling import BorderlineSMOTE
+    from sklearn.neighbors import NearestNeighbors
+    # 정수 대신 추정기를 넘겨야 n_jobs를 줄 수 있다 (정수 k -> n_neighbors=k+1과 동일)
+    return BorderlineSMOTE(kind=kind, random_state=random_state,
+                           k_neighbors=NearestNeighbors(n_neighbors=k_neighbors + 1, n_jobs=n_jobs),
+                           m_neighbors=NearestNeighbors(n_neighbors=m_neighbors + 1, n_jobs=n_jobs))
+
+
+def resample(X, y, cache_dir=CACHE_DIR, n_jobs=N_JOBS, **params) :
+    """BorderlineSMOTE 결과 (X_res, y_res)
+
+    같은 데이터·파라미터면 러너/실험이 달라도 디스크 캐시를 mmap으로 재사용한다. cache_dir이 None이면 매번 계산.
+    """
+    params = {**SMOTE_PARAMS, **params}
+    X = np.asarray(X)
+    y = np.asarray(y)
+    root = None
+    if cache_dir :
+        root = Path(cache_dir) / fingerprint(X, y, **params)
+        if (root / 'DONE').exists() :
+            return np.load(root / 'X.npy', mmap_mode='r'), np.load(root / 'y.npy', mmap_mode='r')
+
+    X_res, y_res = _sampler(n_jobs=n_jobs, **params).fit_resample(X, y)
+    X_res, y_res = X_res.astype(X.dtype, copy=False), y_res.astype(y.dtype, copy=False)
+    if root is not None :
+        root.mkdir(parents=True, exist_ok=True)
+        save_array(root / 'X.npy', X_res)
+        save_array(root / 'y.npy', y_res)
+        (root / 'DONE').touch()
+    return X_res, y_res
+
+
+def resample_fold(fold, **kwargs) :
+    """fold 학습 구간만 리샘플링한 Fold (검증 구간과 인덱스는 그대로)"""
+    X_tr, y_tr = resample(fold.X_tr, fold.y_tr, **kwargs)
+    return Fold(fold.k, fold.tr_idx, fold.val_idx, X_tr, fold.X_val, y_tr, fold.y_val)
@@ -1,13 +1,125 @@
+"""test 지표 + bootstrap 신뢰구간 + 실험 로그
+
+- bootstrap은 B개 표본을 (B, n) 복원추출 횟수 행렬 하나로 표현해 한 번에 계산한다.
+  precision/recall/F1은 가중치 행렬 x 0/1 벡터 곱, ROC-AUC/PR-AUC는 확률값 그룹별 누적 가중치로 구한다.
+  메모리는 BOOTSTRAP_CHUNK 원소 단위로 나눠 처리한다.
+- 결과는 EXPERIMENT_LOG(기본 results/experiments.db, 빈 값이면 끔) SQLite 테이블 experiments에 한 행씩 누적된다.
+
+환경변수 : BOOTSTRAP_N (기본 2000, 0이면 구간 생략), BOOTSTRAP_CHUNK, EXPERIMENT_LOG
+"""
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
 from sklearn.metrics import (
-    average_precision_score, 
-    accuracy_score, 
-    f1_score, 
-    recall_score, 
-    precision_score, 
+    average_precision_score,
+    accuracy_score,
+    f1_score,
+    recall_score,
+    precision_score,
     roc_auc_score
 )
 
-def model_result(result, y_test):
+N_BOOT = int(os.getenv('BOOTSTRAP_N', '2000'))
+CHUNK = int(os.getenv('BOOTSTRAP_CHUNK', str(2 ** 22)))
+EXPERIMENT_LOG = os.getenv('EXPERIMENT_LOG', 'results/experiments.db')
+METRICS = ['accuracy', 'precision', 'recall', 'f1', 'roc_auc', 'pr_auc']
+PHASES = ['tune', 'fit', 'predict']
+
+
+def _divide(a, b):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(b > 0, a / b, np.nan)
+
+
+def _ranking_metrics(weights, y_sorted, starts):
+    """확률 오름차순으로 정렬된 가중치 행렬의 행별 ROC-AUC, average precision (sklearn과 같은 동점 처리)"""
+    pos = np.add.reduceat(weights * y_sorted, starts, axis=1)
+    neg = np.add.reduceat(weights, starts, axis=1) - pos
+    n_pos, n_neg = pos.sum(axis=1), neg.sum(axis=1)
+    # ROC-AUC : 양성마다 (더 낮은 음성 수 + 동점 음성 수 / 2)
+    below = np.cumsum(neg, axis=1) - neg
+    roc_auc = _divide((pos * (below + neg / 2)).sum(axis=1), n_pos * n_neg)
+    # AP : 높은 확률부터 threshold를 내리며 sum(recall 증가분 x precision)
+    tp = np.cumsum(pos[:, ::-1], axis=1)
+    fp = np.cumsum(neg[:, ::-1], axis=1)
+    precision = _divide(tp, tp + fp)
+    pr_auc = _divide(np.nansum(pos[:, ::-1] * precision, axis=1), n_pos)
+    return roc_auc, pr_auc
+
+
+def bootstrap_metrics(y_true, y_prob, y_pred, n_boot=N_BOOT, seed=42, chunk=CHUNK):
+    """{지표 : (n_boot,) bootstrap 값}. 한 클래스만 뽑힌 표본의 AUC 등은 NaN"""
+    # 표본 순서는 결과에 영향이 없으므로 처음부터 확률 오름차순으로 두고 그 위치를 뽑는다
+    order = np.argsort(np.asarray(y_prob, dtype=np.float64), kind='stable')
+    p_sorted = np.asarray(y_prob, dtype=np.float64)[order]
+    y_true = np.asarray(y_true, dtype=np.float64)[order]
+    y_pred = np.asarray(y_pred, dtype=np.float64)[order]
+    n = len(y_true)
+    starts = np.flatnonzero(np.r_[True, p_sorted[1:] != p_sorted[:-1]])
+    hit = y_true * y_pred
+
+    rng = np.random.default_rng(seed)
+    rows = max(1, chunk // max(n, 1))
+    out = {m : [] for m in METRICS}
+    for done in range(0, n_boot, rows):
+        m = min(rows, n_boot - done)
+        # 행마다 n개 복원추출 -> 표본별 뽑힌 횟수 (B, n) 가중치 행렬
+        idx = rng.integers(0, n, size=(m, n)) + np.arange(m)[:, None] * n
+        weights = np.bincount(idx.ravel(), minlength=m * n).reshape(m, n).astype(np.float64)
+        tp, n_pos, n_pred = weights @ hit, weights @ y_true, weights @ y_pred
+        precision, recall = _divide(tp, n_pred), _divide(tp, n_pos)
+        out['accuracy'].append((n - n_pos - n_pred + 2 * tp) / n)
+        out['precision'].append(precision)
+        out['recall'].append(recall)
+        out['f1'].append(_divide(2 * tp, n_pos + n_pred))
+        roc_auc, pr_auc = _ranking_metrics(weights, y_true, starts)
+        out['roc_auc'].append(roc_auc)
+        out['pr_auc'].append(pr_auc)
+    return {m : np.concatenate(v) for m, v in out.items()}
+
+
+def confidence_intervals(y_true, y_prob, y_pred, n_boot=N_BOOT, alpha=0.05, seed=42):
+    """{지표 : [하한, 상한]} percentile bootstrap 구간"""
+    boots = bootstrap_metrics(y_true, y_prob, y_pred, n_boot, seed)
+    q = [100 * alpha / 2, 100 * (1 - alpha / 2)]
+    return {m : [round(float(v), 6) for v in np.nanpercentile(values, q)] for m, values in boots.items()}
+
+
+def log_experiment(metrics, context=None, path=EXPERIMENT_LOG):
+    """실험 로그 SQLite에 한 행 추가. path가 비어 있으면 아무것도 하지 않는다"""
+    if not path:
+        return None
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    context = context or {}
+    timing = metrics.get('timing') or {}
+    row = {'created_at' : datetime.now(timezone.utc).isoformat(timespec='seconds'),
+           **{k : context.get(k) for k in ('data', 'features', 'smote', 'model', 'study_name', 'cutoff')},
+           'n_test' : metrics['n_test'], 'n_pos' : metrics['n_pos'], 'best_thr' : float(metrics['best_thr']),
+           'best_params' : json.dumps(metrics['best_params'], ensure_ascii=False, default=str),
+           **{m : float(metrics[m]) for m in METRICS},
+           **{f"{m}_{side}" : metrics['ci'][m][i] if metrics.get('ci') else None
+              for m in METRICS for i, side in enumerate(('lo', 'hi'))},
+           'n_boot' : metrics['n_boot'],
+           **{f"{p}_sec" : timing.get(p) for p in PHASES},
+           'context' : json.dumps(context, ensure_ascii=False, default=str)}
+    columns = ', '.join(f'"{k}"' for k in row)
+    with sqlite3.connect(path, timeout=60) as conn:
+        # sweep/backtest의 여러 프로세스가 같은 파일에 쓴다
+        conn.execute(f"CREATE TABLE IF NOT EXISTS experiments (id INTEGER PRIMARY KEY AUTOINCREMENT, {columns})")
+        conn.execute(f"INSERT INTO experiments ({columns}) VALUES ({', '.join('?' * len(row))})", list(row.values()))
+    return path
+
+
+def model_result(result, y_test, context=None, n_boot=N_BOOT, log_path=EXPERIMENT_LOG):
+    """test 지표와 bootstrap 95% 신뢰구간을 출력하고 dict로 반환 (실험 로그에도 기록)
+
+    context : 실험 로그에 함께 남길 {'data', 'features', 'smote', 'model', 'study_name', 'cutoff', ...}
+    result['timing'] : run.run_model이 채우는 구간별 소요 시간 (study.phase)
+    """
 
     y_prob = result['y_prob']
     y_pred = result['y_pred']
@@ -20,14 +132,31 @@ def model_result(result, y_test):
     precision = precision_score(y_test, y_pred)
     recall = recall_score(y_test, y_pred)
     f1 = f1_score(y_test, y_pred)
+    ci = confidence_intervals(y_test, y_prob, y_pred, n_boot) if n_boot else None
+
+    metrics = {
+        'best_params' : best_params,
+        'best_thr' : best_thr,
+        'accuracy' : accuracy,
+        'precision' : precision,
+        'recall' : recall,
+        'f1' : f1,
+        'roc_auc' : roc_auc,
+        'pr_auc' : pr_auc,
+        'ci' : ci,
+        'n_boot' : n_boot,
+        'n_test' : int(len(y_test)),
+        'n_pos' : int(np.sum(y_test)),
+        'timing' : result.get('timing'),
+    }
 
     print("===best params===")
     print(f"best params : {best_params}")
     print(f"best threshold : {best_thr}")
-    print("===test result===")
-    print(f"accuracy : {accuracy}")
-    print(f"precision : {precision}")
-    print(f"recall : {recall}")
-    print(f"f1 score : {f1}")
-    print(f"roc_auc : {roc_auc}")
-    print(f"pr_auc : {pr_auc}")
+    print(f"===test result=== (n={metrics['n_test']}, 양성 {metrics['n_pos']})")
+    for name, label in zip(METRICS, ['accuracy', 'precision', 'recall', 'f1 score', 'roc_auc', 'pr_auc']):
+        interval = f" (95% CI {ci[name][0]:.4f} ~ {ci[name][1]:.4f})" if ci else ""
+        print(f"{label} : {metrics[name]}{interval}")
+
+    log_experiment(metrics, context, log_path)
+    return metrics
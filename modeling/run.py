@@ -1,182 +1,153 @@
-import pandas as pd
+import argparse
+import importlib
 import warnings
 from result import model_result
+import study as study_module
+from study import PHASES, make_study_name
+from folds import build_folds, fingerprint
+from dataset import DATASETS, CUTOFF, FEATURE_ALIASES, FEATURE_SETS, feature_set_name, feature_set_tag, load_split
 
 warnings.filterwarnings('ignore')
 
-# 데이터 선택
-data_select = input("데이터를 선택하세요(상장/비상장/ALL) : ")
-data_select = data_select.upper()
+FEATURE_LABELS = {'elasticnet' : 'Elastic Net', 'pca' : 'PCA'}
 
-if data_select in ['상장', '비상장', 'ALL'] :
-    df = pd.read_csv(f'data/{data_select}.csv')
-else :
-    raise ValueError ("데이터를 잘못 선택했습니다.")
+# 모델 번호 -> (표시 이름, 모듈, 실행 함수)
+MODELS = {
+    '1' : ('로지스틱회귀모형', 'LR', 'LR_run'),
+    '2' : ('RandomForest', 'RF', 'RF_run'),
+    '3' : ('CatBoost', 'CatBoost', 'Cat_run'),
+    '4' : ('XGBoost', 'XGBoost', 'xg_run'),
+    '5' : ('LSTM', 'LSTM', 'lstm_run'),
+    '6' : ('TabNet', 'TabNet', 'tabnet_run'),
+}
 
-feature_selection = input(
-    """피처 셀렉션 방법을 선택하세요.
-    1: Elastic Net
-    2: PCA
-    """
-)
-if feature_selection == '1' :
-    print("피처 셀렉션 방법 : Elastic Net")
-    if data_select == '상장' :
-        feature_cols = [
-            'ROA',
-            '영업이익률',
-            '부채 대비 영업활동으로 인한 현금흐름',
-            'LVGI',
-            '총자산회전율',
-            '부채 대비 재무활동으로 인한 현금흐름',
-            'TATA',
-            'PBR',
-            'Volume',
-            '매출총이익률',
-            '자기자본증가율',
-            'SGI',
-            '유형자산회전율',
-            '금융비용부담률',
-            '총자산증가율' 
-        ]
-    elif data_select == '비상장' :
-        feature_cols = [
-            'GMI',
-            'ROA',
-            'LVGI',
-            '총자산회전율',
-            '부채 대비 영업활동으로 인한 현금흐름',
-            '부채 대비 재무활동으로 인한 현금흐름',
-            '이익잉여금',
-            '금융비용부담률',
-            '영업외수익',
-            '투자활동으로 인한 현금흐름',
-            '이자보상배율',
-            '종업원',
-            '매출채권회전율',
-            '재고자산',
-            '매출채권'
-        ]
-    elif data_select == 'ALL' :
-        feature_cols = [
-            'GMI',
-            'ROA',
-            'LVGI',
-            '총자산회전율',
-            '부채 대비 영업활동으로 인한 현금흐름',
-            '부채 대비 재무활동으로 인한 현금흐름',
-            '이자보상배율',
-            '금융비용부담률',
-            '매출채권회전율',
-            '자본잉여금',
-            '유형자산회전율',
-            '감가상각비',
-            '유형자산증가율',
-            '기타포괄손익누계액'
-        ]
-
-elif feature_selection == '2' :
-    print("피처 셀렉션 방법 : PCA")    
-    if data_select == '상장' :        
-        feature_cols = ['감가상각비', 
-                        'Marcap', 
-                        '매출총이익률', 
-                        'LVGI', 
-                        'SGI', 
-                        'AQI', 
-                        '유동비율', 
-                        '부채 대비 영업활동으로 인한 현금흐름', 
-                        '총자산회전율', 
-                        '부채 대비 투자활동으로 인한 현금흐름', 
-                        '기타포괄손익누계액', 
-                        '장기차입금', 
-                        '재무활동으로 인한 현금흐름', 
-                        '종업원'
-                    ]
-    elif data_select == '비상장' :
-        feature_cols = ['매출채권회전율',
-                        '매출채권',
-                        '이자보상배율',
-                        '재무활동으로 인한 현금흐름',
-                        '영업활동으로 인한 현금흐름',
-                        '유형자산',
-                        '영업외비용',
-                        '이자비용',
-                        '자본금',
-                        '금융비용부담률',
-                        '재고자산',
-                        '종업원',
-                        '판매비와관리비',
-                        '감가상각비',
-                        '이익잉여금'
-                    ]
-    elif data_select == 'ALL' :
-        feature_cols = ['매출채권회전율',
-                        '금융비용부담률',
-                        '총자산회전율',
-                        '부채 대비 영업활동으로 인한 현금흐름',
-                        '유형자산회전율'
-                    ]
-else :
-    raise ValueError ("피처 셀렉션 방법을 잘못 선택했습니다.")
-
-X_train = df.loc[df['회계년도'] <= '2017/12', feature_cols]
-X_test = df.loc[df['회계년도'] > '2017/12', feature_cols]
-y_train = df.loc[df['회계년도'] <= '2017/12', 'label']
-y_test = df.loc[df['회계년도'] > '2017/12', 'label']
-
-# smote 사용 여부 선택
-use_smote = input("smote를 진행할까요?(Y/N) : ")
-use_smote = use_smote.upper()
-
-if use_smote == 'Y' :
-    print("smote를 진행합니다.")
-    use_SMOTE = True
-elif use_smote == 'N' :
-    print("smote를 진행하지 않습니다.")
-    use_SMOTE = False
-else :
-    print("선택이 잘못되었습니다. 기본적으로 smote 없이 진행합니다.")
-    use_SMOTE = False
-
-# 모델 선택
-model_select = input(
-    """
-        모델을 선택하세요.
-        1 : 로지스틱회귀모형 
-        2 : RandomForest
-        3 : CatBoost
-        4 : XGBoost
-        5 : LSTM 
-        6 : TabNet
+
+def run_model(model_select, X_train, y_train, X_test, use_SMOTE, **study_kwargs) :
+    if model_select not in MODELS :
+        raise ValueError ("숫자를 잘못 선택했습니다.")
+    name, module, func = MODELS[model_select]
+    print(f"모델 선택 : {name}")
+    runner = getattr(importlib.import_module(module), func)
+    # 구간별 소요 시간은 실행마다 새로 잰다 (result.py가 실험 로그에 기록)
+    PHASES.clear()
+    result = runner(X_train, y_train, X_test, use_SMOTE, **study_kwargs)
+    result['timing'] = {name : round(record['sec'], 3) for name, record in PHASES.items()}
+    return result
+
+
+def run_experiment(data_select, feature_selection, use_SMOTE, model_select, n_trials=None, n_workers=None,
+                   register=False, cutoff=None, smote_in_cv=False) :
+    """(데이터, 피처 셀렉션, SMOTE, 모델) 한 조합을 학습/평가하고 test 지표를 반환
+
+    smote_in_cv면 튜닝 fold의 학습 구간에도 SMOTE를 적용한다 (스터디 이름에 -smotecv가 붙는 별도 스터디).
     """
-)
-
-if model_select == '1' :
-    print("모델 선택 : 로지스틱회귀모형")
-    from LR import LR_run
-    result = LR_run(X_train, y_train, X_test, use_SMOTE)
-elif model_select == '2' :
-    print("모델 선택 : RandomForest")
-    from RF import RF_run
-    result = RF_run(X_train, y_train, X_test, use_SMOTE)
-elif model_select == '3' :
-    print("모델 선택 : CatBoost")
-    from CatBoost import Cat_run
-    result = Cat_run(X_train, y_train, X_test, use_SMOTE)
-elif model_select == '4' :
-    print("모델 선택 : XGBoost")
-    from XGBoost import xg_run
-    result = xg_run(X_train, y_train, X_test, use_SMOTE)
-elif model_select == '5' :
-    print("모델 선택 : LSTM")
-    from LSTM import lstm_run
-    result = lstm_run(X_train, y_train, X_test, use_SMOTE)
-elif model_select == '6' :
-    print("모델 선택 : TabNet")
-    from TabNet import tabnet_run
-    result = tabnet_run(X_train, y_train, X_test, use_SMOTE)
-else :
-    raise ValueError ("숫자를 잘못 선택했습니다.")
-
-model_result(result, y_test)
\ No newline at end of file
+    data_select = data_select.upper()
+    features = feature_set_name(feature_selection)
+    print(f"피처 셀렉션 방법 : {FEATURE_LABELS[features]}")
+    # 파싱/분할된 배열은 (데이터셋, 피처셋, cutoff)별 캐시를 mmap (dataset.py)
+    split = load_split(data_select, features, cutoff)
+    feature_cols, X_train, X_test, y_train, y_test = split[:5]
+
+    # 튜닝은 SMOTE 전 데이터로만 하므로 SMOTE 여부와 관계없이 같은 스터디를 이어서 사용
+    # 스케일러/fold는 데이터셋·피처셋별 디스크 캐시를 공유 (sweep의 다른 프로세스도 같은 캐시를 mmap)
+    folds = build_folds(X_train, y_train, X_test)
+    study_name = make_study_name(data_select, feature_set_tag(data_select, features), MODELS[model_select][1])
+    if smote_in_cv :
+        use_SMOTE, folds, study_name = True, folds.resampled(), f"{study_name}-smotecv"
+    study_kwargs = {'study_name' : study_name, 'folds' : folds}
+    if n_trials is not None :
+        study_kwargs['n_trials'] = n_trials
+    if n_workers is not None :
+        study_kwargs['n_workers'] = n_workers
+    if MODELS[model_select][1] == 'LSTM' :
+        study_kwargs['panel'] = split.panel
+
+    result = run_model(model_select, X_train, y_train, X_test, use_SMOTE, **study_kwargs)
+    metrics = model_result(result, y_test, context={'data' : data_select, 'features' : features,
+                                                    'smote' : bool(use_SMOTE), 'model' : MODELS[model_select][1],
+                                                    'study_name' : study_name, 'cutoff' : cutoff or CUTOFF})
+    if register :
+        from registry import save_artifact
+        name = f"{study_name}-{'smote' if use_SMOTE else 'raw'}"
+        path = save_artifact(name, MODELS[model_select][1], result, feature_cols, metrics,
+                             data_fingerprint=fingerprint(X_train, y_train),
+                             extra={'data' : data_select, 'features' : features, 'smote' : bool(use_SMOTE),
+                                    'cutoff' : cutoff or CUTOFF})
+        print(f"모델 저장 : {path}")
+    return metrics
+
+
+def interactive() :
+    # 데이터 선택
+    data_select = input("데이터를 선택하세요(상장/비상장/ALL) : ")
+    data_select = data_select.upper()
+    if data_select not in DATASETS :
+        raise ValueError ("데이터를 잘못 선택했습니다.")
+
+    feature_selection = input(
+        """피처 셀렉션 방법을 선택하세요.
+        1: Elastic Net
+        2: PCA
+        """
+    )
+    if feature_selection not in ['1', '2'] :
+        raise ValueError ("피처 셀렉션 방법을 잘못 선택했습니다.")
+
+    # smote 사용 여부 선택
+    use_smote = input("smote를 진행할까요?(Y/N) : ")
+    use_smote = use_smote.upper()
+
+    if use_smote == 'Y' :
+        print("smote를 진행합니다.")
+        use_SMOTE = True
+    elif use_smote == 'N' :
+        print("smote를 진행하지 않습니다.")
+        use_SMOTE = False
+    else :
+        print("선택이 잘못되었습니다. 기본적으로 smote 없이 진행합니다.")
+        use_SMOTE = False
+
+    # 모델 선택
+    model_select = input(
+        """
+            모델을 선택하세요.
+            1 : 로지스틱회귀모형 
+            2 : RandomForest
+            3 : CatBoost
+            4 : XGBoost
+            5 : LSTM 
+            6 : TabNet
+        """
+    )
+    if model_select not in MODELS :
+        raise ValueError ("숫자를 잘못 선택했습니다.")
+
+    run_experiment(data_select, feature_selection, use_SMOTE, model_select)
+
+
+if __name__ == '__main__' :
+    ap = argparse.ArgumentParser(description="인자가 없으면 대화형으로 실행합니다. 여러 조합은 sweep.py를 사용하세요.")
+    ap.add_argument('--data', choices=DATASETS)
+    ap.add_argument('--features', choices=[*FEATURE_ALIASES, *FEATURE_SETS])
+    ap.add_argument('--smote', action='store_true')
+    ap.add_argument('--smote-cv', action='store_true', dest='smote_cv', help="튜닝 fold 학습 구간에도 SMOTE 적용 (--smote 포함)")
+    ap.add_argument('--model', choices=list(MODELS))
+    ap.add_argument('--trials', type=int, help="스터디 전체 trial 수 (기본: OPTUNA_N_TRIALS 또는 5)")
+    ap.add_argument('--workers', type=int, help="병렬 trial 워커 수 (기본: OPTUNA_N_WORKERS 또는 1)")
+    ap.add_argument('--register', action='store_true', help="최종 모델/스케일러/threshold를 artifacts/에 저장")
+    ap.add_argument('--cutoff', help="이 회계기간(포함)까지 train, 이후 test (예: 2017/12, 기본: SPLIT_CUTOFF)")
+    ap.add_argument('--warm-start', dest='warm_start',
+                    help="새 스터디에 이전 최적 파라미터를 먼저 넣음 ('auto' 또는 스터디 이름/artifact:<이름>, 쉼표 구분)")
+    ap.add_argument('--narrow', type=float, help="warm start prior 주변으로 수치 탐색 범위를 좁히는 비율 (예: 0.25)")
+    args = ap.parse_args()
+    if args.warm_start is not None :
+        study_module.WARM_START = args.warm_start
+    if args.narrow is not None :
+        study_module.NARROW = args.narrow
+    if args.data is None and args.features is None and args.model is None :
+        interactive()
+    elif None in (args.data, args.features, args.model) :
+        ap.error("--data, --features, --model을 모두 지정하세요.")
+    else :
+        run_experiment(args.data, args.features, args.smote, args.model, args.trials, args.workers, args.register,
+                       args.cutoff, args.smote_cv)
@@ -0,0 +1,104 @@
+"""기업-연도 패널 -> LSTM용 lookback 시퀀스
+
+행 하나(기업 c, 연도 t)의 입력은 같은 기업의 t-lookback+1 ~ t년 피처다.
+- 전체 행을 (기업, 연도) 순으로 정렬해 앞에 lookback-1행을 0으로 채운 float32 배열 하나(X_pad)만 만든다.
+  행 i의 윈도우는 X_pad[i : i+lookback] 이므로 윈도우 텐서 (n, lookback, f)를 따로 만들지 않는다.
+- 다른 기업의 행이나 lookback 범위를 벗어난 연도(중간 연도 누락 포함)는 mask=False로 표시한다.
+  마지막 칸(자기 자신)은 항상 True.
+- 학습은 tf.data로 배치마다 tf.gather(X_pad, 시작 위치 + arange(lookback))만 수행한다.
+
+    seq = build_sequences(X, groups=split.panel['거래소코드'], years=split.panel['연도'], lookback=3)
+    model.fit(seq.dataset(train_rows, y_train, batch_size=64, shuffle=True), ...)
+"""
+import os
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+LOOKBACK = int(os.getenv('LSTM_LOOKBACK', '3'))
+
+
+class SequenceData :
+    def __init__(self, X_pad, mask, pos, lookback) :
+        self.X_pad = X_pad          # (n + lookback - 1, f) float32, (기업, 연도) 정렬 + 앞쪽 패딩
+        self.mask = mask            # (n, lookback) bool, 정렬 순서
+        self.pos = pos              # 입력 행 번호 -> 정렬 위치 (= X_pad에서 윈도우 시작 위치)
+        self.lookback = lookback
+        self._tensors = None
+
+    def __len__(self) :
+        return len(self.pos)
+
+    @property
+    def n_features(self) :
+        return self.X_pad.shape[1]
+
+    def windows(self, rows=None) :
+        """(len(rows), lookback, f) 윈도우와 mask. 요청한 행만 복사된다 (그 외에는 strided view)"""
+        rows = np.arange(len(self.pos)) if rows is None else np.asarray(rows)
+        view = sliding_window_view(self.X_pad, self.lookback, axis=0)  # (n, f, lookback) view
+        p = self.pos[rows]
+        return view[p].transpose(0, 2, 1), self.mask[p]
+
+    def dataset(self, rows, y=None, batch_size=64, shuffle=False, oversample=False, seed=42) :
+        """((X, mask), y) 배치를 만드는 tf.data 파이프라인
+
+        oversample=True면 양성 윈도우를 복원 추출해 클래스 균형을 맞춘다 (시퀀스에는 SMOTE 대신 사용).
+        """
+        import tensorflow as tf
+        p = self.pos[np.asarray(rows)]
+        if y is not None :
+            y = np.asarray(y, dtype=np.float32)
+            positives = np.flatnonzero(y == 1)
+            n_extra = len(y) - 2 * len(positives)
+            if oversample and len(positives) and n_extra > 0 :
+                extra = np.random.default_rng(seed).choice(positives, n_extra, replace=True)
+                p, y = np.concatenate([p, p[extra]]), np.concatenate([y, y[extra]])
+
+        if self._tensors is None :
+            # 데이터셋 전체에서 한 번만 TF 텐서로 올린다
+            self._tensors = (tf.constant(self.X_pad), tf.constant(self.mask))
+        X_pad, mask = self._tensors
+        offsets = tf.range(self.lookback, dtype=tf.int64)
+
+        ds = tf.data.Dataset.from_tensor_slices((p, y) if y is not None else p)
+        if shuffle :
+            ds = ds.shuffle(len(p), seed=seed, reshuffle_each_iteration=True)
+        ds = ds.batch(batch_size)
+
+        def gather(p, *label) :
+            inputs = (tf.gather(X_pad, p[:, None] + offsets), tf.gather(mask, p))
+            return (inputs, label[0]) if label else (inputs,)
+
+        return ds.map(gather, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
+
+
+def build_sequences(X, groups, years, lookback=LOOKBACK) :
+    """X의 각 행에 대해 같은 기업의 직전 lookback년 윈도우를 만든다 (입력 행 순서는 그대로 pos로 참조)"""
+    X = np.asarray(X, dtype=np.float32)
+    n, n_features = X.shape
+    codes = pd.factorize(np.asarray(groups))[0].astype(np.int64)
+    years = np.asarray(years, dtype=np.int64)
+    order = np.lexsort((years, codes))
+
+    # 정렬 + 패딩된 배열 하나만 할당
+    X_pad = np.zeros((n + lookback - 1, n_features), dtype=np.float32)
+    X_pad[lookback - 1:] = X[order]
+
+    code_sorted, year_sorted = codes[order], years[order]
+    code_win = sliding_window_view(np.concatenate([np.full(lookback - 1, -1), code_sorted]), lookback)
+    year_win = sliding_window_view(np.concatenate([np.full(lookback - 1, np.iinfo(np.int64).min // 2), year_sorted]),
+                                   lookback)
+    gap = year_sorted[:, None] - year_win
+    mask = (code_win == code_sorted[:, None]) & (gap >= 0) & (gap < lookback)
+
+    pos = np.empty(n, dtype=np.int64)
+    pos[order] = np.arange(n)
+    return SequenceData(X_pad, mask, pos, lookback)
+
+
+def single_step(X) :
+    """기업/연도 정보가 없을 때 : 각 행을 길이 1 시퀀스로 (기존 (n, 1, f) 입력과 동일)"""
+    n = len(X)
+    return build_sequences(X, np.arange(n), np.zeros(n, dtype=np.int64), lookback=1)
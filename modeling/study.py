@@ -0,0 +1,332 @@
+"""Optuna 스터디 공용 생성/실행 헬퍼
+
+- 스터디는 (데이터, 피처셋, 모델) 이름으로 영구 저장소(기본 sqlite:///optuna.db)에 저장되어
+  중단되어도 같은 이름으로 다시 실행하면 이어서 진행한다.
+- trial 예산(n_trials)은 스터디 전체 기준이다. 이미 끝난 trial 수만큼 덜 돌린다.
+- n_workers > 1 이면 같은 저장소를 공유하는 워커 프로세스(fork)로 trial을 병렬 실행한다.
+
+- 러너는 fold마다 report_fold로 누적 OOF F1을 보고하고, pruner가 가망 없다고 판단하면 남은 fold를 건너뛴다.
+
+- warm start : 새 스터디를 만들 때 이전 최적 trial 파라미터(다른 데이터셋/이전 피처셋 버전 스터디, 레지스트리
+  아티팩트의 search_params)를 enqueue_trial로 먼저 넣는다. 러너가 넘긴 search_space에 없는 키는 버리고 수치는
+  선언된 범위로 자른다. OPTUNA_NARROW > 0이면 러너의 suggest_float/suggest_int가 수치 파라미터 범위를
+  prior 값 주변으로 좁힌다 (범주형은 스터디 안에서 후보가 같아야 하므로 그대로).
+
+환경변수 : OPTUNA_STORAGE (빈 값이면 메모리), OPTUNA_N_TRIALS, OPTUNA_N_WORKERS, OPTUNA_PRUNING(0이면 끔), OPTUNA_SEED,
+          OPTUNA_WARM_START ('auto' 또는 쉼표로 구분한 스터디 이름 / 'artifact:<이름 또는 경로>'),
+          OPTUNA_WARM_START_TOP (prior 최대 개수, 기본 3), OPTUNA_NARROW (0이면 끔, 예: 0.25)
+"""
+import math
+import multiprocessing as mp
+import os
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+from pathlib import Path
+
+import optuna
+from optuna.storages import RDBStorage
+try :
+    # optuna >= 4.9 : failed_trial_callback / RetryFailedTrialCallback은 deprecated
+    from optuna.storages import RetryHeartbeatStaleTrialCallback as RetryCallback
+    STALE_CALLBACK = 'heartbeat_stale_trial_callback'
+except ImportError :
+    from optuna.storages import RetryFailedTrialCallback as RetryCallback
+    STALE_CALLBACK = 'failed_trial_callback'
+from optuna.trial import TrialState
+
+from thr import find_best_threshold
+
+STORAGE = os.getenv('OPTUNA_STORAGE', 'sqlite:///optuna.db')
+N_TRIALS = int(os.getenv('OPTUNA_N_TRIALS', '5'))
+N_WORKERS = int(os.getenv('OPTUNA_N_WORKERS', '1'))
+PRUNING = os.getenv('OPTUNA_PRUNING', '1') != '0'
+SEED = int(os.getenv('OPTUNA_SEED')) if os.getenv('OPTUNA_SEED') else None
+FINISHED = (TrialState.COMPLETE, TrialState.PRUNED)
+WARM_START = os.getenv('OPTUNA_WARM_START', '')
+WARM_START_TOP = int(os.getenv('OPTUNA_WARM_START_TOP', '3'))
+NARROW = float(os.getenv('OPTUNA_NARROW', '0'))
+MODEL_NAMES = ('LR', 'RF', 'CatBoost', 'XGBoost', 'LSTM', 'TabNet')
+# 러너 구간(tune/fit/predict)별 소요 시간·구간 최대 RSS (benchmark.py가 읽는다)
+PHASES = {}
+RSS_INTERVAL = float(os.getenv('RSS_SAMPLE_INTERVAL', '0.05'))
+
+
+def make_study_name(data, features, model) :
+    return f"{data}-{features}-{model}"
+
+
+def get_storage(url=STORAGE) :
+    if not url :
+        return None
+    engine_kwargs = {'connect_args' : {'timeout' : 60}} if url.startswith('sqlite') else {'pool_pre_ping' : True}
+    # heartbeat가 끊긴(프로세스가 죽은) RUNNING trial은 FAIL 처리 후 한 번 재시도
+    # (heartbeat는 optuna에서 experimental 표시라 알고 쓰는 경고는 숨긴다)
+    with warnings.catch_warnings() :
+        warnings.simplefilter('ignore', optuna.exceptions.ExperimentalWarning)
+        return RDBStorage(url, engine_kwargs=engine_kwargs, heartbeat_interval=60, grace_period=180,
+                          **{STALE_CALLBACK : RetryCallback(max_retry=1)})
+
+
+def create_study(study_name=None, direction='maximize', pruner=None, storage=None, search_space=None) :
+    """study_name이 없으면 기존처럼 메모리 스터디, 있으면 영구 저장소에서 불러오거나 새로 생성
+
+    search_space : 러너의 SEARCH_SPACE ({이름 : (low, high, log) 또는 범주 목록}). warm start prior를 여기에 맞춘다.
+    """
+    storage = STORAGE if storage is None else storage
+    if not PRUNING :
+        pruner = optuna.pruners.NopPruner()
+    sampler = optuna.samplers.TPESampler(seed=SEED) if SEED is not None else None
+    if study_name is None or not storage :
+        study = optuna.create_study(direction=direction, pruner=pruner, sampler=sampler)
+    else :
+        study = optuna.create_study(study_name=study_name, storage=get_storage(storage), direction=direction,
+                                    pruner=pruner, sampler=sampler, load_if_exists=True)
+    if WARM_START and study_name :
+        warm_start(study, prior_params(study_name, WARM_START, storage), search_space)
+    return study
+
+
+def _model_of(study_name) :
+    return next((part for part in study_name.split('-') if part in MODEL_NAMES), None)
+
+
+def _storage_priors(study_name, names, storage, top) :
+    """스터디별 최고 trial 파라미터 (best value 내림차순)"""
+    if not storage :
+        return []
+    summaries = {s.study_name : s for s in optuna.get_all_study_summaries(get_storage(storage))}
+    found = []
+    for name in names :
+        summary = summaries.get(name)
+        if name == study_name or summary is None or summary.best_trial is None :
+            continue
+        found.append((summary.best_trial.value, summary.best_trial.params))
+    return [params for _, params in sorted(found, key=lambda item : -item[0])][:top]
+
+
+def _artifact_priors(model, refs, root=None) :
+    """레지스트리 아티팩트의 search_params (최종 학습 파라미터 best_params가 아니라 탐색한 trial 파라미터)
+
+    refs가 None이면 root 아래 모든 버전 디렉터리, 아니면 이름(LATEST 버전) 또는 경로 목록
+    """
+    from registry import ARTIFACT_DIR, list_artifacts, load_artifact
+    root = root or ARTIFACT_DIR
+    if refs is None :
+        paths = [Path(root) / ref for ref in list_artifacts(root)] if os.path.isdir(root) else []
+    else :
+        paths = refs
+    metas = [load_artifact(path, root=root).meta for path in paths]
+    metas = [m for m in metas if m.get('model_type') == model and m.get('search_params')]
+    return [m['search_params'] for m in sorted(metas, key=lambda m : m.get('created_at', ''), reverse=True)]
+
+
+def prior_params(study_name, sources=WARM_START, storage=None, top=WARM_START_TOP) :
+    """warm start용 이전 최적 파라미터 목록
+
+    sources : 'auto' -> 저장소에서 같은 모델의 다른 스터디 + 레지스트리에서 같은 모델 종류의 최신 아티팩트
+              그 외 -> 쉼표로 구분한 스터디 이름 또는 'artifact:<이름 또는 경로>'
+    """
+    storage = STORAGE if storage is None else storage
+    model = _model_of(study_name)
+    if sources.strip() == 'auto' :
+        names = []
+        if storage :
+            names = [s.study_name for s in optuna.get_all_study_summaries(get_storage(storage))
+                     if _model_of(s.study_name) == model]
+        priors = _storage_priors(study_name, names, storage, top) + _artifact_priors(model, None)
+    else :
+        refs = [ref.strip() for ref in sources.split(',') if ref.strip()]
+        priors = (_storage_priors(study_name, [r for r in refs if not r.startswith('artifact:')], storage, top)
+                  + _artifact_priors(model, [r[len('artifact:'):] for r in refs if r.startswith('artifact:')]))
+    unique = []
+    for params in priors :
+        if params not in unique :
+            unique.append(params)
+    return unique[:top]
+
+
+def fit_space(params, search_space) :
+    """search_space에 있는 키만 남기고 수치는 선언된 범위로 자른다 (정수 범위면 반올림). 범주 밖 값은 버린다"""
+    if search_space is None :
+        return dict(params)
+    fitted = {}
+    for name, value in params.items() :
+        space = search_space.get(name)
+        if space is None :
+            continue
+        if isinstance(space, tuple) :
+            low, high = space[0], space[1]
+            if isinstance(value, bool) or not isinstance(value, (int, float)) :
+                continue
+            value = min(max(value, low), high)
+            fitted[name] = int(round(value)) if isinstance(low, int) and isinstance(high, int) else float(value)
+        elif value in space :
+            fitted[name] = value
+    return fitted
+
+
+def warm_start(study, priors, search_space=None) :
+    """아직 trial이 없는 스터디에 prior 파라미터를 먼저 실행하도록 enqueue하고 범위를 user attr로 남긴다"""
+    if not priors or study.get_trials(deepcopy=False) :
+        return study
+    fitted = []
+    for params in (fit_space(p, search_space) for p in priors) :
+        if params and params not in fitted :
+            fitted.append(params)
+    if not fitted :
+        return study
+    for params in fitted :
+        study.enqueue_trial(params, skip_if_exists=True)
+    ranges = {}
+    for params in fitted :
+        for name, value in params.items() :
+            if isinstance(value, (int, float)) and not isinstance(value, bool) :
+                lo, hi = ranges.get(name, (value, value))
+                ranges[name] = (min(lo, value), max(hi, value))
+    study.set_user_attr('prior_ranges', ranges)
+    print(f"[{study.study_name}] warm start : prior {len(fitted)}개 enqueue")
+    return study
+
+
+def _narrowed(trial, name, low, high, log) :
+    if NARROW <= 0 :
+        return low, high
+    prior = trial.study.user_attrs.get('prior_ranges', {}).get(name)
+    if prior is None :
+        return low, high
+    lo, hi = prior
+    if log :
+        factor = (high / low) ** NARROW
+        new_low, new_high = lo / factor, hi * factor
+    else :
+        width = (high - low) * NARROW
+        new_low, new_high = lo - width, hi + width
+    new_low, new_high = max(low, new_low), min(high, new_high)
+    return (new_low, new_high) if new_low < new_high else (low, high)
+
+
+def suggest_float(trial, name, low, high, log=False) :
+    """trial.suggest_float과 같지만 warm start prior가 있고 OPTUNA_NARROW > 0이면 범위를 prior 주변으로 좁힌다"""
+    low, high = _narrowed(trial, name, low, high, log)
+    return trial.suggest_float(name, low, high, log=log)
+
+
+def suggest_int(trial, name, low, high, log=False) :
+    low, high = _narrowed(trial, name, low, high, log)
+    return trial.suggest_int(name, math.floor(low), math.ceil(high), log=log)
+
+
+def report_fold(trial, y_true, oof_probs, oof_idx, step) :
+    """지금까지 채운 OOF 구간의 F1을 보고하고, pruner가 중단을 권하면 TrialPruned
+
+    러너는 fold마다 부른다 : 누적 OOF 성능이 가망 없으면 남은 fold를 돌리지 않고 trial을 끝낸다.
+    """
+    if not PRUNING :
+        return
+    _, f1 = find_best_threshold(y_true[oof_idx], oof_probs[oof_idx])
+    trial.report(float(f1), step)
+    if trial.should_prune() :
+        raise optuna.TrialPruned()
+
+
+def n_finished(study) :
+    return len(study.get_trials(deepcopy=False, states=FINISHED))
+
+
+def _worker(study_name, storage_url, pruner, objective, n_trials, timeout, callbacks) :
+    study = optuna.load_study(study_name=study_name, storage=get_storage(storage_url), pruner=pruner)
+    study.optimize(objective, n_trials=n_trials, timeout=timeout, callbacks=callbacks)
+
+
+try :
+    import psutil
+except ImportError :  # 선택 의존성 : 없으면 /proc/self/statm (Linux)
+    psutil = None
+
+
+def _current_rss_mb() :
+    """현재 RSS(MB). 읽을 수 없으면 None"""
+    if psutil is not None :
+        return psutil.Process().memory_info().rss / 2**20
+    try :
+        with open('/proc/self/statm') as f :
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, IndexError) :
+        return None
+
+
+@contextmanager
+def phase(name) :
+    """with 블록의 wall-clock(초)과 블록 동안의 최대 RSS(MB, 이 프로세스)를 PHASES[name]에 누적
+
+    ru_maxrss는 프로세스 전체 기간의 최대값이라 tune 이후 구간에 tune의 최대값이 그대로 남는다.
+    그래서 RSS_INTERVAL초마다 현재 RSS를 샘플링한다. RSS를 읽을 수 없으면 peak_rss_mb는 None.
+    """
+    started = time.perf_counter()
+    peak = [_current_rss_mb()]
+    stop = threading.Event()
+
+    def sample() :
+        while not stop.wait(RSS_INTERVAL) :
+            peak[0] = max(peak[0], _current_rss_mb() or 0.0)
+
+    sampler = threading.Thread(target=sample, daemon=True) if peak[0] is not None else None
+    if sampler is not None :
+        sampler.start()
+    try :
+        yield
+    finally :
+        if sampler is not None :
+            stop.set()
+            sampler.join()
+            peak[0] = max(peak[0], _current_rss_mb() or 0.0)
+        record = PHASES.setdefault(name, {'sec' : 0.0, 'peak_rss_mb' : peak[0]})
+        record['sec'] += time.perf_counter() - started
+        if peak[0] is not None :
+            record['peak_rss_mb'] = max(record['peak_rss_mb'] or 0.0, peak[0])
+
+
+def run_study(study, objective, n_trials=N_TRIALS, n_workers=N_WORKERS, timeout=None, callbacks=None,
+              processes=True, storage=None) :
+    """스터디 전체 trial 수가 n_trials가 될 때까지 실행
+
+    processes=False 이거나 메모리 스터디면 스레드(n_jobs)로 병렬화한다.
+    TensorFlow/torch처럼 fork 이후 안전하지 않은 프레임워크는 processes=False로 호출한다.
+    """
+    with phase('tune') :
+        return _run_study(study, objective, n_trials, n_workers, timeout, callbacks, processes, storage)
+
+
+def _persistent(study, storage) :
+    """워커 프로세스가 같은 스터디를 열 수 있는지 : 저장소 URL이 있고 그 안에 이 이름의 스터디가 있어야 한다"""
+    return bool(storage) and study.study_name in optuna.get_all_study_names(storage=storage)
+
+
+def _run_study(study, objective, n_trials, n_workers, timeout, callbacks, processes, storage) :
+    storage = STORAGE if storage is None else storage
+    remaining = n_trials - n_finished(study)
+    if remaining <= 0 :
+        print(f"[{study.study_name}] 이미 {n_finished(study)}개 trial이 완료되어 튜닝을 건너뜁니다.")
+        return study
+    callbacks = [optuna.study.MaxTrialsCallback(n_trials, states=FINISHED)] + list(callbacks or [])
+
+    if n_workers <= 1 or not _persistent(study, storage) or not processes or 'fork' not in mp.get_all_start_methods() :
+        study.optimize(objective, n_trials=remaining, timeout=timeout, n_jobs=max(n_workers, 1), callbacks=callbacks)
+        return study
+
+    # fork 컨텍스트라 objective 클로저와 학습 데이터를 피클링 없이 그대로 공유한다
+    ctx = mp.get_context('fork')
+    workers = [ctx.Process(target=_worker, args=(study.study_name, storage, study.pruner, objective, remaining,
+                                                 timeout, callbacks))
+               for _ in range(n_workers)]
+    for worker in workers :
+        worker.start()
+    for worker in workers :
+        worker.join()
+    failed = [w.exitcode for w in workers if w.exitcode != 0]
+    if failed :
+        print(f"[{study.study_name}] 워커 {len(failed)}개가 비정상 종료되었습니다 (exitcode={failed}).")
+    return study
+
@@ -0,0 +1,200 @@
+"""(데이터, 피처 셀렉션, SMOTE, 모델) 조합 그리드를 비대화형으로 실행
+
+    python sweep.py --data 상장 비상장 ALL --features elasticnet pca --smote Y N --model 1 2 3 4 5 6 --workers 4
+    python sweep.py --config sweep.json
+
+조합마다 별도 프로세스에서 실행하고 작업별로 스레드 수/메모리/시간 제한을 건다.
+모든 조합의 test 지표는 하나의 결과 테이블(CSV)에 누적된다.
+"""
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
+import traceback
+from pathlib import Path
+
+from dataset import FEATURE_ALIASES, FEATURE_SETS
+from run import DATASETS, MODELS
+
+FEATURE_METHODS = {**FEATURE_ALIASES, **{name : name for name in FEATURE_SETS}}
+RESULT_FIELDS = ['data', 'features', 'smote', 'model', 'status', 'elapsed_sec', 'accuracy', 'precision',
+                 'recall', 'f1', 'roc_auc', 'pr_auc', 'best_thr', 'best_params', 'error']
+THREAD_ENV = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'NUMEXPR_NUM_THREADS',
+              'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS', 'LOKY_MAX_CPU_COUNT']
+DEFAULTS = {
+    'data' : DATASETS,
+    'features' : ['elasticnet', 'pca'],
+    'smote' : ['Y', 'N'],
+    'model' : list(MODELS),
+    'workers' : 2,
+    'threads' : 4,
+    'memory_gb' : 0,
+    'timeout_min' : 0,
+    'trials' : None,
+    'register' : False,
+    'output' : 'results/model_results.csv',
+    'log_dir' : 'results/logs',
+}
+
+
+def _as_bool(value) :
+    if isinstance(value, bool) :
+        return value
+    return str(value).upper() in ('Y', 'YES', 'TRUE', '1')
+
+
+def build_grid(data, features, smote, model) :
+    grid = []
+    for d, f, s, m in itertools.product(data, features, smote, model) :
+        if d.upper() not in DATASETS :
+            raise ValueError(f"알 수 없는 데이터 : {d}")
+        if f not in FEATURE_METHODS :
+            raise ValueError(f"알 수 없는 피처 셀렉션 방법 : {f}")
+        if str(m) not in MODELS :
+            raise ValueError(f"알 수 없는 모델 : {m}")
+        grid.append({'data' : d.upper(), 'features' : FEATURE_METHODS[f], 'smote' : _as_bool(s), 'model' : str(m)})
+    return grid
+
+
+def _job_name(combo) :
+    return f"{combo['data']}_{combo['features']}_{'smote' if combo['smote'] else 'raw'}_{MODELS[combo['model']][1]}"
+
+
+def _limit_resources(threads, memory_gb) :
+    # numpy/BLAS/TF 스레드 풀은 import 전에 환경변수로 고정해야 한다
+    for key in THREAD_ENV :
+        os.environ[key] = str(threads)
+    # spawn 자식은 작업 함수보다 먼저 모듈(numpy)을 import하므로 이미 뜬 BLAS 스레드 풀도 런타임에 제한
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(threads)
+    if memory_gb :
+        import resource
+        limit = int(memory_gb * 1024 ** 3)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _worker(combo, threads, memory_gb, log_path, results, trials, register) :
+    _limit_resources(threads, memory_gb)
+    with open(log_path, 'w', encoding='utf-8') as log :
+        sys.stdout = sys.stderr = log
+        try :
+            from run import run_experiment
+            metrics = run_experiment(combo['data'], combo['features'], combo['smote'], combo['model'], n_trials=trials,
+                                     register=register)
+            results.put(('ok', metrics))
+        except BaseException :
+            traceback.print_exc()
+            results.put(('failed', traceback.format_exc(limit=3)))
+
+
+def _row(combo, status, elapsed, payload) :
+    row = {'data' : combo['data'], 'features' : combo['features'], 'smote' : 'Y' if combo['smote'] else 'N',
+           'model' : MODELS[combo['model']][1], 'status' : status, 'elapsed_sec' : round(elapsed, 1)}
+    if status == 'ok' :
+        row.update({key : payload[key] for key in ('accuracy', 'precision', 'recall', 'f1', 'roc_auc', 'pr_auc')})
+        row['best_thr'] = payload['best_thr']
+        row['best_params'] = json.dumps(payload['best_params'], ensure_ascii=False, default=str)
+    else :
+        row['error'] = payload
+    return row
+
+
+def _append(output, row) :
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    new_file = not output.exists()
+    with open(output, 'a', newline='', encoding='utf-8') as f :
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        if new_file :
+            writer.writeheader()
+        writer.writerow(row)
+
+
+def _finished(output) :
+    if not Path(output).exists() :
+        return set()
+    with open(output, newline='', encoding='utf-8') as f :
+        return {(r['data'], r['features'], r['smote'], r['model']) for r in csv.DictReader(f) if r['status'] == 'ok'}
+
+
+def sweep(grid, workers=2, threads=4, memory_gb=0, timeout_min=0, output=DEFAULTS['output'],
+          log_dir=DEFAULTS['log_dir'], resume=False, trials=None, register=False) :
+    """조합마다 프로세스 하나를 띄워 최대 workers개씩 병렬 실행. 시간 초과 작업은 강제 종료"""
+    ctx = mp.get_context('spawn')
+    Path(log_dir).mkdir(parents=True, exist_ok=True)
+    if resume :
+        done = _finished(output)
+        grid = [c for c in grid if (c['data'], c['features'], 'Y' if c['smote'] else 'N', MODELS[c['model']][1]) not in done]
+    pending = list(grid)
+    running = []
+    rows = []
+    print(f"총 {len(pending)}개 조합 / 동시 실행 {workers}개")
+
+    while pending or running :
+        while pending and len(running) < workers :
+            combo = pending.pop(0)
+            results = ctx.Queue()
+            log_path = Path(log_dir) / f"{_job_name(combo)}.log"
+            proc = ctx.Process(target=_worker, args=(combo, threads, memory_gb, str(log_path), results, trials, register), daemon=True)
+            proc.start()
+            running.append((proc, combo, results, time.monotonic()))
+
+        time.sleep(0.5)
+        for job in list(running) :
+            proc, combo, results, started = job
+            elapsed = time.monotonic() - started
+            try :
+                status, payload = results.get_nowait()
+            except queue.Empty :
+                if proc.is_alive() :
+                    if not (timeout_min and elapsed > timeout_min * 60) :
+                        continue
+                    proc.terminate()
+                    status, payload = 'timeout', f"{timeout_min}분 제한 초과"
+                else :
+                    try :
+                        status, payload = results.get(timeout=1)
+                    except queue.Empty :
+                        status, payload = 'failed', f"프로세스 비정상 종료 (exitcode={proc.exitcode})"
+            proc.join()
+            running.remove(job)
+            row = _row(combo, status, elapsed, payload)
+            _append(output, row)
+            rows.append(row)
+            print(f"[{status}] {_job_name(combo)} ({elapsed:.0f}s) f1={row.get('f1', '-')}")
+    return rows
+
+
+def load_config(path) :
+    with open(path, encoding='utf-8') as f :
+        return {**DEFAULTS, **json.load(f)}
+
+
+if __name__ == '__main__' :
+    ap = argparse.ArgumentParser(description="모델 실험 그리드 실행기")
+    ap.add_argument('--config', help="JSON 설정 파일 (키: data, features, smote, model, workers, threads, memory_gb, timeout_min, trials, output)")
+    ap.add_argument('--data', nargs='+')
+    ap.add_argument('--features', nargs='+')
+    ap.add_argument('--smote', nargs='+')
+    ap.add_argument('--model', nargs='+')
+    ap.add_argument('--workers', type=int)
+    ap.add_argument('--threads', type=int, help="작업당 BLAS/OpenMP/TF 스레드 수")
+    ap.add_argument('--memory-gb', type=float, dest='memory_gb', help="작업당 주소공간 제한 (0 = 제한 없음)")
+    ap.add_argument('--timeout-min', type=float, dest='timeout_min', help="작업당 시간 제한 (0 = 제한 없음)")
+    ap.add_argument('--output')
+    ap.add_argument('--trials', type=int, help="조합별 Optuna trial 수 (스터디는 optuna.db에 이어서 저장)")
+    ap.add_argument('--register', action='store_true', default=None, help="조합별 최종 모델을 artifacts/에 저장")
+    ap.add_argument('--resume', action='store_true', help="결과 테이블에 성공(ok)으로 기록된 조합은 건너뜀")
+    args = ap.parse_args()
+
+    config = load_config(args.config) if args.config else dict(DEFAULTS)
+    config.update({k : v for k, v in vars(args).items() if v is not None and k not in ('config', 'resume')})
+    grid = build_grid(config['data'], config['features'], config['smote'], config['model'])
+    sweep(grid, config['workers'], config['threads'], config['memory_gb'], config['timeout_min'],
+          config['output'], config['log_dir'], resume=args.resume, trials=config['trials'],
+          register=config['register'])
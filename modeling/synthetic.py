@@ -0,0 +1,98 @@
+"""실제 데이터 없이 모델링 코드를 돌려 보기 위한 합성 기업-연도 패널
+
+    python synthetic.py --out /tmp/bench --scale 0.1       # /tmp/bench/data/{상장,비상장,ALL}.csv
+    df = make_panel('비상장', rows=20000)
+
+- 컬럼은 dataset.FEATURE_SETS의 elasticnet/pca 피처 합집합 + 거래소코드, 회계년도('YYYY/12'), label
+  이라 run.py/backtest.py/benchmark.py가 그대로 읽는다.
+- 기업마다 연속된 연도 구간을 갖고 기업별 오프셋이 있어 시퀀스(LSTM)에도 신호가 남는다.
+- PROFILES의 행 수/부실 비율은 대시보드 적재 데이터(ALL 약 7.8만 행) 기준 근사치다.
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_classification
+
+from dataset import DATASETS, FEATURE_SETS
+
+YEARS = (2000, 2023)
+PROFILES = {
+    '상장' : {'rows' : 30000, 'positive_rate' : 0.08},
+    '비상장' : {'rows' : 48000, 'positive_rate' : 0.12},
+    'ALL' : {'rows' : 78000, 'positive_rate' : 0.10},
+}
+
+
+def make_data(rows, features, positive_rate, seed=42) :
+    """불균형 이진 분류 배열 (앞 80% train, 뒤 20% test)"""
+    X, y = make_classification(n_samples=rows, n_features=features, n_informative=max(2, features // 3),
+                               weights=[1 - positive_rate], flip_y=0.01, random_state=seed)
+    split = int(rows * 0.8)
+    return X[:split], y[:split], X[split:]
+
+
+def feature_columns(data_select) :
+    columns = FEATURE_SETS['elasticnet'][data_select] + FEATURE_SETS['pca'][data_select]
+    return list(dict.fromkeys(columns))
+
+
+def _company_years(rows, rng) :
+    """기업별 연속 연도 구간을 rows행이 될 때까지 만든다 -> (기업 번호, 연도)"""
+    first, last = YEARS
+    companies, years = [], []
+    n, company = 0, 0
+    while n < rows :
+        length = int(rng.integers(3, last - first + 2))
+        start = int(rng.integers(first, last - length + 2))
+        length = min(length, rows - n)
+        companies.append(np.full(length, company))
+        years.append(np.arange(start, start + length))
+        n += length
+        company += 1
+    return np.concatenate(companies), np.concatenate(years)
+
+
+def make_panel(data_select='상장', rows=None, positive_rate=None, seed=42) :
+    data_select = data_select.upper()
+    profile = PROFILES[data_select]
+    rows = rows or profile['rows']
+    positive_rate = positive_rate or profile['positive_rate']
+    columns = feature_columns(data_select)
+    rng = np.random.default_rng(seed)
+
+    X, y = make_classification(n_samples=rows, n_features=len(columns), n_informative=max(2, len(columns) // 3),
+                               weights=[1 - positive_rate], flip_y=0.01, random_state=seed)
+    company, year = _company_years(rows, rng)
+    # 같은 기업의 연도별 피처가 비슷하도록 기업 오프셋을 더한다
+    X += rng.normal(scale=0.5, size=(company.max() + 1, len(columns)))[company]
+
+    df = pd.DataFrame(X.astype(np.float32), columns=columns)
+    df.insert(0, '거래소코드', [f"{c:06d}" for c in company])
+    df.insert(1, '회계년도', [f"{y}/12" for y in year])
+    df['label'] = y
+    return df
+
+
+def write_datasets(out_dir, datasets=DATASETS, scale=1.0, seed=42) :
+    """out_dir/data/<데이터셋>.csv 를 쓴다 (DATA_DIR=out_dir/data 또는 out_dir에서 실행)"""
+    data_dir = Path(out_dir) / 'data'
+    data_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i, data_select in enumerate(datasets) :
+        df = make_panel(data_select, rows=max(100, int(PROFILES[data_select]['rows'] * scale)), seed=seed + i)
+        df.to_csv(data_dir / f"{data_select}.csv", index=False)
+        paths.append(data_dir / f"{data_select}.csv")
+    return paths
+
+
+if __name__ == '__main__' :
+    ap = argparse.ArgumentParser(description="합성 기업-연도 패널 CSV 생성")
+    ap.add_argument('--out', required=True)
+    ap.add_argument('--data', nargs='+', choices=DATASETS, default=DATASETS)
+    ap.add_argument('--scale', type=float, default=1.0, help="PROFILES 행 수 배율")
+    ap.add_argument('--seed', type=int, default=42)
+    args = ap.parse_args()
+    for path in write_datasets(args.out, args.data, args.scale, args.seed) :
+        print(f"저장 : {path}")
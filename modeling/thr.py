@@ -1,13 +1,88 @@
-from sklearn.metrics import precision_recall_curve
+"""threshold 탐색
+
+확률 벡터를 내림차순 정렬한 뒤 누적합으로 모든 후보 threshold의 TP/FP를 한 번에 구한다.
+probs가 (m, n)이면 m개 벡터(여러 trial의 OOF, bootstrap 표본 등)를 한 번의 NumPy 연산으로 처리한다.
+
+목적함수(objective)
+- 'f1'        : F1 (기본값, 기존 동작)
+- 'fbeta'     : F-beta (beta > 1이면 recall 중시)
+- 'cost'      : -(cost_fn * FN + cost_fp * FP) / n  (놓친 부실 1건과 오경보 1건의 비용 비율)
+- 'precision' : precision (min_recall과 함께 "recall >= r 중 precision 최대" 용도)
+min_recall을 주면 recall이 그보다 낮은 threshold는 후보에서 제외한다.
+
+러너는 find_best_threshold를 그대로 호출하고, 목적함수는 환경변수로 바꾼다.
+    THR_OBJECTIVE=fbeta THR_BETA=2 / THR_OBJECTIVE=cost THR_COST_FN=10 / THR_MIN_RECALL=0.8
+"""
+import os
+
 import numpy as np
 
-def find_best_threshold(y_true, probs):
-    # precision_recall_curve로 가능한 threshold들 얻기
-    precision, recall, thresholds = precision_recall_curve(y_true, probs)
-    # thresholds 길이는 precision/recall보다 1 작음 -> compute F1 for each threshold
-    # avoid division by zero
-    f1_scores = (2 * precision[:-1] * recall[:-1]) / (precision[:-1] + recall[:-1] + 1e-12)
-    best_idx = np.argmax(f1_scores)
-    best_thr = thresholds[best_idx]
-    
-    return best_thr, f1_scores[best_idx]
\ No newline at end of file
+OBJECTIVES = ('f1', 'fbeta', 'cost', 'precision')
+OBJECTIVE = os.getenv('THR_OBJECTIVE', 'f1')
+BETA = float(os.getenv('THR_BETA', '1'))
+COST_FN = float(os.getenv('THR_COST_FN', '1'))
+COST_FP = float(os.getenv('THR_COST_FP', '1'))
+MIN_RECALL = float(os.getenv('THR_MIN_RECALL')) if os.getenv('THR_MIN_RECALL') else None
+
+
+def threshold_curves(y_true, probs):
+    """후보 threshold별 TP/FP
+
+    반환 : thresholds, tp, fp, n_pos — 모두 (m, n) (n_pos는 (m, 1)).
+    같은 확률값이 여러 개면 마지막 위치만 유효한 후보이고 나머지 thresholds는 NaN이다.
+    """
+    probs = np.atleast_2d(np.asarray(probs, dtype=np.float64))
+    y_true = np.broadcast_to(np.atleast_2d(np.asarray(y_true)), probs.shape)
+    order = np.argsort(-probs, axis=1, kind='stable')
+    p_sorted = np.take_along_axis(probs, order, axis=1)
+    y_sorted = np.take_along_axis(y_true, order, axis=1).astype(np.int64)
+
+    tp = np.cumsum(y_sorted, axis=1)
+    fp = np.arange(1, probs.shape[1] + 1) - tp
+    # threshold = p_sorted[i] 일 때 예측 양성은 probs >= p_sorted[i] -> 동점 구간의 마지막 위치만 유효
+    distinct = np.ones_like(p_sorted, dtype=bool)
+    distinct[:, :-1] = p_sorted[:, :-1] != p_sorted[:, 1:]
+    thresholds = np.where(distinct, p_sorted, np.nan)
+    return thresholds, tp, fp, tp[:, -1:]
+
+
+def threshold_scores(y_true, probs, objective=None, beta=None, cost_fn=None, cost_fp=None, min_recall=None):
+    """후보 threshold별 목적함수 값 (높을수록 좋음). 무효 후보는 -inf"""
+    objective = objective or OBJECTIVE
+    if objective not in OBJECTIVES:
+        raise ValueError(f"알 수 없는 threshold 목적함수 : {objective}")
+    beta = BETA if beta is None else beta
+    min_recall = MIN_RECALL if min_recall is None else min_recall
+
+    thresholds, tp, fp, n_pos = threshold_curves(y_true, probs)
+    fn = n_pos - tp
+    with np.errstate(divide='ignore', invalid='ignore'):
+        recall = np.where(n_pos > 0, tp / n_pos, 0.0)
+        if objective == 'precision':
+            scores = tp / (tp + fp)
+        elif objective == 'cost':
+            cost_fn = COST_FN if cost_fn is None else cost_fn
+            cost_fp = COST_FP if cost_fp is None else cost_fp
+            scores = -(cost_fn * fn + cost_fp * fp) / tp.shape[1]
+        else:
+            b2 = 1.0 if objective == 'f1' else beta ** 2
+            scores = (1 + b2) * tp / ((1 + b2) * tp + b2 * fn + fp)
+    scores = np.where(np.isnan(thresholds) | np.isnan(scores), -np.inf, scores)
+    if min_recall is not None:
+        scores = np.where(recall >= min_recall, scores, -np.inf)
+    return thresholds, scores
+
+
+def find_best_thresholds(y_true, probs, objective=None, **kwargs):
+    """(m, n) 확률 행렬의 행마다 최적 threshold와 목적함수 값. 동점이면 가장 낮은 threshold"""
+    thresholds, scores = threshold_scores(y_true, probs, objective, **kwargs)
+    n = scores.shape[1]
+    # 내림차순 정렬이므로 뒤에서부터 찾은 argmax가 가장 낮은 threshold (precision_recall_curve + argmax와 동일)
+    best = n - 1 - np.argmax(scores[:, ::-1], axis=1)
+    rows = np.arange(scores.shape[0])
+    return thresholds[rows, best], scores[rows, best]
+
+
+def find_best_threshold(y_true, probs, objective=None, **kwargs):
+    best_thr, best_score = find_best_thresholds(y_true, np.asarray(probs).reshape(1, -1), objective, **kwargs)
+    return best_thr[0], best_score[0]
@@ -10,6 +10,7 @@ from sqlalchemy import and_, func
 from sqlalchemy.orm import Session
 
 from db_models.dashboard_flat import DashboardFlat
+from db_models.risk_contribution import RiskContribution
 
 THRESHOLD = -2.22
 
@@ -69,9 +70,10 @@ def _metric(name: str, company: Any, industry: Any, direction: str = "higher_bet
     return {"name": name, "company": _number(company), "industry": _number(industry), "direction": direction}
 
 
-def build_benchmark(stock_code: str, db: Session) -> dict:
-    latest = (db.query(DashboardFlat).filter(DashboardFlat.stock_code == stock_code)
-              .order_by(DashboardFlat.year.desc()).first())
+def build_benchmark(stock_code: str, db: Session, latest: DashboardFlat | None = None) -> dict:
+    if latest is None:
+        latest = (db.query(DashboardFlat).filter(DashboardFlat.stock_code == stock_code)
+                  .order_by(DashboardFlat.year.desc()).first())
     if not latest:
         return {"categories": [], "tolerance": 0.05}
     # These values are median_* columns, so templates must call them medians, not averages.
@@ -92,6 +94,15 @@ def build_benchmark(stock_code: str, db: Session) -> dict:
     return {"categories": categories, "tolerance": 0.05}
 
 
+def get_risk_contributions(stock_code: str, year: int, db: Session) -> list[dict]:
+    """Precomputed top-k feature contributions (etl/explain_batch.py); empty when none are stored."""
+    rows = (db.query(RiskContribution)
+            .filter(RiskContribution.stock_code == stock_code, RiskContribution.year == year)
+            .order_by(RiskContribution.rank).all())
+    return [{"feature": row.feature, "value": _number(row.value), "contribution": round(_number(row.contribution), 4),
+             "direction": "위험 증가" if _number(row.contribution) > 0 else "위험 감소"} for row in rows]
+
+
 def get_company_detail(stock_code: str, db: Session) -> dict:
     rows = (db.query(DashboardFlat).filter(DashboardFlat.stock_code == stock_code)
             .order_by(DashboardFlat.year.asc()).all())
@@ -112,7 +123,7 @@ def get_company_detail(stock_code: str, db: Session) -> dict:
             series.append(matching)
     for item in series:
         item["highlight"] = item["label"] == target
-    return {
+    detail = {
         "default_prob": probability,
         "company_info": {"company_name": latest.company_name, "founded_year": int(latest.founded_year or 0),
                          "ticker": latest.stock_code, "market_type": latest.market or "", "industry_category": target,
@@ -124,6 +135,9 @@ def get_company_detail(stock_code: str, db: Session) -> dict:
         "risk_factor": {"ROA": f"{_number(latest.roa):.1f}%", "ROE": f"{_number(latest.roe):.1f}%", "부채비율": f"{_number(latest.debt_ratio):.1f}%", "이자보상배율": f"{_number(latest.icr):.1f}"},
         "sector_risk": {"title": "업종별 부실확률 중앙값", "series": series, "all_series": all_series,
                         "highlight_label": target, "y_max_pct": 100, "y_ticks": list(range(0, 101, 10))},
-        "benchmark": build_benchmark(stock_code, db), "beneish_mscore": score, "beneish_year": int(latest.year),
+        "benchmark": build_benchmark(stock_code, db, latest), "beneish_mscore": score, "beneish_year": int(latest.year),
         "score_fill": 100 if score is not None and score >= THRESHOLD else 0, "threshold": THRESHOLD,
     }
+    # Looked up last: a failed lookup rolls the session back, which expires the rows used above.
+    detail["risk_contributions"] = get_risk_contributions(stock_code, int(latest.year), db)
+    return detail
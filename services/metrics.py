@@ -0,0 +1,110 @@
+"""In-process request metrics rendered in the Prometheus text exposition format.
+
+Series are keyed by route template (`/company/{corp_id}`), never by raw path,
+so label cardinality stays bounded by the number of routes.
+"""
+import bisect
+import threading
+from collections import defaultdict
+
+from services.query_stats import QueryStats, query_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class RequestMetrics:
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple[str, str], list[float]] = {}
+        self._sums: dict[tuple[str, str], float] = defaultdict(float)
+        self._statuses: dict[tuple[str, str, int], int] = defaultdict(int)
+        self._in_flight: dict[tuple[str, str], int] = defaultdict(int)
+        self._fallbacks: dict[str, int] = defaultdict(int)
+
+    def started(self, method: str, route: str) -> None:
+        with self._lock:
+            self._in_flight[(method, route)] += 1
+
+    def finished(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route)
+        with self._lock:
+            self._in_flight[key] -= 1
+            counts = self._histograms.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self._sums[key] += seconds
+            self._statuses[(method, route, status)] += 1
+
+    def record_fallback(self, route: str) -> None:
+        with self._lock:
+            self._fallbacks[route] += 1
+
+    def fallback_count(self, route: str) -> int:
+        with self._lock:
+            return self._fallbacks.get(route, 0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._sums.clear()
+            self._statuses.clear()
+            self._in_flight.clear()
+            self._fallbacks.clear()
+
+    def render(self, queries: QueryStats | None = query_stats) -> str:
+        with self._lock:
+            histograms = {key: list(counts) for key, counts in self._histograms.items()}
+            sums = dict(self._sums)
+            statuses = dict(self._statuses)
+            in_flight = dict(self._in_flight)
+            fallbacks = dict(self._fallbacks)
+
+        lines = ["# HELP http_request_duration_seconds Request latency by route template.",
+                 "# TYPE http_request_duration_seconds histogram"]
+        for (method, route), counts in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"http_request_duration_seconds_bucket{_labels(method=method, route=route, le=repr(bound))} {cumulative}")
+            cumulative += counts[-1]
+            lines.append(f"http_request_duration_seconds_bucket{_labels(method=method, route=route, le='+Inf')} {cumulative}")
+            lines.append(f"http_request_duration_seconds_sum{_labels(method=method, route=route)} {sums[(method, route)]:.6f}")
+            lines.append(f"http_request_duration_seconds_count{_labels(method=method, route=route)} {cumulative}")
+
+        lines += ["# HELP http_requests_total Completed requests by route template and status code.",
+                  "# TYPE http_requests_total counter"]
+        for (method, route, status), count in sorted(statuses.items()):
+            lines.append(f"http_requests_total{_labels(method=method, route=route, status=str(status))} {count}")
+
+        lines += ["# HELP http_requests_in_flight Requests currently being served.",
+                  "# TYPE http_requests_in_flight gauge"]
+        for (method, route), count in sorted(in_flight.items()):
+            lines.append(f"http_requests_in_flight{_labels(method=method, route=route)} {count}")
+
+        lines += ["# HELP dashboard_fallback_renders_total Responses built from fallback data after a data failure.",
+                  "# TYPE dashboard_fallback_renders_total counter"]
+        for route, count in sorted(fallbacks.items()):
+            lines.append(f"dashboard_fallback_renders_total{_labels(route=route)} {count}")
+
+        if queries is not None:
+            per_route = queries.by_route()
+            lines += ["# HELP db_queries_total SQL statements executed by route template.",
+                      "# TYPE db_queries_total counter"]
+            lines += [f"db_queries_total{_labels(route=route)} {int(totals['count'])}"
+                      for route, totals in sorted(per_route.items())]
+            lines += ["# HELP db_query_duration_seconds_total Time spent in SQL statements by route template.",
+                      "# TYPE db_query_duration_seconds_total counter"]
+            lines += [f"db_query_duration_seconds_total{_labels(route=route)} {totals['total_ms'] / 1000:.6f}"
+                      for route, totals in sorted(per_route.items())]
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,130 @@
+"""SQL query instrumentation.
+
+Every statement executed through an instrumented engine is timed and recorded
+under its statement fingerprint and the FastAPI route template that issued it
+(see the route-tagging middleware in `main.py`). Statements slower than the
+configured threshold are written to the slow-query log.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger("riskqueens.slow_query")
+
+current_route: ContextVar[str] = ContextVar("current_route", default="-")
+
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMS = re.compile(r"%\(\w+\)s|%s|:\w+|\?|__\[POSTCOMPILE_\w+\]")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """Replace literals and bind parameters with `?` so equivalent queries compare equal."""
+    text = _STRINGS.sub("?", statement)
+    text = _PARAMS.sub("?", text)
+    text = _NUMBERS.sub("?", text)
+    text = _IN_LISTS.sub("(?)", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def fingerprint(statement: str) -> str:
+    return hashlib.sha1(normalize_statement(statement).encode("utf-8")).hexdigest()[:12]
+
+
+class QueryStats:
+    """Thread-safe per-route and per-fingerprint aggregates."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._by_key: dict[tuple[str, str], dict[str, Any]] = {}
+        self._budgets: list[list[str]] = []
+
+    def record(self, route: str, statement: str, duration_ms: float, rows: int) -> None:
+        key = (route, fingerprint(statement))
+        with self._lock:
+            entry = self._by_key.get(key)
+            if entry is None:
+                entry = self._by_key[key] = {"route": route, "fingerprint": key[1],
+                                             "statement": normalize_statement(statement)[:500],
+                                             "count": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0}
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["rows"] += max(rows, 0)
+            for executed in self._budgets:
+                executed.append(statement)
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [dict(entry) for entry in self._by_key.values()]
+
+    def by_route(self) -> dict[str, dict[str, float]]:
+        totals: dict[str, dict[str, float]] = {}
+        for entry in self.snapshot():
+            route = totals.setdefault(entry["route"], {"count": 0, "total_ms": 0.0, "rows": 0})
+            route["count"] += entry["count"]
+            route["total_ms"] += entry["total_ms"]
+            route["rows"] += entry["rows"]
+        return totals
+
+    def reset(self) -> None:
+        with self._lock:
+            self._by_key.clear()
+
+    @contextmanager
+    def watch(self) -> Iterator[list[str]]:
+        executed: list[str] = []
+        with self._lock:
+            self._budgets.append(executed)
+        try:
+            yield executed
+        finally:
+            with self._lock:
+                self._budgets.remove(executed)
+
+
+query_stats = QueryStats()
+
+
+def instrument_engine(engine: Engine, slow_query_ms: float | None = None, stats: QueryStats = query_stats) -> None:
+    """Attach timing hooks to `engine`; `slow_query_ms=None` disables the slow-query log."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        duration_ms = (time.perf_counter() - conn.info["query_started"].pop()) * 1000
+        route = current_route.get()
+        stats.record(route, statement, duration_ms, getattr(cursor, "rowcount", -1))
+        if slow_query_ms is not None and duration_ms >= slow_query_ms:
+            slow_logger.warning("slow query %.1f ms on %s [%s]: %s", duration_ms, route,
+                                fingerprint(statement), normalize_statement(statement)[:500])
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+
+@contextmanager
+def query_budget(max_queries: int, stats: QueryStats = query_stats) -> Iterator[list[str]]:
+    """Test helper: fail when more than `max_queries` statements run inside the block."""
+    with stats.watch() as executed:
+        yield executed
+    if len(executed) > max_queries:
+        listing = "\n".join(f"  {normalize_statement(statement)[:200]}" for statement in executed)
+        raise AssertionError(f"expected at most {max_queries} queries, {len(executed)} executed:\n{listing}")
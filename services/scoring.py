@@ -0,0 +1,172 @@
+"""Online default-probability scoring with request micro-batching.
+
+The model is a registry artifact (`modeling/registry.py`) loaded once at startup from
+`SCORE_MODEL`. Concurrent requests are queued and scored together: the first queued
+request opens a short window (`SCORE_BATCH_WINDOW_MS`) and everything that arrives
+before it closes, up to `SCORE_MAX_BATCH` rows, goes through one vectorized
+`predict_proba` call in a worker thread so the event loop never blocks on the model.
+
+numpy/scikit-learn and the model libraries are only imported when a model is configured.
+"""
+import asyncio
+import logging
+import math
+import os
+from typing import Any, Callable, Protocol, Sequence
+
+from services.company_service import _status_from_prob
+
+logger = logging.getLogger(__name__)
+
+
+class ScoreModel(Protocol):
+    feature_cols: list[str]
+    threshold: float
+
+    def predict_proba(self, X: Sequence[Sequence[float]]) -> Sequence[float]: ...
+
+
+class MicroBatcher:
+    """Coalesce concurrent `submit` calls into batched `predict` calls of at most `max_batch` rows."""
+
+    def __init__(self, predict: Callable[[list[list[float]]], Sequence[float]], max_batch: int = 256,
+                 window_ms: float = 5.0):
+        self._predict = predict
+        self.max_batch = max_batch
+        self.window = window_ms / 1000
+        self.batches = 0
+        self.rows = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._pending: tuple[list[list[float]], asyncio.Future] | None = None
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._pending = None
+            self._task = loop.create_task(self._run())
+
+    async def submit(self, rows: list[list[float]]) -> list[float]:
+        self._ensure_worker()
+        # Larger requests are queued as max_batch-row pieces so no single predict call exceeds it.
+        futures = []
+        for start in range(0, max(len(rows), 1), self.max_batch):
+            future = self._loop.create_future()
+            await self._queue.put((rows[start:start + self.max_batch], future))
+            futures.append(future)
+        return [p for part in await asyncio.gather(*futures) for p in part]
+
+    async def _collect(self) -> list[tuple[list[list[float]], asyncio.Future]]:
+        items = [self._pending or await self._queue.get()]
+        self._pending = None
+        size = len(items[0][0])
+        deadline = self._loop.time() + self.window
+        while size < self.max_batch:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if size + len(item[0]) > self.max_batch:
+                self._pending = item  # opens the next batch
+                break
+            items.append(item)
+            size += len(item[0])
+        return items
+
+    async def _run(self) -> None:
+        while True:
+            items = await self._collect()
+            batch = [row for rows, _ in items for row in rows]
+            try:
+                probs = await self._loop.run_in_executor(None, self._predict, batch)
+            except Exception as exc:
+                logger.exception("Batched scoring failed for %d rows", len(batch))
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            self.batches += 1
+            self.rows += len(batch)
+            offset = 0
+            for rows, future in items:
+                if not future.done():
+                    future.set_result([float(p) for p in probs[offset:offset + len(rows)]])
+                offset += len(rows)
+
+    async def close(self) -> None:
+        if self._task is not None and self._loop is asyncio.get_running_loop():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, RuntimeError):
+                pass
+        self._task = None
+
+
+class Scorer:
+    def __init__(self) -> None:
+        self.model: ScoreModel | None = None
+        self.batcher: MicroBatcher | None = None
+        self.version: str | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.model is not None
+
+    def load(self, model: ScoreModel, version: str | None = None) -> None:
+        # Sequence LSTMs (or ensembles containing one) were trained on multi-year windows of the same
+        # company; a single request row cannot rebuild them, so scores would silently disagree with the
+        # offline model. Those artifacts are served only by etl/score_batch.py, which has the panel.
+        if getattr(model, "needs_history", False):
+            raise ValueError(f"{version or 'model'} needs company history (sequence LSTM); "
+                             "use etl/score_batch.py instead of /api/score")
+        self.model = model
+        self.version = version
+        self.batcher = MicroBatcher(model.predict_proba, int(os.getenv("SCORE_MAX_BATCH", "256")),
+                                    float(os.getenv("SCORE_BATCH_WINDOW_MS", "5")))
+
+    def load_from_env(self) -> bool:
+        """Load `SCORE_MODEL` (artifact name or version directory); scoring stays disabled when unset."""
+        name = os.getenv("SCORE_MODEL", "").strip()
+        if not name:
+            return False
+        from modeling.registry import load_artifact
+
+        # "auto" serves model.onnx through onnxruntime when it has been exported (see modeling/onnx_export.py).
+        artifact = load_artifact(name, os.getenv("SCORE_MODEL_VERSION", "latest"),
+                                 os.getenv("SCORE_ARTIFACT_DIR", "modeling/artifacts"),
+                                 runtime=os.getenv("SCORE_RUNTIME", "auto")).load()
+        self.load(artifact, f"{artifact.meta['name']}/{artifact.meta['version']}")
+        logger.info("Scoring model %s loaded (%s)", self.version, type(artifact).__name__)
+        return True
+
+    def to_matrix(self, rows: list[dict[str, float]]) -> list[list[float]]:
+        """Order each row by the model's feature columns; raise ValueError on missing/non-finite values."""
+        matrix = []
+        for index, row in enumerate(rows):
+            missing = [col for col in self.model.feature_cols if col not in row]
+            if missing:
+                raise ValueError(f"rows[{index}] is missing features: {missing}")
+            values = [float(row[col]) for col in self.model.feature_cols]
+            if not all(math.isfinite(v) for v in values):
+                raise ValueError(f"rows[{index}] has non-finite feature values")
+            matrix.append(values)
+        return matrix
+
+    async def score(self, rows: list[dict[str, float]]) -> list[dict[str, Any]]:
+        probs = await self.batcher.submit(self.to_matrix(rows))
+        return [{"default_prob": round(p, 6), "default_prob_pct": round(p * 100, 1),
+                 "status": _status_from_prob(p), "label": int(p >= self.model.threshold)} for p in probs]
+
+    async def close(self) -> None:
+        if self.batcher is not None:
+            await self.batcher.close()
+
+
+scorer = Scorer()
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from modeling.registry import save_artifact
+
+MODELS = {"LR": LogisticRegression,
+          "RF": lambda: RandomForestClassifier(n_estimators=20, max_depth=5, random_state=0)}
+
+
+@pytest.fixture
+def saved_artifact(tmp_path):
+    """합성 데이터로 작은 모델을 학습해 레지스트리에 저장하는 팩토리. 반환 : 버전 경로
+
+    X/y를 안 주면 표준정규 200행, y = 첫 피처 > 0. fit_dtype=np.float32면 스케일 값을 float32로 바꿔 학습한다
+    (ONNX 트리 분기점이 네이티브와 같도록). result에는 search_params 같은 러너 결과 키를 더 넣을 수 있다.
+    """
+    def save(model_type="LR", features=("ROA", "부채비율"), model=None, X=None, y=None, name=None,
+             extra=None, fit_dtype=None, **result):
+        X = np.random.default_rng(0).normal(size=(200, len(features))) if X is None else X
+        y = (X[:, 0] > 0).astype(int) if y is None else y
+        scaler = StandardScaler().fit(X)
+        model = MODELS[model_type]() if model is None else model
+        model.fit(scaler.transform(X).astype(fit_dtype or X.dtype), y)
+        return save_artifact(name or f"test-{model_type.lower()}", model_type,
+                             {"model": model, "scaler": scaler, "best_thr": 0.5, **result}, list(features),
+                             extra=extra, root=tmp_path / "artifacts")
+    return save
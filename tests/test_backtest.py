@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+import dataset
+from backtest import summarize, year_split
+from dataset import FEATURE_SETS
+
+
+def test_year_split_trains_through_year_and_tests_next_year(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    cols = FEATURE_SETS["pca"]["ALL"]
+    df = pd.DataFrame(rng.normal(size=(50, len(cols))), columns=cols)
+    df["회계년도"] = np.repeat(["2014/12", "2015/12", "2016/12", "2017/12", "2018/12"], 10)
+    df["거래소코드"] = np.tile([f"{i:06d}" for i in range(10)], 5)
+    df["label"] = rng.integers(0, 2, 50)
+    (tmp_path / "data").mkdir()
+    df.to_csv(tmp_path / "data" / "ALL.csv", index=False)
+    monkeypatch.setattr(dataset, "DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.chdir(tmp_path)  # 분할/fold 캐시는 작업 디렉터리 기준
+
+    X_train, y_train, X_test, y_test, panel = year_split("ALL", "pca", 2015)
+    assert len(y_train) == 20 and len(y_test) == 10
+    np.testing.assert_array_equal(X_test, df.loc[20:29, cols].to_numpy(np.float32))
+    assert panel["연도"].tolist() == [2014] * 10 + [2015] * 10 + [2016] * 10
+
+
+def test_summarize_pivots_ok_rows():
+    rows = [{"status": "ok", "test_year": 2017, "model": "LR", "f1": 0.5, "roc_auc": 0.7},
+            {"status": "ok", "test_year": 2018, "model": "LR", "f1": 0.4, "roc_auc": 0.6},
+            {"status": "failed", "test_year": 2018, "model": "RF"}]
+    table = summarize(rows)
+    assert table.loc[2018, ("f1", "LR")] == 0.4
+    assert "RF" not in table.columns.get_level_values("model")
@@ -0,0 +1,46 @@
+import time
+
+import numpy as np
+
+from benchmark import compare, make_split
+from dataset import FEATURE_SETS
+from synthetic import feature_columns, make_panel
+
+
+def test_make_panel_has_consecutive_company_years_and_positive_rate():
+    df = make_panel("상장", rows=4000, positive_rate=0.1, seed=0)
+    assert len(df) == 4000
+    assert set(FEATURE_SETS["pca"]["상장"]) <= set(feature_columns("상장")) <= set(df.columns)
+    assert abs(df["label"].mean() - 0.1) < 0.02
+    years = df["회계년도"].str.slice(0, 4).astype(int)
+    assert (years.groupby(df["거래소코드"]).diff().dropna() == 1).all()
+
+    split = make_split("상장", "elasticnet", rows=4000, seed=0)
+    assert split.X_train.shape[1] == len(FEATURE_SETS["elasticnet"]["상장"])
+    assert len(split.panel) == len(split.y_train) + len(split.y_test)
+    assert np.all(split.years[:len(split.y_train)] <= 2017)
+
+
+def test_compare_flags_slower_phases_only():
+    baseline = {"models": {"LR": {"status": "ok", "tune_sec": 10.0, "fit_sec": 0.1, "predict_sec": 0.01, "total_sec": 10.2},
+                           "LSTM": {"status": "skipped"}}}
+    report = {"models": {"LR": {"status": "ok", "tune_sec": 13.0, "fit_sec": 0.3, "predict_sec": 0.01, "total_sec": 13.4},
+                         "LSTM": {"status": "skipped"}}}
+    regressions = compare(report, baseline, tolerance=0.2)
+    # fit_sec은 min_sec 미만이라 잡음으로 무시
+    assert [(r["model"], r["metric"]) for r in regressions] == [("LR", "tune_sec"), ("LR", "total_sec")]
+    assert regressions[0]["change_pct"] == 30.0
+
+
+def test_phase_peak_rss_is_per_phase(monkeypatch):
+    import study
+
+    monkeypatch.setattr(study, "PHASES", {})
+    with study.phase("tune"):
+        big = np.ones(200 * 2**20 // 8)  # 200MB
+        time.sleep(0.2)
+    del big
+    with study.phase("fit"):
+        time.sleep(0.1)
+    assert study.PHASES["tune"]["peak_rss_mb"] - study.PHASES["fit"]["peak_rss_mb"] > 100  # tune의 최대값을 물려받지 않는다
+    assert study.PHASES["fit"]["sec"] >= 0.1
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import dataset
+from dataset import FEATURE_SETS, feature_columns, load_split, parse_period
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    cols = FEATURE_SETS["elasticnet"]["상장"]
+    periods = ["2015/12", "2016/12", "2017/06", "2017/12", "2018/03", "2018/12", "2019/12"]
+    df = pd.DataFrame(rng.normal(size=(70, len(cols))), columns=cols)
+    df["회계년도"] = np.repeat(periods, 10)
+    df["거래소코드"] = np.tile([f"{i:06d}" for i in range(10)], 7)
+    df["label"] = (rng.random(70) < 0.2).astype(int)
+    (tmp_path / "data").mkdir()
+    df.to_csv(tmp_path / "data" / "상장.csv", index=False)
+    monkeypatch.setattr(dataset, "DATA_DIR", str(tmp_path / "data"))
+    return tmp_path, df
+
+
+def test_parse_period():
+    year, month = parse_period(["2017/12", "2018/03", "2019"])
+    assert year.tolist() == [2017, 2018, 2019]
+    assert month.tolist() == [12, 3, 12]
+
+
+def test_feature_registry_aliases():
+    assert feature_columns("상장", "1") == FEATURE_SETS["elasticnet"]["상장"]
+    with pytest.raises(ValueError):
+        feature_columns("상장", "lasso")
+    with pytest.raises(ValueError):
+        feature_columns("코스닥", "pca")
+
+
+def test_split_matches_string_cutoff_and_is_cached(data_dir):
+    tmp_path, df = data_dir
+    cache = tmp_path / "cache"
+    split = load_split("상장", "elasticnet", cache_dir=cache)
+    cols = FEATURE_SETS["elasticnet"]["상장"]
+    train = df["회계년도"] <= "2017/12"
+    np.testing.assert_array_equal(split.X_train, df.loc[train, cols].to_numpy(np.float32))
+    np.testing.assert_array_equal(split.y_test, df.loc[~train, "label"])
+    assert split.X_train.dtype == np.float32
+    assert split.panel["연도"].tolist()[:40] == df.loc[train, "회계년도"].str[:4].astype(int).tolist()
+
+    cached = load_split("상장", "elasticnet", cache_dir=cache)
+    assert isinstance(cached.X_train, np.memmap)
+    np.testing.assert_array_equal(cached.X_train, split.X_train)
+    assert len(list(cache.iterdir())) == 1
+
+    earlier = load_split("상장", "elasticnet", cutoff="2017/06", cache_dir=cache)
+    assert len(earlier.y_train) == 30 and len(earlier.y_test) == 40 and len(list(cache.iterdir())) == 2
+    np.testing.assert_array_equal(earlier.X_test, df.loc[df["회계년도"] > "2017/06", cols].to_numpy(np.float32))
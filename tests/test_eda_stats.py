@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from eda_stats import StreamingStats, compute_stats, run
+
+
+def _frame(rows=400, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(rows, 4)) * [1e9, 1, 50, 3] + [5e11, 0, 10, -2], columns=["자산", "ROA", "매출액", "부채비율"])
+    df["ROA"] += df["자산"] / 1e9
+    df.loc[rng.random(rows) < 0.1, "매출액"] = np.nan
+    df.loc[rng.random(rows) < 0.05, "ROA"] = np.nan
+    return df
+
+
+def test_merged_chunks_match_pandas():
+    df = _frame()
+    cols = list(df.columns)
+    parts = [StreamingStats(cols, shift=df.iloc[:50].mean().to_numpy()).update(chunk) for chunk in np.array_split(df, 7)]
+    stats = sum(parts[1:], parts[0])
+    pd.testing.assert_frame_equal(stats.corr(), df.corr(), atol=1e-10)
+    np.testing.assert_allclose(stats.mean(), df.mean(), rtol=1e-12)
+    np.testing.assert_allclose(stats.var(), df.var(), rtol=1e-9)
+    np.testing.assert_allclose(stats.missing_rate(), df.isna().mean())
+
+
+def test_parallel_csv_byte_ranges_and_outputs(tmp_path):
+    df = _frame(rows=3000, seed=1)
+    df.insert(0, "회사명", "(주)가나")
+    df["label"] = 0
+    path = tmp_path / "상장.csv"
+    df.to_csv(path, index=False)
+
+    stats = compute_stats(path, n_jobs=2, chunk_bytes=4096)
+    assert stats.rows == 3000 and stats.columns == ["자산", "ROA", "매출액", "부채비율"]
+    pd.testing.assert_frame_equal(stats.corr(), df[stats.columns].corr(), atol=1e-10)
+
+    _, files = run(path, "상장", out_dir=tmp_path / "heatmap", n_jobs=1)
+    assert [f.split("/")[-1] for f in map(str, files)] == ["상장_corr.csv", "상장_corr.png", "상장_stats.csv"]
+    saved = pd.read_csv(files[0], index_col=0, encoding="utf-8-sig")
+    np.testing.assert_allclose(saved.to_numpy(), df[stats.columns].corr().to_numpy(), atol=1e-10)
@@ -0,0 +1,31 @@
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from ensemble import fit_combiner
+from folds import build_folds, oof_predict
+from registry import EnsembleModel, load_artifact, save_artifact
+
+
+def test_stacked_ensemble_round_trips_through_registry(tmp_path):
+    X, y = make_classification(n_samples=600, n_features=6, weights=[0.85], random_state=0)
+    folds = build_folds(X[:500], y[:500], X[500:], cache_dir=None)
+    makers = {"LR": lambda: LogisticRegression(max_iter=500),
+              "RF": lambda: RandomForestClassifier(n_estimators=30, max_depth=4, random_state=0)}
+    oof = np.column_stack([oof_predict(make, folds) for make in makers.values()])
+    assert oof.shape == (500, 2) and np.all((oof >= 0) & (oof <= 1))
+
+    combiner, meta_oof = fit_combiner("stacking", oof, folds.y_train, folds)
+    assert meta_oof.shape == (500,)
+    members = [(name, make().fit(folds.X_train, folds.y_train)) for name, make in makers.items()]
+    model = EnsembleModel(members, combiner)
+    path = save_artifact("ens", "Ensemble", {"model": model, "scaler": folds.scaler, "best_thr": 0.3},
+                         [f"f{i}" for i in range(6)], root=tmp_path)
+
+    loaded = load_artifact(path)
+    expected = model.combine(model.member_probs(folds.X_test))
+    np.testing.assert_allclose(loaded.predict_proba(X[500:]), expected, atol=1e-6)
+
+    _, blended = fit_combiner("blending", oof, folds.y_train, folds)
+    np.testing.assert_allclose(blended, oof.mean(axis=1))
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from bench.load_test import seed
+from etl import explain_batch
+from modeling.explain import contributions, top_k
+from modeling.registry import load_artifact
+from services.company_service import get_company_detail
+
+FEATURES = ["ROA", "부채비율", "이자보상배율"]
+
+
+def _save(saved_artifact, model_type, model=None):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 3))
+    y = (2 * X[:, 1] - X[:, 0] + rng.normal(size=300) > 0).astype(int)  # 부채비율 높을수록, ROA 낮을수록 부실
+    path = saved_artifact(model_type, FEATURES, model=model, X=X, y=y)
+    return load_artifact(str(path)), X
+
+
+def test_contributions_add_up_to_model_margin(saved_artifact):
+    lr, X = _save(saved_artifact, "LR")
+    contrib = contributions(lr, X, batch_size=64)
+    margin = lr.model.decision_function(lr.transform(X))
+    np.testing.assert_allclose(contrib.sum(axis=1) + lr.model.intercept_[0], margin, rtol=1e-5)
+
+    xg, _ = _save(saved_artifact, "XGBoost", xgb.XGBClassifier(n_estimators=20, max_depth=3))
+    contrib = contributions(xg, X, batch_size=64)
+    margin = xg.model.predict(xg.transform(X), output_margin=True)
+    bias = xg.model.get_booster().predict(xgb.DMatrix(xg.transform(X)), pred_contribs=True)[:, -1]
+    np.testing.assert_allclose(contrib.sum(axis=1) + bias, margin, rtol=1e-5, atol=1e-5)
+
+    idx = top_k(contrib, 2)
+    assert idx.shape == (300, 2)
+    assert np.all(np.abs(np.take_along_axis(contrib, idx[:, :1], axis=1)) >= np.abs(contrib).max(axis=1, keepdims=True))
+
+
+def test_explain_batch_stores_latest_year_top_k_and_dashboard_reads_it(tmp_path, saved_artifact):
+    engine = create_engine(f"sqlite:///{tmp_path / 'explain.db'}", future=True)
+    seed(engine, companies=3, years=2)
+    artifact, _ = _save(saved_artifact, "LR")
+    pd.DataFrame({"거래소코드": [1, 1, 2, 3], "연도": [2016, 2017, 2017, 2016],
+                  "ROA": [1.0, -2.0, 3.0, 0.5], "부채비율": [0.0, 2.0, -1.0, np.nan],
+                  "이자보상배율": [0.0, 0.1, 0.2, 0.3]}).to_csv(tmp_path / "features.csv", index=False)
+
+    report = explain_batch.explain(engine, str(tmp_path / "features.csv"), str(artifact.path), k=2, chunksize=2)
+    assert report["companies"] == 2 and report["rows"] == 4  # 000003은 NaN이라 제외
+
+    with sessionmaker(bind=engine)() as db:
+        detail = get_company_detail("000001", db)
+        assert get_company_detail("000003", db)["risk_contributions"] == []
+    factors = detail["risk_contributions"]
+    assert [f["feature"] for f in factors] == ["부채비율", "ROA"]
+    assert factors[0]["value"] == 2.0 and factors[0]["direction"] == "위험 증가"
+    assert abs(factors[0]["contribution"]) >= abs(factors[1]["contribution"])
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_classification
+
+import dataset
+from feature_selection import save_feature_sets, select, vif
+
+
+def test_vif_matches_uncentered_regression():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 4))
+    X[:, 3] = X[:, 0] + 0.1 * rng.normal(size=200)
+    expected = []
+    for i in range(4):
+        others = np.delete(X, i, axis=1)
+        resid = X[:, i] - others @ np.linalg.lstsq(others, X[:, i], rcond=None)[0]
+        expected.append(1 / (resid @ resid / (X[:, i] @ X[:, i])))
+    np.testing.assert_allclose(vif(X), expected, rtol=1e-8)
+
+
+def test_selection_is_versioned_and_read_by_dataset(tmp_path, monkeypatch):
+    X, y = make_classification(n_samples=400, n_features=8, n_informative=4, weights=[0.85], random_state=0)
+    df = pd.DataFrame(X, columns=[f"x{i}" for i in range(8)])
+    df["회계년도"] = np.where(np.arange(400) < 300, "2016/12", "2018/12")
+    df["거래소코드"] = "000001"
+    df["label"] = y
+    (tmp_path / "data").mkdir()
+    df.to_csv(tmp_path / "data" / "상장.csv", index=False)
+    monkeypatch.setattr(dataset, "DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr(dataset, "FEATURE_SET_DIR", str(tmp_path / "feature_sets"))
+    monkeypatch.chdir(tmp_path)
+
+    best, results, info = select("상장", sizes=(3, 5), n_jobs=1)
+    assert set(best) == {"elasticnet", "pca"}
+    assert info["n_rows"] == 300 and "거래소코드" not in info["vif"]
+    assert all(0 <= r["pr_auc"] <= 1 for r in results)
+
+    assert dataset.feature_set_tag("상장", "pca") == "pca"
+    path = save_feature_sets("상장", best, results, info, root=tmp_path / "feature_sets")
+    assert path.name == "v0001"
+    assert dataset.feature_columns("상장", "elasticnet") == best["elasticnet"]["features"]
+    assert dataset.feature_set_tag("상장", "1") == "elasticnet-v0001"
+    # 저장된 버전이 없는 데이터셋은 코드에 선언된 목록
+    assert dataset.feature_columns("ALL", "pca") == dataset.FEATURE_SETS["pca"]["ALL"]
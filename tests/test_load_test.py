@@ -0,0 +1,17 @@
+from bench import load_test
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert load_test.percentile(values, 50) == 50.0
+    assert load_test.percentile(values, 99) == 99.0
+    assert load_test.percentile([], 95) == 0.0
+
+
+def test_load_test_smoke(tmp_path):
+    report = load_test.run(f"sqlite:///{tmp_path / 'load.db'}", companies=5, years=2, requests=6, concurrency=3)
+    assert report["config"]["seeded_rows"] == 10
+    assert report["smtp_messages"] > 0
+    for name, route in report["routes"].items():
+        assert route["requests"] == 6 and route["errors"] == 0, name
+        assert set(route["latency_ms"]) >= {"p50", "p95", "p99"}
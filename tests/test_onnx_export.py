@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("skl2onnx")
+pytest.importorskip("onnxmltools")
+pytest.importorskip("onnxruntime")
+
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from onnx_export import export_onnx
+from registry import Artifact, OnnxArtifact, load_artifact
+
+
+def _models():
+    yield "LR", LogisticRegression()
+    yield "RF", RandomForestClassifier(n_estimators=20, max_depth=5, random_state=0)
+    xgb = pytest.importorskip("xgboost")
+    yield "XGBoost", xgb.XGBClassifier(n_estimators=30, max_depth=3, tree_method="hist")
+    catboost = pytest.importorskip("catboost")
+    yield "CatBoost", catboost.CatBoostClassifier(iterations=30, depth=3, verbose=0, allow_writing_files=False)
+
+
+@pytest.mark.parametrize("model_type", ["LR", "RF", "XGBoost", "CatBoost"])
+def test_onnx_matches_native_predict_proba(saved_artifact, model_type):
+    model = dict(_models())[model_type]
+    rng = np.random.default_rng(0)
+    X = rng.normal(loc=[5.0, -2.0, 100.0], scale=[1.0, 3.0, 40.0], size=(400, 3))
+    y = ((X[:, 0] - 5) + (X[:, 2] - 100) / 40 + rng.normal(scale=0.5, size=400) > 0).astype(int)
+    path = saved_artifact(model_type, ["a", "b", "c"], model=model, X=X, y=y, name="parity",
+                          fit_dtype=np.float32)
+
+    export_onnx(path)
+
+    native, onnx_model = Artifact(path), OnnxArtifact(path)
+    assert native.meta["files"].get("onnx") == "model.onnx"
+    assert native.meta["onnx"]["parity_max_abs_diff"] < 1e-4
+    np.testing.assert_allclose(onnx_model.predict_proba(X), native.predict_proba(X), atol=1e-4)
+    assert isinstance(load_artifact(path, runtime="auto"), OnnxArtifact)
@@ -0,0 +1,52 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import main
+from db import Base
+from db_models.dashboard_flat import DashboardFlat
+from services.company_service import get_company_detail
+from services.query_stats import fingerprint, instrument_engine, query_budget, query_stats
+
+
+@pytest.fixture
+def sqlite_session():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    instrument_engine(engine)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        for year in (2021, 2022, 2023):
+            db.add(DashboardFlat(stock_code="003230", year=year, company_name="삼양식품", industry_category="제조업",
+                                 default_prob=0.1 * (year - 2020), median_default_prob=0.2, news_titles=[]))
+        db.commit()
+        yield db
+
+
+def test_fingerprint_ignores_literal_values():
+    assert fingerprint("SELECT * FROM t WHERE id = 1") == fingerprint("SELECT *\n FROM t WHERE id = 42")
+    assert fingerprint("SELECT a FROM t WHERE x IN (?, ?)") == fingerprint("SELECT a FROM t WHERE x IN (?)")
+    assert fingerprint("SELECT a FROM t") != fingerprint("SELECT b FROM t")
+
+
+def test_company_detail_stays_within_query_budget(sqlite_session):
+    with query_budget(3) as executed:
+        data = get_company_detail("003230", sqlite_session)
+    assert data["insolvency_data"]["percent"] == "30.0%"
+    assert len(executed) == 3
+    with pytest.raises(AssertionError, match="at most 1 queries"):
+        with query_budget(1):
+            get_company_detail("003230", sqlite_session)
+
+
+def test_queries_are_tagged_with_route_template(sqlite_session):
+    query_stats.reset()
+    main.app.dependency_overrides[main.get_db] = lambda: sqlite_session
+    try:
+        response = TestClient(main.app).get("/api/dashboard", params={"corp_id": "3230"})
+    finally:
+        main.app.dependency_overrides.clear()
+    assert response.status_code == 200
+    assert query_stats.by_route()["/api/dashboard"]["count"] == 4
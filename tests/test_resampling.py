@@ -0,0 +1,44 @@
+import numpy as np
+from imblearn.over_sampling import BorderlineSMOTE
+from sklearn.datasets import make_classification
+from sklearn.linear_model import LogisticRegression
+
+from folds import build_folds, oof_predict
+from resampling import resample
+
+
+def _data():
+    X, y = make_classification(n_samples=800, n_features=5, weights=[0.9], random_state=0)
+    return X.astype(np.float32), y.astype(np.int32)
+
+
+def test_resample_matches_borderline_smote_and_is_cached(tmp_path):
+    X, y = _data()
+    expected_X, expected_y = BorderlineSMOTE(random_state=42, kind="borderline-1").fit_resample(X, y)
+    X_res, y_res = resample(X, y, cache_dir=tmp_path)
+    np.testing.assert_array_equal(X_res, expected_X)
+    np.testing.assert_array_equal(y_res, expected_y)
+
+    cached_X, cached_y = resample(X, y, cache_dir=tmp_path)
+    assert isinstance(cached_X, np.memmap)
+    np.testing.assert_array_equal(cached_X, expected_X)
+    # 파라미터가 다르면 다른 키
+    resample(X, y, cache_dir=tmp_path, k_neighbors=3)
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_resampled_folds_only_touch_training_part(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    X, y = _data()
+    folds = build_folds(X, y, cache_dir=None)
+    smote_folds = folds.resampled()
+    assert smote_folds.resampled() is smote_folds and not folds.smote
+    for fold, smote_fold in zip(folds, smote_folds):
+        assert len(smote_fold.y_tr) > len(fold.y_tr)
+        assert smote_fold.y_tr.mean() == 0.5
+        np.testing.assert_array_equal(smote_fold.X_val, fold.X_val)
+        np.testing.assert_array_equal(smote_fold.val_idx, fold.val_idx)
+    assert len(smote_folds.subsample(0.5).fold(0).y_tr) > len(folds.subsample(0.5).fold(0).y_tr)
+
+    oof = oof_predict(lambda: LogisticRegression(max_iter=500), folds, use_SMOTE=True)
+    assert oof.shape == (len(y),) and np.all((oof >= 0) & (oof <= 1))
@@ -0,0 +1,43 @@
+import sqlite3
+
+import numpy as np
+from sklearn.metrics import average_precision_score, f1_score, precision_score, roc_auc_score
+
+from result import bootstrap_metrics, model_result
+
+
+def test_bootstrap_matches_sklearn_on_resampled_rows():
+    rng = np.random.default_rng(3)
+    n, n_boot = 60, 25
+    y = rng.integers(0, 2, n)
+    prob = np.round(rng.random(n), 1)  # 동점 포함
+    pred = (prob >= 0.5).astype(int)
+    boots = bootstrap_metrics(y, prob, pred, n_boot=n_boot, seed=7, chunk=n * 10)
+
+    # 같은 seed로 확률 오름차순 위치를 복원추출한 표본
+    order = np.argsort(prob, kind="stable")
+    draws = order[np.random.default_rng(7).integers(0, n, size=(n_boot, n))]
+    for b in range(n_boot):
+        idx = draws[b]
+        assert np.isclose(boots["roc_auc"][b], roc_auc_score(y[idx], prob[idx]))
+        assert np.isclose(boots["pr_auc"][b], average_precision_score(y[idx], prob[idx]))
+        assert np.isclose(boots["f1"][b], f1_score(y[idx], pred[idx]))
+        assert np.isclose(boots["precision"][b], precision_score(y[idx], pred[idx]))
+
+
+def test_model_result_returns_intervals_and_logs(tmp_path):
+    rng = np.random.default_rng(0)
+    y = (rng.random(500) < 0.1).astype(int)
+    prob = np.clip(y * 0.4 + rng.random(500) * 0.6, 0, 1)
+    result = {"y_prob": prob, "y_pred": (prob >= 0.5).astype(int), "best_params": {"C": 1.0}, "best_thr": 0.5,
+              "timing": {"tune": 1.5, "fit": 0.2}}
+    log = tmp_path / "experiments.db"
+    metrics = model_result(result, y, context={"data": "ALL", "model": "LR"}, n_boot=500, log_path=str(log))
+    lo, hi = metrics["ci"]["roc_auc"]
+    assert lo < metrics["roc_auc"] < hi
+    assert metrics["n_pos"] == y.sum()
+
+    model_result(result, y, context={"data": "ALL", "model": "RF"}, n_boot=0, log_path=str(log))
+    with sqlite3.connect(log) as conn:
+        rows = conn.execute("SELECT model, tune_sec, roc_auc_lo, n_boot FROM experiments ORDER BY id").fetchall()
+    assert rows == [("LR", 1.5, lo, 500), ("RF", 1.5, None, 0)]
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from bench.load_test import seed
+from etl import score_batch
+
+FEATURES = ["ROA", "부채비율"]
+
+
+def test_score_batch_updates_probabilities_and_medians(tmp_path, saved_artifact):
+    engine = create_engine(f"sqlite:///{tmp_path / 'score.db'}", future=True)
+    seed(engine, companies=6, years=2)
+    path = saved_artifact(features=FEATURES)
+    features = pd.DataFrame({"거래소코드": [1, 2, 3, 3, 999], "연도": [2016, 2016, 2017, 2017, 2016],
+                             "ROA": [3.0, -3.0, 3.0, -3.0, 0.0], "부채비율": [0.0, 0.0, 0.0, np.nan, 0.0]})
+    features.to_csv(tmp_path / "features.csv", index=False)
+
+    report = score_batch.score(engine, str(tmp_path / "features.csv"), str(path), chunksize=2)
+
+    assert report["scored"] == 4 and report["skipped"] == 1 and report["updated"] == 3
+    with engine.connect() as conn:
+        rows = dict(conn.execute(text("SELECT stock_code || '/' || year, label FROM dashboard_flat "
+                                      "WHERE stock_code IN ('000001', '000002', '000003')")).all())
+        frame = pd.read_sql("SELECT industry_code, year, default_prob, median_default_prob FROM dashboard_flat", conn)
+    assert rows["000001/2016"] == 1 and rows["000002/2016"] == 0 and rows["000003/2017"] == 1
+    expected = frame.groupby(["industry_code", "year"])["default_prob"].transform("median")
+    assert np.allclose(frame["median_default_prob"].astype(float), expected)
+
+
+def test_score_batch_dry_run_leaves_table_untouched(tmp_path, saved_artifact):
+    engine = create_engine(f"sqlite:///{tmp_path / 'score.db'}", future=True)
+    seed(engine, companies=3, years=1)
+    path = saved_artifact(features=FEATURES)
+    pd.DataFrame({"stock_code": ["000001"], "year": [2016], "ROA": [5.0], "부채비율": [1.0]}).to_csv(
+        tmp_path / "features.csv", index=False)
+    with engine.connect() as conn:
+        before = conn.execute(text("SELECT default_prob FROM dashboard_flat ORDER BY stock_code")).all()
+
+    report = score_batch.score(engine, str(tmp_path / "features.csv"), str(path), dry_run=True)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT default_prob FROM dashboard_flat ORDER BY stock_code")).all() == before
+    assert report["scored"] == 1 and report["updated"] == 0
+
+
+class HistoryArtifact:
+    """시퀀스 LSTM 아티팩트 대역 : 기업별 이전 연도 행 수를 확률로 돌려준다"""
+    feature_cols = FEATURES
+    threshold = 0.5
+    needs_history = True
+    path = "lstm/v0001"
+
+    def predict_proba(self, X, groups=None, years=None):
+        frame = pd.DataFrame({"code": groups, "year": years})
+        return frame.groupby("code")["year"].rank().to_numpy() / 10
+
+
+def test_score_batch_keeps_company_history_together_for_sequence_models(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'score.db'}", future=True)
+    seed(engine, companies=2, years=3)
+    monkeypatch.setattr(score_batch, "load_artifact", lambda *args: HistoryArtifact())
+    pd.DataFrame({"거래소코드": [1, 2, 1, 2, 1], "연도": [2016, 2016, 2017, 2017, 2018],
+                  "ROA": [0.0] * 5, "부채비율": [0.0] * 5}).to_csv(tmp_path / "features.csv", index=False)
+
+    report = score_batch.score(engine, str(tmp_path / "features.csv"), "lstm", chunksize=2)
+
+    assert report["scored"] == 5
+    with engine.connect() as conn:
+        probs = dict(conn.execute(text("SELECT year, default_prob FROM dashboard_flat WHERE stock_code = '000001'")).all())
+    assert [float(probs[y]) for y in (2016, 2017, 2018)] == [0.1, 0.2, 0.3]  # 청크(2행)를 넘어 이력이 이어진다
@@ -0,0 +1,116 @@
+import asyncio
+import math
+from collections import defaultdict, deque
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services.scoring import MicroBatcher, Scorer
+
+
+class StubModel:
+    feature_cols = ["ROA", "부채비율"]
+    threshold = 0.5
+
+    def __init__(self):
+        self.calls = []
+
+    def predict_proba(self, X):
+        self.calls.append(len(X))
+        return [1 / (1 + math.exp(-(roa - debt))) for roa, debt in X]
+
+
+def test_score_endpoint_validates_and_buckets(monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    stub = StubModel()
+    monkeypatch.setattr(main, "scorer", Scorer())
+    client = TestClient(main.app)
+    assert client.post("/api/score", json={"rows": [{"ROA": 1, "부채비율": 0}]}).status_code == 503
+
+    main.scorer.load(stub, "stub/v0001")
+    response = client.post("/api/score", json={"rows": [{"ROA": 5, "부채비율": 0}, {"ROA": 0, "부채비율": 5}]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == ["위험", "양호"]
+    assert [r["label"] for r in results] == [1, 0]
+    assert stub.calls == [2]
+    assert client.post("/api/score", json={"rows": [{"ROA": 1}]}).status_code == 422
+    assert client.post("/api/score", json={"rows": []}).status_code == 422
+
+
+def test_score_endpoint_uses_shared_post_protection(monkeypatch):
+    monkeypatch.setattr(main, "scorer", Scorer())
+    main.scorer.load(StubModel())
+    monkeypatch.setattr(main, "_requests", defaultdict(deque))
+    client = TestClient(main.app)
+    row = {"rows": [{"ROA": 1, "부채비율": 0}]}
+
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    assert client.post("/api/score", json=row).status_code == 403
+    assert client.post("/api/score", json=row, headers={"X-Admin-Token": "secret"}).status_code == 200
+
+    monkeypatch.delenv("ADMIN_TOKEN")
+    monkeypatch.setenv("SCORE_RATE_LIMIT_MAX_REQUESTS", "2")
+    assert client.post("/api/score", json=row).status_code == 200
+    assert client.post("/api/score", json=row).status_code == 429  # 토큰 없이도 IP별 제한
+    assert not main._requests["post:testclient"]  # 폼 라우트 예산과 별도
+
+
+def test_scorer_refuses_models_that_need_company_history():
+    stub = StubModel()
+    stub.needs_history = True  # 시퀀스 LSTM : 요청 한 행으로는 학습 때 윈도우를 만들 수 없다
+    with pytest.raises(ValueError, match="score_batch"):
+        Scorer().load(stub, "lstm/v0001")
+
+
+def test_concurrent_requests_are_micro_batched(monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    stub = StubModel()
+    scorer = Scorer()
+    scorer.load(stub)
+    scorer.batcher.window = 0.05
+    monkeypatch.setattr(main, "scorer", scorer)
+
+    async def fire():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(*[
+                client.post("/api/score", json={"rows": [{"ROA": i, "부채비율": 0}]}) for i in range(20)])
+        await scorer.close()
+        return responses
+
+    responses = asyncio.run(fire())
+    assert all(r.status_code == 200 for r in responses)
+    assert sum(stub.calls) == 20 and len(stub.calls) < 20
+    probs = [r.json()["results"][0]["default_prob"] for r in responses]
+    assert probs == sorted(probs)
+
+
+def test_batcher_respects_max_batch():
+    calls = []
+    batcher = MicroBatcher(lambda X: calls.append(len(X)) or [0.0] * len(X), max_batch=4, window_ms=50)
+
+    async def fire():
+        results = await asyncio.gather(*[batcher.submit([[float(i)]]) for i in range(10)])
+        await batcher.close()
+        return results
+
+    assert asyncio.run(fire()) == [[0.0]] * 10
+    assert max(calls) <= 4 and sum(calls) == 10
+
+
+def test_batcher_splits_oversized_requests_into_max_batch_rows():
+    calls = []
+    batcher = MicroBatcher(lambda X: calls.append(len(X)) or [row[0] for row in X], max_batch=4, window_ms=50)
+
+    async def fire():
+        results = await asyncio.gather(batcher.submit([[float(i)] for i in range(10)]), batcher.submit([[10.0], [11.0]]),
+                                       batcher.submit([[12.0] for _ in range(3)]))
+        await batcher.close()
+        return results
+
+    big, small, odd = asyncio.run(fire())
+    assert big == [float(i) for i in range(10)] and small == [10.0, 11.0] and odd == [12.0] * 3  # 요청별 순서 유지
+    assert max(calls) <= 4 and sum(calls) == 15
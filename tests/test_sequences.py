@@ -0,0 +1,80 @@
+import numpy as np
+
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from registry import EnsembleModel, _member_proba, _needs_history
+from sequences import build_sequences, single_step
+
+
+def _panel():
+    # 입력 순서를 섞어 두고 기업 B는 2015년이 빠져 있다
+    groups = np.array(["B", "A", "A", "B", "A", "B"])
+    years = np.array([2016, 2015, 2014, 2013, 2016, 2014])
+    X = np.arange(6 * 2, dtype=np.float64).reshape(6, 2)
+    return X, groups, years
+
+
+def test_windows_follow_company_history():
+    X, groups, years = _panel()
+    seq = build_sequences(X, groups, years, lookback=3)
+    windows, mask = seq.windows()
+    assert windows.shape == (6, 3, 2) and windows.dtype == np.float32
+    # 마지막 칸은 항상 자기 자신
+    np.testing.assert_array_equal(windows[:, -1], X.astype(np.float32))
+    assert mask[:, -1].all()
+    # A 2016 : 2014, 2015, 2016
+    np.testing.assert_array_equal(windows[4], X[[2, 1, 4]])
+    assert mask[4].tolist() == [True, True, True]
+    # A 2014 : 앞 칸은 패딩/다른 기업
+    assert mask[2].tolist() == [False, False, True]
+
+
+def test_mask_drops_other_companies_and_year_gaps():
+    X, groups, years = _panel()
+    _, mask = build_sequences(X, groups, years, lookback=3).windows()
+    # B 2013 : 정렬상 바로 앞은 A 2016 -> 제외
+    assert mask[3].tolist() == [False, False, True]
+    # B 2016 : 직전 행은 2014 (2015 누락) -> 2014만 lookback 범위 안
+    assert mask[0].tolist() == [False, True, True]
+    # B 2014 : 2013은 포함
+    assert mask[5].tolist() == [False, True, True]
+
+
+def test_subset_rows_and_single_step():
+    X, groups, years = _panel()
+    seq = build_sequences(X, groups, years, lookback=2)
+    windows, mask = seq.windows([4, 0])
+    np.testing.assert_array_equal(windows[:, -1], X[[4, 0]].astype(np.float32))
+    assert mask.tolist() == [[True, True], [False, True]]
+    # 윈도우 전체가 아닌 패딩된 정렬 배열 하나만 보관
+    assert seq.X_pad.shape == (len(X) + 1, 2)
+
+    flat, flat_mask = single_step(X).windows()
+    np.testing.assert_array_equal(flat[:, 0], X.astype(np.float32))
+    assert flat_mask.all()
+
+
+class SequenceLSTM:
+    """Keras 시퀀스 LSTM 대역 : 입력 (윈도우, mask), 예측 = mask된 칸의 첫 피처 합"""
+
+    def __init__(self, lookback):
+        self.inputs = [type("Input", (), {"shape": (None, lookback, 2)})(), object()]
+
+    def predict(self, inputs, verbose=0):
+        windows, mask = inputs
+        return (windows[:, :, 0] * mask).sum(axis=1, keepdims=True)
+
+
+def test_sequence_lstm_is_served_with_company_history():
+    X, groups, years = _panel()
+    lstm = SequenceLSTM(lookback=3)
+    probs = _member_proba("LSTM", lstm, X.astype(np.float32), groups, years)
+    # A 2016 = 2014 + 2015 + 2016, B 2016 = 2014 + 2016 (2015 누락)
+    assert probs[4] == X[[2, 1, 4], 0].sum() and probs[0] == X[[5, 0], 0].sum()
+    with pytest.raises(ValueError, match="이력"):
+        _member_proba("LSTM", lstm, X.astype(np.float32))
+
+    lr = LogisticRegression().fit(X, [0, 1, 0, 1, 1, 0])
+    assert _needs_history("Ensemble", EnsembleModel([("LR", lr), ("LSTM", lstm)]))
+    assert not _needs_history("LR", lr)
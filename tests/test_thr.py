@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from sklearn.metrics import fbeta_score, precision_recall_curve, precision_score, recall_score
+
+from thr import find_best_threshold, find_best_thresholds
+
+
+def _legacy(y_true, probs):
+    precision, recall, thresholds = precision_recall_curve(y_true, probs)
+    f1 = (2 * precision[:-1] * recall[:-1]) / (precision[:-1] + recall[:-1] + 1e-12)
+    return thresholds[np.argmax(f1)], f1[np.argmax(f1)]
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    y = (rng.random(500) < 0.1).astype(int)
+    probs = np.clip(rng.normal(0.3 + 0.3 * y, 0.2, size=(8, 500)), 0, 1).round(2)  # 반올림으로 동점 포함
+    return y, probs
+
+
+def test_f1_matches_precision_recall_curve(data):
+    y, probs = data
+    thr, f1 = find_best_thresholds(y, probs, objective="f1")
+    for k in range(len(probs)):
+        legacy_thr, legacy_f1 = _legacy(y, probs[k])
+        assert thr[k] == legacy_thr
+        assert f1[k] == pytest.approx(legacy_f1, abs=1e-9)
+        assert find_best_threshold(y, probs[k], objective="f1") == (thr[k], f1[k])
+
+
+def test_fbeta_and_min_recall(data):
+    y, probs = data
+    thr, score = find_best_threshold(y, probs[0], objective="fbeta", beta=2.0)
+    assert score == pytest.approx(fbeta_score(y, probs[0] >= thr, beta=2.0))
+    grid = np.unique(probs[0])
+    assert score >= max(fbeta_score(y, probs[0] >= t, beta=2.0) for t in grid) - 1e-12
+
+    thr, precision = find_best_threshold(y, probs[0], objective="precision", min_recall=0.9)
+    assert recall_score(y, probs[0] >= thr) >= 0.9
+    feasible = [precision_score(y, probs[0] >= t) for t in grid if recall_score(y, probs[0] >= t) >= 0.9]
+    assert precision == pytest.approx(max(feasible))
+
+
+def test_cost_weighted_objective(data):
+    y, probs = data
+    thr, score = find_best_threshold(y, probs[0], objective="cost", cost_fn=20.0, cost_fp=1.0)
+    pred = probs[0] >= thr
+    cost = 20.0 * np.sum((y == 1) & ~pred) + np.sum((y == 0) & pred)
+    assert score == pytest.approx(-cost / len(y))
+    assert thr <= find_best_threshold(y, probs[0], objective="f1")[0]
+
+
+def test_batched_bootstrap_labels(data):
+    y, probs = data
+    idx = np.random.default_rng(1).integers(0, len(y), size=(5, len(y)))
+    thr, f1 = find_best_thresholds(y[idx], probs[0][idx], objective="f1")
+    for k in range(5):
+        assert (thr[k], f1[k]) == find_best_threshold(y[idx[k]], probs[0][idx[k]], objective="f1")
@@ -0,0 +1,83 @@
+import optuna
+
+import CatBoost
+import LR
+import study
+from study import create_study, fit_space, prior_params, suggest_float, suggest_int, warm_start
+
+
+def _objective(trial):
+    C = suggest_float(trial, "C", 1e-3, 1e2, log=True)
+    depth = suggest_int(trial, "max_depth", 2, 12)
+    return -abs(C - 0.5) - depth / 100
+
+
+def test_prior_params_come_from_other_studies_of_the_same_model(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # 레지스트리(artifacts/) 탐색을 격리
+    url = f"sqlite:///{tmp_path / 'optuna.db'}"
+    for name, C, depth in [("상장-elasticnet-LR", 0.4, 3), ("비상장-elasticnet-LR", 20.0, 9),
+                           ("상장-elasticnet-RF", 0.5, 4)]:
+        old = optuna.create_study(study_name=name, storage=url, direction="maximize")
+        old.enqueue_trial({"C": C, "max_depth": depth})
+        old.optimize(_objective, n_trials=1)
+
+    priors = prior_params("ALL-elasticnet-LR", "auto", storage=url)
+    assert priors == [{"C": 0.4, "max_depth": 3}, {"C": 20.0, "max_depth": 9}]  # best value 순, RF 제외
+    assert prior_params("ALL-elasticnet-LR", "비상장-elasticnet-LR", storage=url) == [{"C": 20.0, "max_depth": 9}]
+    assert prior_params("상장-elasticnet-LR", "상장-elasticnet-LR", storage=url) == []  # 자기 자신은 제외
+
+    monkeypatch.setattr(study, "WARM_START", "auto")
+    monkeypatch.setattr(study, "PRUNING", True)
+    new = create_study("ALL-elasticnet-LR", storage=url)
+    new.optimize(_objective, n_trials=2)
+    assert [t.params for t in new.trials] == priors
+    # 이미 trial이 있는 스터디를 다시 열면 다시 enqueue하지 않는다
+    again = create_study("ALL-elasticnet-LR", storage=url)
+    assert len(again.get_trials(states=(optuna.trial.TrialState.WAITING,))) == 0
+
+
+def test_narrow_limits_numeric_ranges_around_priors(monkeypatch):
+    new = warm_start(optuna.create_study(direction="maximize"), [{"C": 0.1, "max_depth": 4}, {"C": 1.0, "max_depth": 6}])
+    new.optimize(_objective, n_trials=2)  # enqueue된 prior 먼저
+
+    monkeypatch.setattr(study, "NARROW", 0.1)
+    new.optimize(_objective, n_trials=20)
+    sampled = new.trials[2:]
+    assert all(0.1 / 10 ** 0.5 <= t.params["C"] <= 1.0 * 10 ** 0.5 for t in sampled)
+    assert all(3 <= t.params["max_depth"] <= 7 for t in sampled)
+
+    monkeypatch.setattr(study, "NARROW", 0.0)
+    trial = optuna.trial.FixedTrial({"C": 50.0, "max_depth": 12})
+    assert _objective(trial) == -49.5 - 0.12  # 좁히지 않으면 원래 범위 그대로
+
+
+def test_artifact_search_params_are_enqueued_within_the_search_space(tmp_path, monkeypatch, saved_artifact):
+    monkeypatch.chdir(tmp_path)  # 기본 ARTIFACT_DIR('artifacts')가 tmp_path 아래를 가리키도록
+    saved_artifact("LR", name="상장-elasticnet-LR", best_params={"C": 1.0, "max_iter": 1000, "random_state": 42},
+                   search_params={"C": 500.0, "penalty": "l1", "solver": "saga", "junk": 1})
+    saved_artifact("RF", name="상장-elasticnet-RF", search_params={"n_estimators": 200})  # 다른 모델 종류는 제외
+
+    priors = prior_params("ALL-elasticnet-LR", "auto", storage="")
+    assert priors == [{"C": 500.0, "penalty": "l1", "solver": "saga", "junk": 1}]  # best_params가 아니라 search_params
+
+    monkeypatch.setattr(study, "WARM_START", "auto")
+    new = create_study("ALL-elasticnet-LR", storage="", search_space=LR.SEARCH_SPACE)
+    new.optimize(lambda trial: suggest_float(trial, "C", *LR.SEARCH_SPACE["C"])
+                 + len(trial.suggest_categorical("penalty", LR.SEARCH_SPACE["penalty"]))
+                 + len(trial.suggest_categorical("solver", LR.SEARCH_SPACE["solver"])), n_trials=1)
+    assert new.trials[0].params == {"C": 100.0, "penalty": "l1", "solver": "saga"}  # 범위 밖 C는 상한으로
+    assert {k: tuple(v) for k, v in new.user_attrs["prior_ranges"].items()} == {"C": (100.0, 100.0)}
+
+
+def test_fit_space_drops_unknown_keys_and_clips_to_bounds():
+    params = {"iterations": 3217, "depth": 3.6, "learning_rate": 0.5, "loss_function": "Logloss", "thread_count": 4}
+    assert fit_space(params, CatBoost.SEARCH_SPACE) == {"iterations": 3000, "depth": 4, "learning_rate": 0.3}
+    assert fit_space({"penalty": "elasticnet", "solver": "saga"}, LR.SEARCH_SPACE) == {"solver": "saga"}
+    assert fit_space({"C": 0.5, "junk": 1}, None) == {"C": 0.5, "junk": 1}
+
+
+def test_only_named_studies_in_the_storage_run_in_worker_processes(tmp_path):
+    url = f"sqlite:///{tmp_path / 'optuna.db'}"
+    assert study._persistent(create_study("ALL-elasticnet-LR", storage=url), url)
+    assert not study._persistent(create_study(storage=url), url)  # 이름 없는 스터디는 메모리
+    assert not study._persistent(create_study("ALL-elasticnet-LR", storage=""), "")